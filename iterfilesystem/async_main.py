@@ -0,0 +1,130 @@
+import asyncio
+import logging
+from timeit import default_timer
+
+# IterFilesystem
+from iterfilesystem.async_scandir import get_running_loop
+from iterfilesystem.main import IterFilesystem
+from iterfilesystem.utils import UpdateInterval
+
+log = logging.getLogger(__name__)
+
+
+class AsyncIterFilesystem(IterFilesystem):
+    """
+    asyncio version of IterFilesystem, e.g.: to use it in a asyncio based service:
+
+        stats_helper = await AsyncIterFilesystem(...).process()
+
+    The worker walker must support 'async for', e.g.: AsyncScandirWalker
+    process_dir_entry() is a coroutine and up to 'max_tasks' of them run concurrently,
+    so I/O bound work (e.g.: uploads) overlaps with the filesystem walk.
+
+    The process priority is not changed: It would also slow down the rest of the service.
+    """
+    supports_checkpoints = False
+    supports_batches = False
+
+    def __init__(self, *, max_tasks=10, **kwargs):
+        super().__init__(**kwargs)
+        if self.single_walk:
+            raise NotImplementedError('The single walk mode is not supported in asyncio mode!')
+
+        if not hasattr(self.worker_scan_dir, '__aiter__'):
+            raise TypeError(f'{self.ScanDirClass.__name__} does not support "async for"!')
+
+        self.max_tasks = max_tasks
+
+    async def process(self):
+        self._init_checkpoint()
+        collect_processes = []
+        start_time = default_timer()
+        try:
+            self._start_collect_processes(collect_processes)
+
+            await self._start_worker()
+            self.stats_helper.process_duration = default_timer() - start_time
+
+            # process.join() would block the event loop:
+            await get_running_loop().run_in_executor(None, self._finish_collect_processes, collect_processes)
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            self.stats_helper.abort = True
+            self.stats_helper.process_duration = default_timer() - start_time
+            log.warning('*** Abort! ***')
+            raise
+        finally:
+            for process in collect_processes:
+                process.terminate()
+
+        self.stats_helper.done()
+        if self.instrumentation is not None:
+            self.instrumentation.merge_into(self.stats_helper)
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.update(self.stats_helper, done=True)
+        self.done()
+        return self.stats_helper
+
+    async def _start_worker(self):
+        if self.instrumentation is None:
+            await self.start()
+            return
+
+        self.instrumentation.instrument_iter_filesystem(self)
+        self.instrumentation.instrument_walker(self.worker_scan_dir)
+        with self.instrumentation.profile():
+            await self.start()
+
+    async def _process_dir_entry(self, dir_entry, process_bars, semaphore):
+        try:
+            await self.process_dir_entry(dir_entry=dir_entry, process_bars=process_bars)
+        except OSError:
+            self._process_error(dir_entry)
+        finally:
+            semaphore.release()
+
+        self.stats_helper.process_files += 1
+
+        if self.worker_update_interval:
+            self._update_stats_helper(dir_entry, process_bars)
+
+    ##############################################################################################
+    # methods to overwrite:
+
+    async def start(self):
+        log.debug('Worker starts')
+
+        self.update_file_interval = UpdateInterval(interval=self.update_interval_sec)
+        semaphore = asyncio.Semaphore(self.max_tasks)
+        tasks = set()
+        with self._get_process_bars() as process_bars:
+            dir_entry = None
+            try:
+                async for dir_entry in self.worker_scan_dir:
+                    await semaphore.acquire()
+                    task = asyncio.ensure_future(self._process_dir_entry(dir_entry, process_bars, semaphore))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+
+                if tasks:
+                    await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
+
+            if dir_entry is not None:
+                self._update_stats_helper(dir_entry, process_bars)
+
+        log.debug('Worker done.')
+
+    async def process_dir_entry(self, dir_entry, process_bars):
+        """
+        The implementation must update the total file size, see below:
+        """
+        # e.g.:
+        self.update(
+            dir_entry=dir_entry,
+            file_size=dir_entry.stat().st_size,
+            process_bars=process_bars
+        )
+        raise NotImplementedError()
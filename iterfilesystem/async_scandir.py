@@ -0,0 +1,98 @@
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# IterFilesystem
+from iterfilesystem.parallel_scandir import ParallelScandirWalker
+
+log = logging.getLogger(__name__)
+
+# asyncio.get_running_loop() is new in Python 3.7:
+get_running_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)
+
+
+class AsyncScandirWalker(ParallelScandirWalker):
+    """
+    Iterate with 'async for' inside a running event loop:
+    The os.scandir() calls runs in a thread pool, so the event loop is never blocked
+    by a directory listing. Up to 'max_workers' listings are in flight.
+
+    The filter and order rules are the same as ParallelScandirWalker,
+    a normal 'for' loop (e.g.: in the collect processes) works, too.
+    """
+
+    def __aiter__(self):
+        return self._aiter()
+
+    async def _aiter(self):
+        loop = get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='async_scandir')
+
+        def list_dir(path):
+            return loop.run_in_executor(executor, self._list_dir, path)
+
+        try:
+            if self.ordered:
+                iterator = self._aiter_ordered(list_dir)
+            else:
+                iterator = self._aiter_unordered(list_dir)
+
+            async for dir_entry in iterator:
+                yield dir_entry
+        finally:
+            executor.shutdown(wait=False)
+
+    async def _aiter_unordered(self, list_dir):
+        pending = deque([self.top_path])
+        in_flight = set()
+        try:
+            while pending or in_flight:
+                while pending and len(in_flight) < self.max_workers:
+                    in_flight.add(list_dir(pending.pop()))
+
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    self.stats_helper.walker_scandir_count += 1
+                    for dir_entry, is_dir in future.result():
+                        if self._filter(dir_entry, is_dir):
+                            yield self._yield_entry(dir_entry, is_dir)
+                            if is_dir:
+                                pending.append(dir_entry.path)
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    async def _aiter_ordered(self, list_dir):
+        prefetched = {}  # path -> Future
+
+        async def get_listing(path):
+            future = prefetched.pop(path, None)
+            if future is None:
+                future = list_dir(path)
+            listing = await future
+            self.stats_helper.walker_scandir_count += 1
+
+            # Prefetch the sub directories, in the order we will need them:
+            for dir_entry, is_dir in listing:
+                if len(prefetched) >= self.max_prefetch:
+                    break
+                if is_dir and not self.fnmatches(dir_entry.name, self.skip_dir_patterns):
+                    prefetched[dir_entry.path] = list_dir(dir_entry.path)
+
+            return iter(listing)
+
+        try:
+            stack = [await get_listing(self.top_path)]
+            while stack:
+                for dir_entry, is_dir in stack[-1]:
+                    if self._filter(dir_entry, is_dir):
+                        yield self._yield_entry(dir_entry, is_dir)
+                        if is_dir:
+                            stack.append(await get_listing(dir_entry.path))
+                            break
+                else:
+                    stack.pop()
+        finally:
+            for future in prefetched.values():
+                future.cancel()
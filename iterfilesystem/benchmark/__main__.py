@@ -0,0 +1,100 @@
+"""
+    Run the benchmarks, e.g.:
+
+    ~/IterFilesystem$ python -m iterfilesystem.benchmark --output baseline.json
+    ~/IterFilesystem$ python -m iterfilesystem.benchmark --baseline baseline.json
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# IterFilesystem
+from iterfilesystem.benchmark.skip_patterns import skip_patterns_benchmark
+from iterfilesystem.benchmark.suite import PHASES, compare_reports, format_report, run_benchmarks
+from iterfilesystem.benchmark.tree_generator import TREE_SHAPES
+from iterfilesystem.benchmark.update_interval import update_interval_benchmark
+
+
+def main(*args):
+    parser = argparse.ArgumentParser(
+        prog='python -m iterfilesystem.benchmark',
+        description='Benchmark IterFilesystem with synthetic trees and compare the results with a baseline')
+    parser.add_argument(
+        '--shapes',
+        nargs='*',
+        choices=tuple(TREE_SHAPES),
+        default=tuple(TREE_SHAPES),
+        help='The synthetic trees to generate and benchmark'
+    )
+    parser.add_argument(
+        '--phases',
+        nargs='*',
+        choices=tuple(PHASES),
+        default=tuple(PHASES),
+        help='The parts to benchmark'
+    )
+    parser.add_argument(
+        '--path',
+        default=None,
+        help='Benchmark this existing directory instead of synthetic trees'
+    )
+    parser.add_argument('--scale', type=float, default=1.0, help='Scale the file count and file sizes')
+    parser.add_argument('--repeat', type=int, default=3, help='Run every phase x times and use the fastest')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the synthetic trees')
+    parser.add_argument('--output', default=None, help='Store the JSON report into this file')
+    parser.add_argument('--baseline', default=None, help='Compare with this JSON report')
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.2,
+        help='Allowed slowdown (and peak RSS growth) compared to the baseline (default: 0.2 == 20%%)'
+    )
+    parser.add_argument(
+        '--skip_patterns',
+        action='store_true',
+        help='Run the skip patterns micro benchmark, too'
+    )
+    parser.add_argument(
+        '--update_interval',
+        action='store_true',
+        help='Run the update interval micro benchmark, too'
+    )
+    args = parser.parse_args(args or None)
+
+    if args.skip_patterns:
+        skip_patterns_benchmark()
+        print()
+
+    if args.update_interval:
+        update_interval_benchmark()
+        print()
+
+    report = run_benchmarks(
+        shapes=args.shapes,
+        phases=args.phases,
+        scale=args.scale,
+        repeat=args.repeat,
+        seed=args.seed,
+        top_path=args.path,
+    )
+    print(format_report(report))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=4, sort_keys=True))
+        print(f'\nReport stored into: {args.output}')
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare_reports(report, baseline, tolerance=args.tolerance)
+        if regressions:
+            print(f'\n{len(regressions)} regressions compared to {args.baseline}:')
+            for regression in regressions:
+                print(f' * {regression}')
+            sys.exit(1)
+        print(f'\nNo regressions compared to {args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import fnmatch
+import timeit
+
+# IterFilesystem
+from iterfilesystem.skip_patterns import SkipPatterns
+
+BUILD_TREE_SKIP_PATTERNS = (
+    '.*', '*.egg-info', '__pycache__', 'build', 'dist', 'htmlcov', 'node_modules', 'bower_components',
+    'target', 'out', 'bin', 'obj', 'tmp', 'temp', 'cache', 'coverage', 'vendor', 'site-packages',
+    'venv', 'env', 'CMakeFiles', 'Debug', 'Release', 'x64', 'ipch', 'lib', 'lib64', 'include',
+    '*.pyc', '*.pyo', '*.o', '*.obj', '*.so', '*.dll', '*.dylib', '*.a', '*.lib', '*.exe',
+    '*.class', '*.jar', '*.war', '*.log', '*.tmp', '*.temp', '*.bak', '*.swp', '*~', '*.orig',
+    '*.rej', '*.pdb', '*.ilk', '*.idb', '*.ncb', '*.sdf', '*.suo', '*.user', '*.cache',
+    'Thumbs.db', 'desktop.ini', '*.min.js', '*.map', '[Bb]uild*', 'tmp?', '*.py[cod]',
+)
+
+
+def skip_patterns_benchmark(patterns=BUILD_TREE_SKIP_PATTERNS, number=3):
+    """
+    Compare the compiled SkipPatterns with a fnmatch.fnmatch() call for every pattern
+    """
+    names = [
+        f'{prefix}{no}{suffix}'
+        for no in range(1000)
+        for prefix, suffix in (('file_', '.txt'), ('module_', '.py'), ('Build', ''), ('', '.pyc'))
+    ]
+    print(f'Match {len(names)} names against {len(patterns)} skip patterns:')
+
+    def fnmatch_loop():
+        for name in names:
+            for pattern in patterns:
+                if fnmatch.fnmatch(name, pattern):
+                    break
+
+    skip_patterns = SkipPatterns(patterns)
+
+    def compiled():
+        for name in names:
+            skip_patterns.matches(name)
+
+    fnmatch_duration = min(timeit.repeat(fnmatch_loop, number=1, repeat=number))
+    compiled_duration = min(timeit.repeat(compiled, number=1, repeat=number))
+    print(f'fnmatch loop.: {fnmatch_duration:.4f} sec')
+    print(f'SkipPatterns.: {compiled_duration:.4f} sec')
+    print(f'speedup......: {fnmatch_duration / compiled_duration:.1f}x')
+    return fnmatch_duration, compiled_duration
+
+
+if __name__ == '__main__':
+    skip_patterns_benchmark()
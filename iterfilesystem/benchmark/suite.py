@@ -0,0 +1,285 @@
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from timeit import default_timer
+
+import psutil
+
+# IterFilesystem
+import iterfilesystem
+from iterfilesystem.benchmark.tree_generator import (
+    SKIP_DIR_PATTERNS,
+    SKIP_FILE_PATTERNS,
+    TREE_SHAPES,
+    generate_tree,
+    scale_shape
+)
+from iterfilesystem.constants import COLLECT_COUNT_DURATION, COLLECT_SIZE_DURATION, DIR_ITEM_COUNT, FILE_SIZE
+from iterfilesystem.example import CalcFilesystemSHA512
+from iterfilesystem.iter_scandir import ScandirWalker
+from iterfilesystem.main import IterFilesystem
+from iterfilesystem.statistic_helper import StatisticHelper
+
+# Must not grow for the same tree.
+# All phases walk with 'stat_entries', so every stat() system call is made (and counted) by the walker:
+SYSCALL_METRICS = ('scandir_calls', 'stat_calls')
+
+# Compared with a tolerance, because they depends on the machine load:
+MEASURED_METRICS = ('duration', 'peak_rss')
+
+
+def get_peak_rss():
+    """
+    Peak resident set size of the current process in Bytes (None if unknown)
+    """
+    try:
+        import resource
+    except ImportError:
+        # Windows
+        return getattr(psutil.Process().memory_info(), 'peak_wset', None)
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != 'darwin':
+        peak_rss *= 1024  # Linux returns KiB
+    return peak_rss
+
+
+def get_read_calls():
+    try:
+        return psutil.Process().io_counters().read_count
+    except (AttributeError, psutil.Error):
+        # e.g.: not supported on macOS
+        return None
+
+
+def bench_walker(*, top_path, skip_dir_patterns, skip_file_patterns):
+    stats_helper = StatisticHelper()
+    walker = ScandirWalker(
+        top_path=top_path,
+        stats_helper=stats_helper,
+        skip_dir_patterns=skip_dir_patterns,
+        skip_file_patterns=skip_file_patterns,
+        stat_entries=True,
+    )
+    start_time = default_timer()
+    entries = 0
+    for _ in walker:
+        entries += 1
+    duration = default_timer() - start_time
+    return dict(
+        duration=duration,
+        entries=entries,
+        file_size=0,
+        scandir_calls=stats_helper.walker_scandir_count,
+        stat_calls=stats_helper.walker_stat_entries_count,
+    )
+
+
+def bench_collectors(*, top_path, skip_dir_patterns, skip_file_patterns):
+    """
+    Run the two collect "processes" one after the other in this process.
+    """
+    iter_fs = IterFilesystem(
+        ScanDirClass=ScandirWalker,
+        scan_dir_kwargs=dict(
+            top_path=top_path,
+            skip_dir_patterns=skip_dir_patterns,
+            skip_file_patterns=skip_file_patterns,
+            stat_entries=True,
+        ),
+        update_interval_sec=1,
+    )
+    multiprocessing_stats = {}
+    iter_fs._collect_counts(multiprocessing_stats)
+    iter_fs._collect_size(multiprocessing_stats)
+
+    # Note: Both collect walkers use the same StatisticHelper instance
+    return dict(
+        duration=multiprocessing_stats[COLLECT_COUNT_DURATION] + multiprocessing_stats[COLLECT_SIZE_DURATION],
+        entries=multiprocessing_stats[DIR_ITEM_COUNT],
+        file_size=multiprocessing_stats[FILE_SIZE],
+        scandir_calls=iter_fs.stats_helper.walker_scandir_count,
+        stat_calls=iter_fs.stats_helper.walker_stat_entries_count,
+    )
+
+
+def bench_sha512(*, top_path, skip_dir_patterns, skip_file_patterns):
+    calc_sha = CalcFilesystemSHA512(
+        ScanDirClass=ScandirWalker,
+        scan_dir_kwargs=dict(
+            top_path=top_path,
+            skip_dir_patterns=skip_dir_patterns,
+            skip_file_patterns=skip_file_patterns,
+            stat_entries=True,
+        ),
+        update_interval_sec=1,
+    )
+    stats_helper = calc_sha.process()
+    return dict(
+        duration=stats_helper.process_duration,
+        entries=stats_helper.process_files,
+        file_size=stats_helper.process_file_size,
+        scandir_calls=stats_helper.walker_scandir_count,
+        stat_calls=stats_helper.walker_stat_entries_count,
+    )
+
+
+PHASES = {
+    'walker': bench_walker,
+    'collectors': bench_collectors,
+    'sha512': bench_sha512,
+}
+
+
+def _run_phase(connection, phase_name, kwargs):
+    try:
+        read_calls = get_read_calls()
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull), redirect_stderr(devnull):
+            result = PHASES[phase_name](**kwargs)
+
+        if read_calls is not None:
+            result['read_calls'] = get_read_calls() - read_calls
+        result['peak_rss'] = get_peak_rss()
+        connection.send((True, result))
+    except Exception:
+        connection.send((False, traceback.format_exc()))
+    finally:
+        connection.close()
+
+
+def run_phase(phase_name, **kwargs):
+    """
+    Run one benchmark phase in a fresh process, so the peak RSS is measured per phase.
+    """
+    receive_connection, send_connection = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(
+        name=f'benchmark {phase_name}',
+        target=_run_phase,
+        args=(send_connection, phase_name, kwargs)
+    )
+    process.start()
+    send_connection.close()
+    try:
+        ok, result = receive_connection.recv()
+    except EOFError:
+        ok, result = False, f'Process died with exit code: {process.exitcode}'
+    process.join()
+    if not ok:
+        raise RuntimeError(f'Benchmark phase {phase_name!r} failed:\n{result}')
+
+    duration = result['duration']
+    result['entries_per_sec'] = result['entries'] / duration if duration else None
+    result['mb_per_sec'] = result['file_size'] / duration / 1000000 if duration else None
+    return result
+
+
+def benchmark_path(top_path, *, phases=tuple(PHASES), repeat=3):
+    """
+    Benchmark all phases on a existing tree. The fastest run of every phase is used.
+    Note: The page cache is warm after the first run.
+    """
+    results = {}
+    for phase_name in phases:
+        runs = [
+            run_phase(
+                phase_name,
+                top_path=top_path,
+                skip_dir_patterns=SKIP_DIR_PATTERNS,
+                skip_file_patterns=SKIP_FILE_PATTERNS,
+            )
+            for _ in range(repeat)
+        ]
+        results[phase_name] = min(runs, key=lambda result: result['duration'])
+    return results
+
+
+def run_benchmarks(*, shapes=tuple(TREE_SHAPES), phases=tuple(PHASES), scale=1.0, repeat=3, seed=0, top_path=None):
+    """
+    Generate the synthetic trees and benchmark them.
+    Benchmark a existing tree, instead, if 'top_path' is given.
+    Returns the report as a JSON serializable dict.
+    """
+    report = dict(
+        iterfilesystem=iterfilesystem.__version__,
+        python=platform.python_version(),
+        platform=platform.platform(),
+        scale=scale,
+        repeat=repeat,
+        seed=seed,
+        shapes={},
+    )
+    if top_path is not None:
+        report['shapes']['path'] = dict(
+            tree=dict(path=str(top_path)),
+            phases=benchmark_path(top_path, phases=phases, repeat=repeat),
+        )
+        return report
+
+    for shape_name in shapes:
+        shape = scale_shape(TREE_SHAPES[shape_name], scale=scale)
+        with tempfile.TemporaryDirectory(prefix=f'iterfilesystem_benchmark_{shape_name}_') as temp_path:
+            tree_path = Path(temp_path, shape_name)
+            dir_count, file_count, total_size = generate_tree(tree_path, shape, seed=seed)
+            report['shapes'][shape_name] = dict(
+                tree=dict(shape._asdict(), dirs=dir_count, files=file_count, file_size=total_size),
+                phases=benchmark_path(tree_path, phases=phases, repeat=repeat),
+            )
+    return report
+
+
+def compare_reports(report, baseline, *, tolerance=0.2):
+    """
+    Returns a list of all regressions in 'report' compared to 'baseline'.
+    Only shapes and phases that exists in both reports are compared.
+
+    >>> baseline = {'shapes': {'wide': {'phases': {'walker': {'duration': 1.0, 'scandir_calls': 5}}}}}
+    >>> report = {'shapes': {'wide': {'phases': {'walker': {'duration': 1.5, 'scandir_calls': 6}}}}}
+    >>> compare_reports(report, baseline, tolerance=0.6)
+    ['wide / walker / scandir_calls: 5 -> 6']
+    >>> compare_reports(report, baseline, tolerance=0.2)
+    ['wide / walker / scandir_calls: 5 -> 6', 'wide / walker / duration: 1 -> 1.5 (+50%)']
+    """
+    regressions = []
+    for shape_name, shape_report in report['shapes'].items():
+        baseline_phases = baseline['shapes'].get(shape_name, {}).get('phases', {})
+        for phase_name, result in shape_report['phases'].items():
+            baseline_result = baseline_phases.get(phase_name)
+            if baseline_result is None:
+                continue
+
+            prefix = f'{shape_name} / {phase_name}'
+            for metric in SYSCALL_METRICS:
+                old, new = baseline_result.get(metric), result.get(metric)
+                if old is not None and new is not None and new > old:
+                    regressions.append(f'{prefix} / {metric}: {old} -> {new}')
+
+            for metric in MEASURED_METRICS:
+                old, new = baseline_result.get(metric), result.get(metric)
+                if old and new is not None and new > old * (1 + tolerance):
+                    regressions.append(f'{prefix} / {metric}: {old:g} -> {new:g} (+{(new - old) / old:.0%})')
+    return regressions
+
+
+def format_report(report):
+    lines = []
+    for shape_name, shape_report in report['shapes'].items():
+        lines.append(f'{shape_name}:')
+        for phase_name, result in shape_report['phases'].items():
+            mb_per_sec = result['mb_per_sec'] or 0
+            entries_per_sec = result['entries_per_sec'] or 0
+            peak_rss = (result['peak_rss'] or 0) / 1024 / 1024
+            lines.append(
+                f'  {phase_name:<10}'
+                f' {result["duration"]:8.3f} sec'
+                f' {entries_per_sec:10.0f} entries/s'
+                f' {mb_per_sec:8.1f} MB/s'
+                f' {peak_rss:6.1f} MiB RSS'
+                f' {result["scandir_calls"]:6} scandir'
+                f' {result["stat_calls"]:6} stat'
+            )
+    return '\n'.join(lines)
@@ -0,0 +1,96 @@
+import random
+from collections import namedtuple
+from pathlib import Path
+
+TreeShape = namedtuple('TreeShape', (
+    'depth',  # levels of sub directories
+    'dirs_per_dir',  # sub directories in every directory
+    'files_per_dir',  # files in every directory
+    'min_file_size',
+    'max_file_size',
+    'skip_ratio',  # part of the files/directories that matches SKIP_*_PATTERNS
+))
+
+TREE_SHAPES = {
+    'wide': TreeShape(
+        depth=1, dirs_per_dir=200, files_per_dir=20, min_file_size=0, max_file_size=4096, skip_ratio=0
+    ),
+    'deep': TreeShape(
+        depth=100, dirs_per_dir=1, files_per_dir=20, min_file_size=0, max_file_size=4096, skip_ratio=0
+    ),
+    'tiny_files': TreeShape(
+        depth=2, dirs_per_dir=8, files_per_dir=100, min_file_size=0, max_file_size=64, skip_ratio=0
+    ),
+    'huge_files': TreeShape(
+        depth=0, dirs_per_dir=0, files_per_dir=4, min_file_size=32 * 1024 * 1024, max_file_size=32 * 1024 * 1024,
+        skip_ratio=0
+    ),
+    'skip_heavy': TreeShape(
+        depth=2, dirs_per_dir=8, files_per_dir=50, min_file_size=0, max_file_size=4096, skip_ratio=0.5
+    ),
+}
+
+SKIP_DIR_PATTERNS = ('node_modules*', '__pycache__*', '.*')
+SKIP_FILE_PATTERNS = ('*.pyc', '*.tmp', '*~')
+
+BLOCK_SIZE = 64 * 1024
+
+
+def scale_shape(shape, scale):
+    """
+    Scale the file count and file sizes, but not the directory structure:
+
+    >>> scale_shape(TREE_SHAPES['wide'], scale=0.1)
+    TreeShape(depth=1, dirs_per_dir=200, files_per_dir=2, min_file_size=0, max_file_size=409, skip_ratio=0)
+    """
+    return shape._replace(
+        files_per_dir=max(1, int(shape.files_per_dir * scale)),
+        min_file_size=int(shape.min_file_size * scale),
+        max_file_size=int(shape.max_file_size * scale),
+    )
+
+
+def generate_tree(top_path, shape, seed=0):
+    """
+    Create a reproducible tree: The same shape and seed results in the same names, sizes and content.
+    Returns the number of directories, files and the total file size.
+    """
+    rng = random.Random(seed)
+    block = rng.getrandbits(BLOCK_SIZE * 8).to_bytes(BLOCK_SIZE, 'little')
+
+    dir_count = file_count = total_size = 0
+    pending = [(Path(top_path), 0)]
+    while pending:
+        path, level = pending.pop()
+        path.mkdir(parents=True, exist_ok=True)
+        dir_count += 1
+
+        for file_no in range(shape.files_per_dir):
+            if rng.random() < shape.skip_ratio:
+                file_name = f'file_{file_no:04}{rng.choice(("~", ".tmp", ".pyc"))}'
+            else:
+                file_name = f'file_{file_no:04}.txt'
+
+            file_size = rng.randint(shape.min_file_size, shape.max_file_size)
+            offset = rng.randrange(BLOCK_SIZE)
+            file_block = block[offset:] + block[:offset]
+            with Path(path, file_name).open('wb') as f:
+                remaining = file_size
+                while remaining:
+                    data = file_block[:remaining]
+                    f.write(data)
+                    remaining -= len(data)
+
+            file_count += 1
+            total_size += file_size
+
+        if level < shape.depth:
+            for dir_no in range(shape.dirs_per_dir):
+                if rng.random() < shape.skip_ratio:
+                    dir_name = f'{rng.choice(("node_modules", "__pycache__", ".hidden"))}_{dir_no:04}'
+                else:
+                    dir_name = f'dir_{dir_no:04}'
+                pending.append((Path(path, dir_name), level + 1))
+
+    dir_count -= 1  # without the top directory
+    return dir_count, file_count, total_size
@@ -0,0 +1,33 @@
+import timeit
+
+# IterFilesystem
+from iterfilesystem.utils import AdaptiveUpdateInterval, UpdateInterval
+
+
+def update_interval_benchmark(interval=0.5, count=1000000, number=3):
+    """
+    Compare the per entry cost of AdaptiveUpdateInterval with UpdateInterval (a clock call per evaluation)
+    """
+    print(f'Evaluate a update interval of {interval} sec {count} times:')
+
+    def loop(update_interval):
+        updates = 0
+        for _ in range(count):
+            if update_interval:
+                updates += 1
+        return updates
+
+    def bench(UpdateIntervalClass):
+        return min(timeit.repeat(lambda: loop(UpdateIntervalClass(interval=interval)), number=1, repeat=number))
+
+    empty_duration = min(timeit.repeat(lambda: loop(False), number=1, repeat=number))
+    clock_duration = bench(UpdateInterval) - empty_duration
+    adaptive_duration = bench(AdaptiveUpdateInterval) - empty_duration
+    print(f'UpdateInterval.........: {clock_duration * 1e9 / count:.1f} ns per entry')
+    print(f'AdaptiveUpdateInterval.: {adaptive_duration * 1e9 / count:.1f} ns per entry')
+    print(f'speedup................: {clock_duration / adaptive_duration:.1f}x')
+    return clock_duration, adaptive_duration
+
+
+if __name__ == '__main__':
+    update_interval_benchmark()
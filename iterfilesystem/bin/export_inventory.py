@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+"""
+    Export a inventory of all files and directories
+
+    Will be "installed" by setup.py console_scripts / entry_points
+
+    e.g.:
+
+    (IterFilesystem) ~/IterFilesystem$ export_inventory --help
+"""
+
+import argparse
+import logging
+import sys
+import traceback
+from pathlib import Path
+
+# IterFilesystem
+import iterfilesystem
+from iterfilesystem.inventory import COMPRESSIONS, FORMATS, export_inventory
+from iterfilesystem.process_bar import PROCESS_BAR_CLASSES
+
+log = logging.getLogger(__name__)
+
+
+def main(*args):
+    parser = argparse.ArgumentParser(
+        prog=Path(__file__).name,
+        description='Export path, size, mtime, inode and mode of all entries into a file')
+    parser.add_argument(
+        '-v',
+        '--version',
+        action='version',
+        version='%(prog)s ' + iterfilesystem.__version__
+    )
+    parser.add_argument(
+        '--debug',
+        action='store_true',
+        dest='debug',
+        help='enable DEBUG'
+    )
+    parser.add_argument(
+        '--path',
+        help='The file path that should be scanned e.g.: "~/foobar/" default is "~"',
+        default=Path('~')
+    )
+    parser.add_argument(
+        '--skip_dir_patterns',
+        default=(),
+        nargs='*',
+        help='Directory names to exclude from scan.'
+    )
+    parser.add_argument(
+        '--skip_file_patterns',
+        default=(),
+        nargs='*',
+        help='File names to ignore.'
+    )
+    parser.add_argument(
+        '--output',
+        required=True,
+        help='The inventory file'
+    )
+    parser.add_argument(
+        '--format',
+        choices=tuple(FORMATS),
+        default='ndjson',
+        help='NDJSON, CSV or a compact binary columnar format (default: ndjson)'
+    )
+    parser.add_argument(
+        '--compression',
+        choices=tuple(COMPRESSIONS),
+        default='none',
+        help='Compress the inventory file (default: none)'
+    )
+    parser.add_argument(
+        '--batch_rows',
+        type=int,
+        default=1000,
+        help='Number of rows that are written at once (default: 1000)'
+    )
+    parser.add_argument(
+        '--progress',
+        choices=tuple(PROCESS_BAR_CLASSES),
+        default='tqdm',
+        help='Progress output: tqdm process bars, none or JSON lines (e.g.: if there is no terminal)'
+    )
+
+    if args:
+        print(f'Use args: {args!r}')
+    else:
+        args = None
+
+    args = parser.parse_args(args)
+
+    try:
+        exporter = export_inventory(
+            top_path=args.path,
+            output_path=args.output,
+            format=args.format,
+            compression=args.compression,
+            skip_dir_patterns=args.skip_dir_patterns,
+            skip_file_patterns=args.skip_file_patterns,
+            batch_rows=args.batch_rows,
+            progress=args.progress,
+        )
+    except NotADirectoryError as err:
+        print(f'ERROR: {err}')
+        sys.exit(1)
+    except Exception:
+        print('=' * 100, file=sys.stderr)
+        print(traceback.format_exc(), file=sys.stderr)
+        print('=' * 100, file=sys.stderr)
+        sys.exit(-1)
+    else:
+        if args.debug:
+            print('\ndebug statistics:')
+            exporter.stats_helper.print_stats()
+        print()
+
+
+###############################################################################
+# Allow caller to directly run this module (usually in development scenarios)
+if __name__ == '__main__':
+    main()
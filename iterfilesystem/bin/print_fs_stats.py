@@ -18,7 +18,19 @@ from pathlib import Path
 
 # IterFilesystem
 import iterfilesystem
-from iterfilesystem.example import calc_sha512
+from iterfilesystem.example import CalcFilesystemSHA512, calc_sha512
+from iterfilesystem.instrumentation import PROFILERS, Instrumentation
+from iterfilesystem.iter_scandir import ORDER_NAME, ORDERS
+from iterfilesystem.metrics import HttpMetricsExporter, TextfileMetricsExporter
+from iterfilesystem.partitioner import (
+    SubtreeTotals,
+    create_shard_plan,
+    get_subtree_totals_path,
+    read_shard_plan,
+    write_shard_plan
+)
+from iterfilesystem.process_bar import PROCESS_BAR_CLASSES
+from iterfilesystem.sharding import merge_shard_files, write_shard_file
 
 log = logging.getLogger(__name__)
 
@@ -56,6 +68,147 @@ def main(*args):
         nargs='*',
         help='File names to ignore.'
     )
+    parser.add_argument(
+        '--single_walk',
+        action='store_true',
+        dest='single_walk',
+        help='Walk the filesystem only once (instead of three times) e.g.: for network filesystems'
+    )
+    scandir_group = parser.add_mutually_exclusive_group()
+    scandir_group.add_argument(
+        '--scandir_workers',
+        type=int,
+        default=None,
+        help='Number of parallel directory listings e.g.: for high-latency network filesystems'
+    )
+    scandir_group.add_argument(
+        '--scandir_index',
+        action='store_true',
+        dest='scandir_index',
+        help='Store the directory listings in a persistent index and list only changed directories again'
+    )
+    parser.add_argument(
+        '--tree_hash',
+        action='store_true',
+        dest='tree_hash',
+        help='Calculate a hash for every file and combine them to one tree hash'
+    )
+    parser.add_argument(
+        '--hash_cache',
+        action='store_true',
+        dest='hash_cache',
+        help='Use a persistent cache of the file hashes and skip reading unchanged files (implies --tree_hash)'
+    )
+    parser.add_argument(
+        '--read_ahead',
+        action='store_true',
+        dest='read_ahead',
+        help=(
+            'Read the next files in background threads while hashing, so disk and CPU work in parallel'
+            ' (not together with --hash_cache or --batch_size)'
+        )
+    )
+    parser.add_argument(
+        '--batch_size',
+        type=int,
+        default=None,
+        help='Process up to N small files (<= 4 KiB) as one batch, e.g.: for trees with millions of tiny files'
+    )
+    parser.add_argument(
+        '--stat_entries',
+        action='store_true',
+        dest='stat_entries',
+        help='The walker fetch the stat result only once per file and pass it along'
+    )
+    parser.add_argument(
+        '--order',
+        choices=ORDERS,
+        default=ORDER_NAME,
+        help='Order of the entries in one directory (Note: the hash depends on the order!)'
+    )
+    parser.add_argument(
+        '--instrument',
+        action='store_true',
+        dest='instrument',
+        help='Measure the time of the worker phases (scandir, skip patterns, stat, processing, process bars)'
+    )
+    parser.add_argument(
+        '--profile',
+        choices=PROFILERS,
+        default=None,
+        help='Profile the worker loop (implies --instrument)'
+    )
+    parser.add_argument(
+        '--progress',
+        choices=tuple(PROCESS_BAR_CLASSES),
+        default='tqdm',
+        help='Progress output: tqdm process bars, none or JSON lines (e.g.: if there is no terminal)'
+    )
+    parser.add_argument(
+        '--metrics_port',
+        type=int,
+        default=None,
+        help='Serve OpenMetrics/Prometheus metrics on http://127.0.0.1:<port>/metrics while scanning'
+    )
+    parser.add_argument(
+        '--metrics_textfile',
+        default=None,
+        help='Write OpenMetrics/Prometheus metrics into this file, e.g.: for the node exporter textfile collector'
+    )
+    parser.add_argument(
+        '--checkpoint_interval',
+        type=float,
+        default=None,
+        help='Store a checkpoint every N seconds, to resume a interrupted scan (implies --tree_hash)'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        dest='resume',
+        help='Continue after the last checkpoint of the same scan (implies --tree_hash)'
+    )
+    parser.add_argument(
+        '--shard_count',
+        type=int,
+        default=None,
+        help='Split the tree into N shards, e.g.: to scan it on N machines in parallel'
+    )
+    parser.add_argument(
+        '--shard_index',
+        type=int,
+        default=0,
+        help='Scan only this shard (0 - shard count - 1)'
+    )
+    parser.add_argument(
+        '--shard_output',
+        default=None,
+        help='Write the statistics and the hash of the shard into this JSON file'
+    )
+    parser.add_argument(
+        '--merge_shards',
+        nargs='+',
+        default=None,
+        help='Merge the given shard JSON files (from --shard_output) and print the result'
+    )
+    parser.add_argument(
+        '--subtree_totals',
+        action='store_true',
+        dest='subtree_totals',
+        help='Store the sizes of all sub trees in the temp directory, e.g.: to create a shard plan'
+    )
+    parser.add_argument(
+        '--write_shard_plan',
+        default=None,
+        help=(
+            'Create a size balanced plan for --shard_count shards from the sub tree sizes'
+            ' of a previous --subtree_totals scan and write it into this JSON file'
+        )
+    )
+    parser.add_argument(
+        '--shard_plan',
+        default=None,
+        help='Use this plan JSON file (from --write_shard_plan) to split the tree into shards'
+    )
 
     if args:
         print(f'Use args: {args!r}')
@@ -64,11 +217,75 @@ def main(*args):
 
     args = parser.parse_args(args)
 
+    if args.merge_shards:
+        statistics, merged_hash = merge_shard_files(args.merge_shards, IterFilesystemClass=CalcFilesystemSHA512)
+        print(f'Merged {len(args.merge_shards)} shards:')
+        print(f'{statistics.process_files} filesystem items, {statistics.process_file_size} Bytes')
+        print(f'SHA512 of all shard hashes: {merged_hash}')
+        if args.debug:
+            print('\ndebug statistics:')
+            statistics.print_stats()
+        return
+
+    if args.write_shard_plan:
+        if not args.shard_count:
+            parser.error('--write_shard_plan needs --shard_count')
+        subtree_totals_path = get_subtree_totals_path(args.path)
+        if not subtree_totals_path.is_file():
+            print(f'ERROR: No sub tree sizes found: Scan {args.path} with --subtree_totals first!')
+            sys.exit(1)
+        shard_plan = create_shard_plan(SubtreeTotals.load(subtree_totals_path), shard_count=args.shard_count)
+        write_shard_plan(args.write_shard_plan, shard_plan)
+        print(f'Plan with {len(shard_plan)} work units for {args.shard_count} shards written to:')
+        print(args.write_shard_plan)
+        return
+
+    if args.shard_plan:
+        shard_plan = read_shard_plan(args.shard_plan)
+    else:
+        shard_plan = None
+
+    if args.subtree_totals:
+        subtree_totals_path = get_subtree_totals_path(args.path)
+    else:
+        subtree_totals_path = None
+
+    if args.instrument or args.profile:
+        instrumentation = Instrumentation(profiler=args.profile)
+    else:
+        instrumentation = None
+
+    metrics_labels = dict(path=args.path)
+    if args.metrics_port is not None:
+        metrics_exporter = HttpMetricsExporter(port=args.metrics_port, labels=metrics_labels)
+    elif args.metrics_textfile:
+        metrics_exporter = TextfileMetricsExporter(path=args.metrics_textfile, labels=metrics_labels)
+    else:
+        metrics_exporter = None
+
     try:
         statistics = calc_sha512(
             top_path=args.path,
             skip_dir_patterns=args.skip_dir_patterns,
             skip_file_patterns=args.skip_file_patterns,
+            single_walk=args.single_walk,
+            scandir_workers=args.scandir_workers,
+            scandir_index=args.scandir_index,
+            tree_hash=args.tree_hash or args.hash_cache or bool(args.checkpoint_interval) or args.resume,
+            hash_cache=args.hash_cache,
+            stat_entries=args.stat_entries,
+            order=args.order,
+            instrumentation=instrumentation,
+            progress=args.progress,
+            metrics_exporter=metrics_exporter,
+            checkpoint_interval_sec=args.checkpoint_interval,
+            resume=args.resume,
+            shard_count=args.shard_count,
+            shard_index=args.shard_index,
+            shard_plan=shard_plan,
+            subtree_totals_path=subtree_totals_path,
+            read_ahead=args.read_ahead,
+            batch_size=args.batch_size,
         )
     except NotADirectoryError as err:
         print(f'ERROR: {err}')
@@ -79,10 +296,21 @@ def main(*args):
         print('=' * 100, file=sys.stderr)
         sys.exit(-1)
     else:
+        if args.shard_output:
+            write_shard_file(
+                args.shard_output,
+                shard_count=args.shard_count or 1,
+                shard_index=args.shard_index if args.shard_count else 0,
+                stats_helper=statistics,
+                result=statistics.hash,
+            )
         if args.debug:
             print('\ndebug statistics:')
             statistics.print_stats()
         print()
+    finally:
+        if metrics_exporter is not None:
+            metrics_exporter.close()
 
 
 ###############################################################################
@@ -0,0 +1,94 @@
+import logging
+import os
+import pickle
+from pathlib import Path
+
+# IterFilesystem
+from iterfilesystem.utils import check_owner, get_private_temp_path
+
+log = logging.getLogger(__name__)
+
+# These StatisticHelper values are not stored: The collect processes count the complete tree again.
+NOT_RESTORED_STATS = ('abort', 'process_duration', 'phase_timings', 'profile')
+
+
+class Checkpoint:
+    """
+    Stores the position of the worker, the statistics and the state of the IterFilesystem subclass
+    via pickle in the persist temp path. The file is replaced atomically, so a kill
+    (e.g.: by the OOM killer) never leaves a broken checkpoint.
+
+    'config' identifies the scan (e.g.: the top path and skip patterns):
+    A checkpoint of a other scan is never used.
+    """
+
+    def __init__(self, *, config, path=None):
+        self.config = config
+        self.check_paths = []  # The temp directory (if used) and the checkpoint file
+        if path is None:
+            persist_path = get_private_temp_path(seed=repr(config))
+            path = Path(persist_path, 'checkpoint.pickle')
+            self.check_paths.append(persist_path)
+        self.path = Path(path)
+        self.check_paths.append(self.path)
+
+    def _check_owner(self):
+        """
+        Unpickle only our own files: The temp directory is shared with other users.
+        """
+        for path in self.check_paths:
+            check_owner(path, name='Checkpoint')
+
+    def save(self, *, resume_parts, stats, state):
+        data = dict(
+            config=self.config,
+            resume_parts=tuple(resume_parts),
+            stats=stats,
+            state=state,
+        )
+        temp_path = self.path.with_name(f'.{self.path.name}.{os.getpid()}.tmp')
+        with os.fdopen(os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        log.debug('Checkpoint saved: %s', os.sep.join(resume_parts))
+
+    def load(self):
+        """
+        Returns the stored data or None if there is no checkpoint.
+        """
+        try:
+            self._check_owner()
+            with self.path.open('rb') as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except PermissionError:
+            raise
+        except Exception as err:
+            log.error('Ignore broken checkpoint %s: %s', self.path, err)
+            return None
+
+        if data['config'] != self.config:
+            raise ValueError(f'Checkpoint {self.path} is from a other scan: {data["config"]!r}')
+        return data
+
+    def remove(self):
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def get_checkpoint_stats(stats_helper):
+    return {
+        key: value
+        for key, value in stats_helper.items()
+        if not key.startswith('collect_') and key not in NOT_RESTORED_STATS
+    }
+
+
+def set_checkpoint_stats(stats_helper, stats):
+    for key, value in stats.items():
+        setattr(stats_helper, key, value)
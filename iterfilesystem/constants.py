@@ -5,3 +5,14 @@ COLLECT_COUNT_DURATION = 'count duration'
 FILE_SIZE = 'file size'
 COLLECT_SIZE_DONE = 'size done'
 COLLECT_SIZE_DURATION = 'size duration'
+
+# Fixed layout of the shared memory, see: iterfilesystem.shared_stats.SharedStats
+SHARED_STATS_LAYOUT = (
+    # (key, value type)
+    (DIR_ITEM_COUNT, int),
+    (COLLECT_COUNT_DONE, bool),
+    (COLLECT_COUNT_DURATION, float),
+    (FILE_SIZE, int),
+    (COLLECT_SIZE_DONE, bool),
+    (COLLECT_SIZE_DURATION, float),
+)
@@ -0,0 +1,72 @@
+import os
+import stat as stat_module
+
+
+class DirEntryRecord:
+    """
+    A os.DirEntry compatible object, e.g.: replayed from the IndexedScandirWalker index.
+    The entry type is stored (like the d_type of os.DirEntry) and the stat results
+    are cached, so is_dir()/is_file()/is_symlink() need no system call for non symlinks.
+    """
+    __slots__ = ('name', 'path', '_inode', '_is_dir', '_is_file', '_is_symlink', '_stat', '_lstat')
+
+    def __init__(self, *, name, path, inode, is_dir, is_file, is_symlink, stat=None, lstat=None):
+        self.name = name
+        self.path = path
+        self._inode = inode
+        self._is_dir = is_dir
+        self._is_file = is_file
+        self._is_symlink = is_symlink
+        self._stat = stat
+        self._lstat = lstat
+
+    @classmethod
+    def from_dir_entry(cls, dir_entry, lstat=None):
+        return cls(
+            name=dir_entry.name,
+            path=dir_entry.path,
+            inode=dir_entry.inode(),
+            is_dir=dir_entry.is_dir(follow_symlinks=False),
+            is_file=dir_entry.is_file(follow_symlinks=False),
+            is_symlink=dir_entry.is_symlink(),
+            lstat=lstat,
+        )
+
+    def inode(self):
+        return self._inode
+
+    def is_symlink(self):
+        return self._is_symlink
+
+    def _follow_mode(self):
+        try:
+            return self.stat(follow_symlinks=True).st_mode
+        except FileNotFoundError:
+            # broken symlink
+            return 0
+
+    def is_dir(self, *, follow_symlinks=True):
+        if follow_symlinks and self._is_symlink:
+            return stat_module.S_ISDIR(self._follow_mode())
+        return self._is_dir
+
+    def is_file(self, *, follow_symlinks=True):
+        if follow_symlinks and self._is_symlink:
+            return stat_module.S_ISREG(self._follow_mode())
+        return self._is_file
+
+    def stat(self, *, follow_symlinks=True):
+        if follow_symlinks and self._is_symlink:
+            if self._stat is None:
+                self._stat = os.stat(self.path)
+            return self._stat
+
+        if self._lstat is None:
+            self._lstat = os.lstat(self.path)
+        return self._lstat
+
+    def __fspath__(self):
+        return self.path
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self.name!r}>'
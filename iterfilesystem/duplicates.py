@@ -0,0 +1,217 @@
+import collections
+import hashlib
+import logging
+import os
+import stat
+
+# IterFilesystem
+from iterfilesystem.humanize import human_filesize
+from iterfilesystem.iter_scandir import ScandirWalker
+from iterfilesystem.main import IterFilesystem
+from iterfilesystem.process_bar import PROCESS_BAR_CLASSES
+
+log = logging.getLogger(__name__)
+
+
+class DuplicateFinder(IterFilesystem):
+    """
+    Find files with the same content in staged filters, so most files are never read:
+
+    1. The walk: Bucket all files by size -> files with a unique size can't have duplicates
+    2. Hash the first and last PARTIAL_SIZE bytes of the files with the same size
+    3. Hash the complete content of the files that still have the same partial hash
+
+    Hard links to the same inode are counted only once.
+    The result is in self.duplicates: A list of (file size, paths) sorted by the file size (biggest first).
+    The StatisticHelper 'duplicate_*_bytes' values shows how many bytes every stage avoided to read.
+
+    Checkpoints are not supported: The size buckets of the already walked files are not stored.
+    """
+    supports_checkpoints = False
+
+    PARTIAL_SIZE = 64 * 1024
+    BUFFER_SIZE = 1024 * 1024
+
+    def __init__(self, *, min_size=1, hash_name='sha512', **kwargs):
+        """
+        min_size -> Ignore smaller files (e.g.: the empty files are all the same)
+        hash_name -> hashlib algorithm for the partial and the full hash
+        """
+        super().__init__(**kwargs)
+
+        # Additional StatisticHelper values:
+        self.stats_helper.duplicate_hardlink_count = 0
+        self.stats_helper.duplicate_size_skip_bytes = 0  # not read: unique file size
+        self.stats_helper.duplicate_partial_skip_bytes = 0  # not read: unique partial hash
+        self.stats_helper.duplicate_partial_read_bytes = 0
+        self.stats_helper.duplicate_full_read_bytes = 0
+        self.stats_helper.duplicate_group_count = 0
+        self.stats_helper.duplicate_file_count = 0
+        self.stats_helper.duplicate_wasted_bytes = 0
+
+        self.min_size = min_size
+        self.hash_name = hash_name
+        self.duplicates = None
+
+    def start(self):
+        self.size_buckets = collections.defaultdict(list)
+        self.seen_inodes = set()
+        self.buffer = memoryview(bytearray(self.BUFFER_SIZE))
+
+        super().start()  # Stage 1: Walk and bucket by size
+
+        candidates = self.filter_by_size()
+        candidates = self.filter_by_hash(candidates, partial=True)
+        candidates = self.filter_by_hash(candidates, partial=False)
+        self.duplicates = sorted(
+            ((file_size, sorted(paths)) for file_size, paths in candidates),
+            key=lambda item: (-item[0], item[1])
+        )
+
+        self.stats_helper.duplicate_group_count = len(candidates)
+        self.stats_helper.duplicate_file_count = sum(len(paths) - 1 for _, paths in candidates)
+        self.stats_helper.duplicate_wasted_bytes = sum(size * (len(paths) - 1) for size, paths in candidates)
+
+    def process_dir_entry(self, dir_entry, process_bars):
+        file_stat = dir_entry.stat(follow_symlinks=False)
+        if not stat.S_ISREG(file_stat.st_mode):
+            # Skip directories, symlinks, devices...
+            return
+
+        file_size = file_stat.st_size
+        if file_size >= self.min_size:
+            inode = (file_stat.st_dev, file_stat.st_ino)
+            if file_stat.st_nlink > 1 and file_stat.st_ino:
+                if inode in self.seen_inodes:
+                    self.stats_helper.duplicate_hardlink_count += 1
+                    return
+                self.seen_inodes.add(inode)
+
+            self.size_buckets[file_size].append(dir_entry.path)
+
+        self.update(
+            dir_entry=dir_entry,
+            file_size=file_size,
+            process_bars=process_bars
+        )
+
+    def filter_by_size(self):
+        """
+        Stage 1: Returns the (size, paths) groups with more than one file
+        """
+        candidates = []
+        for file_size, paths in self.size_buckets.items():
+            if len(paths) > 1:
+                candidates.append((file_size, paths))
+            else:
+                self.stats_helper.duplicate_size_skip_bytes += file_size
+        self.size_buckets = None
+        self.seen_inodes = None
+
+        log.info(
+            'Size filter: %i candidates, %s not read',
+            sum(len(paths) for _, paths in candidates),
+            human_filesize(self.stats_helper.duplicate_size_skip_bytes)
+        )
+        return candidates
+
+    def _read_hash(self, path, file_size, partial):
+        file_hash = hashlib.new(self.hash_name)
+        read_bytes = 0
+        with open(path, 'rb', buffering=0) as f:
+            if partial and file_size > self.PARTIAL_SIZE * 2:
+                head = f.read(self.PARTIAL_SIZE)
+                f.seek(-self.PARTIAL_SIZE, os.SEEK_END)
+                tail = f.read(self.PARTIAL_SIZE)
+                file_hash.update(head)
+                file_hash.update(tail)
+                read_bytes = len(head) + len(tail)
+            else:
+                while True:
+                    size = f.readinto(self.buffer)
+                    if not size:
+                        break
+                    file_hash.update(self.buffer[:size])
+                    read_bytes += size
+
+        if partial:
+            self.stats_helper.duplicate_partial_read_bytes += read_bytes
+        else:
+            self.stats_helper.duplicate_full_read_bytes += read_bytes
+        return file_hash.digest()
+
+    def filter_by_hash(self, candidates, partial):
+        """
+        Stage 2 (partial == True) and 3: Split the (size, paths) groups by the content hash.
+        The small files are completely read in stage 2, so they are done after it.
+        """
+        result = []
+        for file_size, paths in candidates:
+            if not partial and file_size <= self.PARTIAL_SIZE * 2:
+                # The partial hash was over the complete content
+                result.append((file_size, paths))
+                continue
+
+            hash_buckets = collections.defaultdict(list)
+            for path in paths:
+                try:
+                    digest = self._read_hash(path, file_size, partial)
+                except OSError as err:
+                    self.stats_helper.process_error_count += 1
+                    log.error('Error reading %s: %s', path, err)
+                else:
+                    hash_buckets[digest].append(path)
+
+            for hash_paths in hash_buckets.values():
+                if len(hash_paths) > 1:
+                    result.append((file_size, hash_paths))
+                elif partial:
+                    # This file will not be read completely:
+                    self.stats_helper.duplicate_partial_skip_bytes += max(file_size - self.PARTIAL_SIZE * 2, 0)
+
+        log.info(
+            '%s hash filter: %i candidates',
+            'Partial' if partial else 'Full',
+            sum(len(paths) for _, paths in result),
+        )
+        return result
+
+
+def find_duplicates(*, top_path, skip_dir_patterns=(), skip_file_patterns=(), min_size=1, progress='tqdm'):
+    finder = DuplicateFinder(
+        ScanDirClass=ScandirWalker,
+        scan_dir_kwargs=dict(
+            top_path=top_path,
+            skip_dir_patterns=skip_dir_patterns,
+            skip_file_patterns=skip_file_patterns,
+            stat_entries=True,
+        ),
+        update_interval_sec=1,
+        min_size=min_size,
+        ProcessBarClass=PROCESS_BAR_CLASSES[progress],
+    )
+    stats_helper = finder.process()
+
+    print('\n\n')
+    for file_size, paths in finder.duplicates:
+        print(f'{len(paths)} files with {human_filesize(file_size)}:')
+        for path in paths:
+            print(f'\t{path}')
+    print()
+
+    print(
+        f'Processed {stats_helper.walker_file_count} files ({human_filesize(stats_helper.process_file_size)})'
+        f' in {stats_helper.process_duration:.2f} sec'
+    )
+    print(
+        f'{stats_helper.duplicate_group_count} groups with {stats_helper.duplicate_file_count} duplicates:'
+        f' {human_filesize(stats_helper.duplicate_wasted_bytes)} wasted'
+    )
+    print('Not read:')
+    print(f' * {human_filesize(stats_helper.duplicate_size_skip_bytes)} via the unique file size')
+    print(f' * {human_filesize(stats_helper.duplicate_partial_skip_bytes)} via the partial hash')
+    print(
+        f'Read: {human_filesize(stats_helper.duplicate_partial_read_bytes)} for partial hashes'
+        f' and {human_filesize(stats_helper.duplicate_full_read_bytes)} for full hashes'
+    )
+    return finder
@@ -1,95 +1,189 @@
 #!/usr/bin/env python3
 
 import hashlib
+import os
 import sys
 from pathlib import Path
 from timeit import default_timer
 
 # IterFilesystem
+from iterfilesystem.hash_cache import HashCache
 from iterfilesystem.humanize import human_filesize
-from iterfilesystem.iter_scandir import ScandirWalker
+from iterfilesystem.iter_scandir import ORDER_NAME, ScandirWalker
 from iterfilesystem.main import IterFilesystem
+from iterfilesystem.parallel_scandir import ParallelScandirWalker
+from iterfilesystem.process_bar import PROCESS_BAR_CLASSES
+from iterfilesystem.read_ahead import ReadAheadWalker
+from iterfilesystem.scandir_index import IndexedScandirWalker
+from iterfilesystem.tree_hash import TreeHash
+
+READ_FLAGS = os.O_RDONLY | getattr(os, 'O_BINARY', 0)  # O_BINARY: only on Windows
 
 
 class CalcFilesystemSHA512(IterFilesystem):
+    # The file content is read into one reused buffer, so memory usage is constant:
+    BUFFER_SIZE = 1024 * 1024
+
+    # The chunk size is only used to update the "current file" bar in update_interval_sec intervals:
     MIN_CHUNK_SIZE = 10 * 1024 * 1024
     MAX_CHUNK_SIZE = sys.maxsize
 
+    # Read ahead: Number of reader threads and buffers per thread:
+    READ_AHEAD_WORKERS = 2
+    READ_AHEAD_BUFFERS = 4
+
+    def __init__(self, *, tree_hash=False, hash_cache=False, read_ahead=False, **kwargs):
+        """
+        tree_hash == False -> One SHA512 hash over the content of all files
+        tree_hash == True -> Calculate a SHA512 digest for every file and combine them via TreeHash
+        hash_cache == True -> Use the file digests from the persistent HashCache, if the file is not changed.
+        read_ahead == True -> Read the next files in background threads, while hashing the current one.
+        """
+        super().__init__(**kwargs)
+        if hash_cache and not tree_hash:
+            raise ValueError('The hash cache can only be used with tree hash!')
+
+        if read_ahead and self.batch_size:
+            # The read ahead walker can only read the current file:
+            raise ValueError('Read ahead and batches can not be used together!')
+
+        if read_ahead and hash_cache:
+            # The reader threads would read the files of all cache hits, too:
+            raise ValueError('Read ahead and the hash cache can not be used together!')
+
+        if (self.checkpoint_interval_sec or self.resume) and not tree_hash:
+            # A hashlib object can't be pickled, but the TreeHash state can:
+            raise ValueError('Checkpoints can only be used with tree hash!')
+
+        self.tree_hash = tree_hash
+        self.hash_cache = hash_cache
+        self.read_ahead = read_ahead
+        self.read_ahead_walker = None
+
     def start(self):
-        self.hash = hashlib.sha512()
+        if self.tree_hash:
+            self.hash = TreeHash(name='sha512')
+        else:
+            self.hash = hashlib.sha512()
+
+        if self.hash_cache:
+            # Create the connection here, because it can't be shared with the collect processes
+            self.hash_cache_db = HashCache(hash_name='sha512')
+        else:
+            self.hash_cache_db = None
+
+        self.buffer = memoryview(bytearray(self.BUFFER_SIZE))
 
         self.chunk_size = self.MIN_CHUNK_SIZE
         self.update_interval_trigger = self.update_interval_sec / 2
 
         self.big_file_count = 0
-        super().start()
+
+        if not self.read_ahead:
+            super().start()
+            return
+
+        walker = self.worker_scan_dir
+        self.read_ahead_walker = self.worker_scan_dir = ReadAheadWalker(
+            walker,
+            workers=self.READ_AHEAD_WORKERS,
+            buffer_size=self.BUFFER_SIZE,
+            buffers_per_worker=self.READ_AHEAD_BUFFERS,
+        )
+        try:
+            super().start()
+        finally:
+            self.worker_scan_dir = walker
+            self.read_ahead_walker = None
+
+    def read_chunks(self, dir_entry):
+        """
+        Yields the file content as memoryview slices of a reused buffer.
+        """
+        if self.read_ahead_walker is not None:
+            yield from self.read_ahead_walker.read_chunks(dir_entry)
+            return
+
+        with open(dir_entry.path, 'rb', buffering=0) as f:  # unbuffered: read directly into our buffer
+            while True:
+                size = f.readinto(self.buffer)
+                if not size:
+                    break
+                yield self.buffer[:size]
 
     def process_dir_entry(self, dir_entry, process_bars):
         if not dir_entry.is_file(follow_symlinks=False):
             # Skip all non files
             return
 
-        file_size = dir_entry.stat().st_size
+        file_stat = dir_entry.stat()
+        file_size = file_stat.st_size
+
+        if self.hash_cache_db is not None:
+            digest = self.hash_cache_db.get(dir_entry.path, file_stat)
+            if digest is not None:
+                self.stats_helper.hash_cache_hit_count += 1
+                self.hash.update(digest)
+                self.update(
+                    dir_entry=dir_entry,
+                    file_size=file_size,
+                    process_bars=process_bars
+                )
+                return
+            self.stats_helper.hash_cache_miss_count += 1
+
+        if self.tree_hash:
+            file_hash = hashlib.sha512()
+        else:
+            file_hash = self.hash
+
         small_file = file_size < self.chunk_size
 
         big_file = False
-        with Path(dir_entry).open('rb') as f:
-            process_size = 0
-            while True:
+        process_size = 0
+        start_time = default_timer()
+        for chunk in self.read_chunks(dir_entry):
+            file_hash.update(chunk)  # memoryview slice -> no copy
+            process_size += len(chunk)
+
+            if not small_file and process_size >= self.chunk_size:
+                # Display "current file processbar", but only for big files
+
+                # Calculate the chunk size, so we update the current file bar
+                # in self.update_interval_sec intervals
+                duration = default_timer() - start_time
+                if duration < self.update_interval_sec and self.chunk_size < self.MAX_CHUNK_SIZE:
+                    self.chunk_size = min([int(self.chunk_size * 1.25), self.MAX_CHUNK_SIZE])
+                elif duration > self.update_interval_sec:
+                    self.chunk_size = max([int(self.chunk_size * 0.75), self.MIN_CHUNK_SIZE])
+
+                if not big_file:
+                    # init current file bar
+                    process_bars.file_bar.reset(total=file_size)
+                    self.big_file_count += 1
+                    big_file = True
+
+                # print the bar:
+                process_bars.file_bar.desc = (
+                    f'{dir_entry.name}'
+                    f' | {human_filesize(self.chunk_size)} chunks'
+                    f' | {duration:.1f} sec.'
+                )
+                process_bars.file_bar.update(process_size)
+
+                self.update(  # Update statistics and global bars
+                    dir_entry=dir_entry,
+                    file_size=process_size,
+                    process_bars=process_bars
+                )
+                process_size = 0
                 start_time = default_timer()
-                try:
-                    data = f.read(self.chunk_size)
-                except MemoryError:
-                    # Lower the chunk size to avoid memory errors
-                    while self.chunk_size > 2:
-                        self.chunk_size = int(self.chunk_size * 0.25)
-                        self.MAX_CHUNK_SIZE = self.chunk_size
-                        try:
-                            data = f.read(self.chunk_size)
-                        except MemoryError:
-                            continue
-                        else:
-                            print(f'set max block size to: {self.MAX_CHUNK_SIZE} Bytes.')
-                            break
-
-                if not data:
-                    break
 
-                self.hash.update(data)
-                chunk_size = len(data)
-                process_size += chunk_size
-
-                if not small_file and chunk_size == self.chunk_size:
-                    # Display "current file processbar", but only for big files
-
-                    # Calculate the chunk size, so we update the current file bar
-                    # in self.update_interval_sec intervals
-                    duration = default_timer() - start_time
-                    if duration < self.update_interval_sec and self.chunk_size < self.MAX_CHUNK_SIZE:
-                        self.chunk_size = min([int(self.chunk_size * 1.25), self.MAX_CHUNK_SIZE])
-                    elif duration > self.update_interval_sec:
-                        self.chunk_size = max([int(self.chunk_size * 0.75), self.MIN_CHUNK_SIZE])
-
-                    if not big_file:
-                        # init current file bar
-                        process_bars.file_bar.reset(total=dir_entry.stat().st_size)
-                        self.big_file_count += 1
-                        big_file = True
-
-                    # print the bar:
-                    process_bars.file_bar.desc = (
-                        f'{dir_entry.name}'
-                        f' | {human_filesize(self.chunk_size)} chunks'
-                        f' | {duration:.1f} sec.'
-                    )
-                    process_bars.file_bar.update(process_size)
-
-                    self.update(  # Update statistics and global bars
-                        dir_entry=dir_entry,
-                        file_size=process_size,
-                        process_bars=process_bars
-                    )
-                    process_size = 0
+        if self.tree_hash:
+            digest = file_hash.digest()
+            self.hash.update(digest)
+            if self.hash_cache_db is not None:
+                self.hash_cache_db.set(dir_entry.path, file_stat, digest)
 
         if big_file:
             process_bars.file_bar.update(process_size)
@@ -106,21 +200,135 @@ class CalcFilesystemSHA512(IterFilesystem):
                 process_bars=process_bars
             )
 
+    def read_small_file(self, path, file_size):
+        """
+        Read a small file with less system calls than open(): no fstat() and no seek.
+        A read that returns the 'file_size' of the stat() call needs no extra read at the end.
+        Otherwise read until the end of file: A short read can happen in the middle of a file,
+        e.g.: on NFS, FUSE or via a signal. The file may also have grown since the stat() call.
+        """
+        read_size = self.batch_max_file_size + 1
+        fd = os.open(path, READ_FLAGS)
+        try:
+            content = os.read(fd, read_size)
+            if len(content) == file_size:
+                return content
+
+            chunks = [content]
+            while content:
+                content = os.read(fd, self.BUFFER_SIZE)
+                chunks.append(content)
+            return b''.join(chunks)
+        finally:
+            os.close(fd)
+
+    def process_dir_entries(self, dir_entries, process_bars):
+        """
+        Hash a batch of small files and update the statistics only once.
+        """
+        batch_size = 0
+        for dir_entry in dir_entries:
+            try:
+                file_stat = dir_entry.stat()
+                if self.hash_cache_db is not None:
+                    digest = self.hash_cache_db.get(dir_entry.path, file_stat)
+                    if digest is not None:
+                        self.stats_helper.hash_cache_hit_count += 1
+                        self.hash.update(digest)
+                        batch_size += file_stat.st_size
+                        continue
+                    self.stats_helper.hash_cache_miss_count += 1
+
+                content = self.read_small_file(dir_entry.path, file_stat.st_size)
+            except OSError:
+                self._process_error(dir_entry)
+                continue
+
+            batch_size += len(content)
+            if self.tree_hash:
+                digest = hashlib.sha512(content).digest()
+                self.hash.update(digest)
+                if self.hash_cache_db is not None:
+                    self.hash_cache_db.set(dir_entry.path, file_stat, digest)
+            else:
+                self.hash.update(content)
+
+        self.update(
+            dir_entry=dir_entries[-1],
+            file_size=batch_size,
+            process_bars=process_bars
+        )
+
+    def get_checkpoint_state(self):
+        return dict(hash=self.hash, big_file_count=self.big_file_count)
+
+    def set_checkpoint_state(self, state):
+        self.hash = state['hash']
+        self.big_file_count = state['big_file_count']
+
+    def get_shard_result(self):
+        return self.stats_helper.hash
+
+    @classmethod
+    def merge_shard_results(cls, results):
+        """
+        Note: The hash over all shard hashes differs from the hash of a unsharded scan.
+        """
+        merged_hash = hashlib.sha512()
+        for shard_hash in results:
+            merged_hash.update(bytes.fromhex(shard_hash))
+        return merged_hash.hexdigest()
+
     def done(self):
         self.stats_helper.hash = self.hash.hexdigest()  # Just add hash to statistics ;)
+        if self.hash_cache_db is not None:
+            self.hash_cache_db.close()
         print(f'There was {self.big_file_count} big files.')
 
 
-def calc_sha512(*, top_path, skip_dir_patterns=(), skip_file_patterns=(), wait=False):
+def calc_sha512(*, top_path, skip_dir_patterns=(), skip_file_patterns=(), wait=False, single_walk=False,
+                scandir_workers=None, scandir_index=False, tree_hash=False, hash_cache=False, stat_entries=False,
+                order=ORDER_NAME, instrumentation=None, progress='tqdm', metrics_exporter=None,
+                checkpoint_interval_sec=None, resume=False, shard_count=None, shard_index=None, shard_plan=None,
+                subtree_totals_path=None, read_ahead=False, batch_size=None):
+    scan_dir_kwargs = dict(
+        top_path=top_path,
+        skip_dir_patterns=skip_dir_patterns,
+        skip_file_patterns=skip_file_patterns,
+        stat_entries=stat_entries,
+        order=order,
+    )
+    if shard_count is not None:
+        scan_dir_kwargs.update(dict(shard_count=shard_count, shard_index=shard_index, shard_plan=shard_plan))
+
+    if scandir_workers and scandir_index:
+        raise ValueError('Scandir workers and scandir index can not be used together!')
+
+    if scandir_index:
+        ScanDirClass = IndexedScandirWalker
+    elif scandir_workers:
+        # The hash depends on the file order -> use the ordered mode:
+        ScanDirClass = ParallelScandirWalker
+        scan_dir_kwargs.update(dict(max_workers=scandir_workers, ordered=True))
+    else:
+        ScanDirClass = ScandirWalker
+
     calc_sha = CalcFilesystemSHA512(
-        ScanDirClass=ScandirWalker,
-        scan_dir_kwargs=dict(
-            top_path=top_path,
-            skip_dir_patterns=skip_dir_patterns,
-            skip_file_patterns=skip_file_patterns,
-        ),
+        ScanDirClass=ScanDirClass,
+        scan_dir_kwargs=scan_dir_kwargs,
         update_interval_sec=1,
-        wait=wait
+        wait=wait,
+        single_walk=single_walk,
+        tree_hash=tree_hash,
+        hash_cache=hash_cache,
+        read_ahead=read_ahead,
+        batch_size=batch_size,
+        instrumentation=instrumentation,
+        ProcessBarClass=PROCESS_BAR_CLASSES[progress],
+        metrics_exporter=metrics_exporter,
+        checkpoint_interval_sec=checkpoint_interval_sec,
+        resume=resume,
+        subtree_totals_path=subtree_totals_path,
     )
     stats_helper = calc_sha.process()
 
@@ -129,7 +337,15 @@ def calc_sha512(*, top_path, skip_dir_patterns=(), skip_file_patterns=(), wait=F
         f'Processed {stats_helper.collect_dir_item_count} filesystem items'
         f' in {stats_helper.process_duration:.2f} sec'
     )
-    print(f'SHA515 hash calculated over all file content: {stats_helper.hash}')
+    if tree_hash:
+        print(f'SHA512 tree hash calculated over all file digests: {stats_helper.hash}')
+        if hash_cache:
+            print(
+                f'Hash cache: {stats_helper.hash_cache_hit_count} hits'
+                f' / {stats_helper.hash_cache_miss_count} misses'
+            )
+    else:
+        print(f'SHA515 hash calculated over all file content: {stats_helper.hash}')
     print(f'File count: {stats_helper.walker_file_count}')
     print(f'Total file size: {human_filesize(stats_helper.collect_file_size)}')
 
@@ -139,6 +355,12 @@ def calc_sha512(*, top_path, skip_dir_patterns=(), skip_file_patterns=(), wait=F
     if skip_file_patterns:
         print(f'{stats_helper.walker_file_skip_count} files skipped.')
 
+    if instrumentation is not None:
+        print('\nWorker phase timings:')
+        print(instrumentation.format_timings())
+        if stats_helper.profile:
+            print(f'\nProfile of the worker loop:\n{stats_helper.profile}')
+
     return stats_helper
 
 
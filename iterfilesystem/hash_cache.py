@@ -0,0 +1,81 @@
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+# IterFilesystem
+from iterfilesystem.utils import get_private_temp_path
+
+log = logging.getLogger(__name__)
+
+
+class HashCache:
+    """
+    Persistent cache of file digests in a SQLite database.
+
+    The digest is only used if device, inode, size, mtime and ctime are the same.
+    The ctime is compared, too: e.g.: rsync restores the mtime after a content change.
+    """
+    # Files changed in the last seconds are not stored, because a
+    # following change may not change the mtime (timestamp granularity):
+    racy_interval_sec = 2
+
+    commit_interval = 1000  # commit after x new digests
+
+    def __init__(self, *, cache_path=None, hash_name='sha512'):
+        if cache_path is None:
+            # A digest planted by another user would be reused -> only use our own directory:
+            persist_path = get_private_temp_path(seed=f'hash cache {hash_name}')
+            cache_path = Path(persist_path, f'{hash_name}_cache.sqlite3')
+        self.cache_path = Path(cache_path)
+
+        log.info('Use hash cache: %s', self.cache_path)
+        self.connection = sqlite3.connect(str(self.cache_path), timeout=30)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            ' device INTEGER, inode INTEGER, size INTEGER, mtime_ns INTEGER, ctime_ns INTEGER, digest BLOB,'
+            ' PRIMARY KEY (device, inode)'
+            ')'
+        )
+        self.uncommitted = 0
+
+    def _get_stat(self, path, file_stat):
+        if not file_stat.st_ino:
+            # os.DirEntry.stat() on Windows doesn't set st_ino and st_dev
+            file_stat = os.stat(path)
+        return file_stat
+
+    def get(self, path, file_stat):
+        file_stat = self._get_stat(path, file_stat)
+        row = self.connection.execute(
+            'SELECT size, mtime_ns, ctime_ns, digest FROM files WHERE device=? AND inode=?',
+            (file_stat.st_dev, file_stat.st_ino)
+        ).fetchone()
+        if row is not None and row[:3] == (file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ctime_ns):
+            return row[3]
+
+    def set(self, path, file_stat, digest):
+        file_stat = self._get_stat(path, file_stat)
+        if time.time() - file_stat.st_mtime <= self.racy_interval_sec:
+            return
+
+        self.connection.execute(
+            'INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)',
+            (
+                file_stat.st_dev, file_stat.st_ino,
+                file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ctime_ns,
+                digest
+            )
+        )
+        self.uncommitted += 1
+        if self.uncommitted >= self.commit_interval:
+            self.commit()
+
+    def commit(self):
+        self.connection.commit()
+        self.uncommitted = 0
+
+    def close(self):
+        self.commit()
+        self.connection.close()
@@ -0,0 +1,228 @@
+import cProfile
+import functools
+import inspect
+import io
+import logging
+import pstats
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from timeit import default_timer
+
+log = logging.getLogger(__name__)
+
+PROFILER_CPROFILE = 'cprofile'
+PROFILER_SAMPLING = 'sampling'
+PROFILERS = (PROFILER_CPROFILE, PROFILER_SAMPLING)
+
+
+class Histogram:
+    """
+    Durations of one phase in power-of-two microsecond buckets.
+
+    >>> histogram = Histogram()
+    >>> for duration in (0.0000005, 0.000003, 0.000003, 0.0011):
+    ...     histogram.add(duration)
+    >>> histogram.as_dict()['buckets']
+    {'<1us': 1, '<4us': 2, '<2048us': 1}
+    >>> histogram.count, histogram.max
+    (4, 0.0011)
+    """
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = Counter()
+
+    def add(self, duration):
+        self.count += 1
+        self.total += duration
+        if self.min is None or duration < self.min:
+            self.min = duration
+        if self.max is None or duration > self.max:
+            self.max = duration
+        self.buckets[int(duration * 1000000).bit_length()] += 1
+
+    def as_dict(self):
+        return dict(
+            count=self.count,
+            total=self.total,
+            mean=self.total / self.count if self.count else None,
+            min=self.min,
+            max=self.max,
+            buckets={f'<{2 ** bucket}us': count for bucket, count in sorted(self.buckets.items())},
+        )
+
+
+class SamplingProfiler:
+    """
+    Samples the current stack of one thread in 'interval' seconds
+    and counts the functions (inclusive: every function in the stack is counted once per sample).
+    """
+
+    def __init__(self, *, interval=0.005):
+        self.interval = interval
+        self.samples = 0
+        self.counts = Counter()
+        self.thread_id = None
+        self.stop_event = threading.Event()
+        self.sampler_thread = None
+
+    def _sample(self):
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            functions = set()
+            while frame is not None:
+                code = frame.f_code
+                functions.add(f'{code.co_name} ({code.co_filename}:{code.co_firstlineno})')
+                frame = frame.f_back
+            self.counts.update(functions)
+            self.samples += 1
+
+    def enable(self):
+        self.thread_id = threading.get_ident()
+        self.stop_event.clear()
+        self.sampler_thread = threading.Thread(name='sampling_profiler', target=self._sample, daemon=True)
+        self.sampler_thread.start()
+
+    def disable(self):
+        self.stop_event.set()
+        self.sampler_thread.join()
+
+    def format_stats(self, limit):
+        lines = [f'{self.samples} samples every {self.interval * 1000:.1f} ms:']
+        for function, count in self.counts.most_common(limit):
+            lines.append(f'{count / (self.samples or 1):6.1%} {function}')
+        return '\n'.join(lines)
+
+
+class Instrumentation:
+    """
+    Opt-in measurement of the worker: Every instrumented method call is timed into a Histogram,
+    e.g.: the os.scandir() calls, the skip pattern matching, the stat() calls, process_dir_entry()
+    and the process bar updates. The original methods are replaced on the instances only,
+    so without instrumentation nothing is slowed down.
+
+    The collect processes are not instrumented.
+    Note: In 'native' walker order only the os.scandir() call itself is timed: The entries are streamed.
+
+    profiler == 'cprofile' -> profile the worker loop with cProfile
+    profiler == 'sampling' -> sample the stack of the worker loop thread (less overhead)
+
+    The results are stored in the StatisticHelper as 'phase_timings' and 'profile'.
+    """
+    walker_methods = ('_scandir', '_stat_entry', 'on_skip_dir', 'on_skip_file')
+    iter_filesystem_methods = (
+        'process_dir_entry', 'process_dir_entries', 'merge_result', 'update', '_update_stats_helper'
+    )
+
+    def __init__(self, *, profiler=None, profile_limit=30, sampling_interval=0.005):
+        if profiler is not None and profiler not in PROFILERS:
+            raise ValueError(f'Unknown profiler {profiler!r} (choose from: {", ".join(PROFILERS)})')
+
+        self.profiler = profiler
+        self.profile_limit = profile_limit
+        self.sampling_interval = sampling_interval
+        self.histograms = {}
+        self.profile_stats = None
+
+    def get_histogram(self, phase):
+        try:
+            return self.histograms[phase]
+        except KeyError:
+            histogram = self.histograms[phase] = Histogram()
+            return histogram
+
+    def wrap_method(self, instance, method_name, phase=None):
+        """
+        Time all calls of the given method of this instance.
+        """
+        method = getattr(instance, method_name, None)
+        if method is None:
+            return
+
+        if phase is None:
+            phase = f'{type(instance).__name__}.{method_name}'
+        add = self.get_histogram(phase).add
+
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def timed(*args, **kwargs):
+                start_time = default_timer()
+                try:
+                    return await method(*args, **kwargs)
+                finally:
+                    add(default_timer() - start_time)
+        else:
+            @functools.wraps(method)
+            def timed(*args, **kwargs):
+                start_time = default_timer()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    add(default_timer() - start_time)
+
+        setattr(instance, method_name, timed)
+
+    def instrument_walker(self, walker):
+        for method_name in self.walker_methods:
+            self.wrap_method(walker, method_name)
+
+        walker_name = type(walker).__name__
+        for attr_name in ('skip_dir_patterns', 'skip_file_patterns'):
+            patterns = getattr(walker, attr_name, None)
+            if patterns:
+                self.wrap_method(patterns, 'matches', phase=f'{walker_name}.{attr_name}.matches')
+
+    def instrument_iter_filesystem(self, iter_fs):
+        for method_name in self.iter_filesystem_methods:
+            self.wrap_method(iter_fs, method_name)
+
+    @contextmanager
+    def profile(self):
+        """
+        Profile the code in the with block (only the current thread)
+        """
+        if self.profiler == PROFILER_CPROFILE:
+            profiler = cProfile.Profile()
+        elif self.profiler == PROFILER_SAMPLING:
+            profiler = SamplingProfiler(interval=self.sampling_interval)
+        else:
+            yield
+            return
+
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            if isinstance(profiler, SamplingProfiler):
+                self.profile_stats = profiler.format_stats(limit=self.profile_limit)
+            else:
+                stream = io.StringIO()
+                stats = pstats.Stats(profiler, stream=stream)
+                stats.sort_stats('cumulative').print_stats(self.profile_limit)
+                self.profile_stats = stream.getvalue()
+
+    def get_phase_timings(self):
+        return {phase: histogram.as_dict() for phase, histogram in sorted(self.histograms.items())}
+
+    def merge_into(self, stats_helper):
+        stats_helper.phase_timings = self.get_phase_timings()
+        stats_helper.profile = self.profile_stats
+
+    def format_timings(self):
+        lines = []
+        for phase, histogram in sorted(self.histograms.items(), key=lambda item: -item[1].total):
+            if histogram.count:
+                lines.append(
+                    f'{histogram.total:9.3f} sec'
+                    f' {histogram.count:10} calls'
+                    f' {histogram.total / histogram.count * 1000000:10.1f} us/call'
+                    f'  {phase}'
+                )
+        return '\n'.join(lines)
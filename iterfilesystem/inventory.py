@@ -0,0 +1,285 @@
+import array
+import bz2
+import csv
+import gzip
+import io
+import json
+import lzma
+import os
+import struct
+import sys
+
+# IterFilesystem
+from iterfilesystem.humanize import human_filesize
+from iterfilesystem.iter_scandir import ScandirWalker
+from iterfilesystem.main import IterFilesystem
+from iterfilesystem.process_bar import PROCESS_BAR_CLASSES
+
+COLUMNS = ('path', 'size', 'mtime', 'inode', 'mode')
+
+COMPRESSIONS = {
+    'none': None,
+    'gzip': gzip.open,
+    'bz2': bz2.open,
+    'lzma': lzma.open,
+}
+
+# The binary columnar format:
+#   COLUMNAR_MAGIC and then blocks of BLOCK_HEADER (row count, size of the UTF-8 paths)
+#   followed by the columns: path lengths, paths, size, mtime, inode and mode
+# All numbers are little endian.
+COLUMNAR_MAGIC = b'IFSINV1\n'
+BLOCK_HEADER = struct.Struct('<II')
+COLUMN_TYPECODES = (
+    ('size', 'q'),  # int64
+    ('mtime', 'd'),  # float64
+    ('inode', 'Q'),  # uint64
+    ('mode', 'I'),  # uint32
+)
+PATH_LENGTH_TYPECODE = 'I'  # uint32
+assert array.array('I').itemsize == 4, 'Unsupported platform'
+
+
+def encode_path(path):
+    # surrogateescape -> not UTF-8 file names survive the round trip
+    return path.encode('utf-8', 'surrogateescape')
+
+
+class NdjsonWriter:
+    """
+    One JSON object per line
+    """
+    binary = False
+
+    def __init__(self, f):
+        self.f = f
+
+    def write_rows(self, rows):
+        self.f.write(''.join(
+            json.dumps(dict(zip(COLUMNS, row))) + '\n'
+            for row in rows
+        ))
+
+    def close(self):
+        pass
+
+
+class CsvWriter:
+    """
+    CSV with a header line
+    """
+    binary = False
+
+    def __init__(self, f):
+        self.writer = csv.writer(f)
+        self.writer.writerow(COLUMNS)
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        pass
+
+
+class ColumnarWriter:
+    """
+    Compact binary format: Every batch of rows is stored column by column, see: COLUMNAR_MAGIC
+    Read it with read_columnar()
+    """
+    binary = True
+
+    def __init__(self, f):
+        self.f = f
+        self.f.write(COLUMNAR_MAGIC)
+
+    def write_rows(self, rows):
+        if not rows:
+            return
+
+        columns = list(zip(*rows))
+        paths = [encode_path(path) for path in columns[0]]
+        path_data = b''.join(paths)
+
+        self.f.write(BLOCK_HEADER.pack(len(rows), len(path_data)))
+        self.f.write(to_little_endian(array.array(PATH_LENGTH_TYPECODE, map(len, paths))))
+        self.f.write(path_data)
+        for (_, typecode), values in zip(COLUMN_TYPECODES, columns[1:]):
+            self.f.write(to_little_endian(array.array(typecode, values)))
+
+    def close(self):
+        pass
+
+
+def to_little_endian(values):
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def read_array(f, typecode, count):
+    values = array.array(typecode)
+    data = f.read(values.itemsize * count)
+    if len(data) != values.itemsize * count:
+        raise EOFError('Truncated columnar inventory')
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def read_columnar(f):
+    """
+    Yields the (path, size, mtime, inode, mode) rows of a columnar inventory file object
+    """
+    if f.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+        raise ValueError('Not a columnar inventory')
+
+    while True:
+        header = f.read(BLOCK_HEADER.size)
+        if not header:
+            return
+        if len(header) != BLOCK_HEADER.size:
+            raise EOFError('Truncated columnar inventory')
+
+        row_count, path_data_size = BLOCK_HEADER.unpack(header)
+        path_lengths = read_array(f, PATH_LENGTH_TYPECODE, row_count)
+        path_data = f.read(path_data_size)
+        if len(path_data) != path_data_size:
+            raise EOFError('Truncated columnar inventory')
+
+        paths = []
+        offset = 0
+        for length in path_lengths:
+            paths.append(path_data[offset:offset + length].decode('utf-8', 'surrogateescape'))
+            offset += length
+
+        columns = [read_array(f, typecode, row_count) for _, typecode in COLUMN_TYPECODES]
+        yield from zip(paths, *columns)
+
+
+FORMATS = {
+    'ndjson': NdjsonWriter,
+    'csv': CsvWriter,
+    'columnar': ColumnarWriter,
+}
+
+
+def open_inventory(path, *, format, compression='none', mode='wb', buffer_size=1024 * 1024):
+    """
+    Open the inventory file with the compression and in text mode for the text formats.
+    """
+    open_func = COMPRESSIONS[compression]
+    if open_func is None:
+        f = open(path, mode, buffering=buffer_size)
+    else:
+        # The compressors buffer on their own:
+        f = open_func(path, mode)
+
+    if not FORMATS[format].binary:
+        f = io.TextIOWrapper(f, encoding='utf-8', errors='surrogateescape', newline='')
+    return f
+
+
+class InventoryExporter(IterFilesystem):
+    """
+    Stream path, size, mtime, inode and mode of all walker entries into a NDJSON, CSV or columnar file.
+
+    The rows are collected in batches of 'batch_rows' and written in one go,
+    so the memory usage is bounded by the batch and not by the tree size.
+    """
+    # A resume would truncate the output file:
+    supports_checkpoints = False
+
+    def __init__(self, *, output_path, format='ndjson', compression='none', batch_rows=1000,
+                 buffer_size=1024 * 1024, **kwargs):
+        """
+        output_path -> The inventory file
+        format -> One of FORMATS
+        compression -> One of COMPRESSIONS
+        batch_rows -> Number of rows that are written at once
+        buffer_size -> Write buffer size of uncompressed files
+        """
+        if format not in FORMATS:
+            raise ValueError(f'Unknown format {format!r}, use one of: {", ".join(FORMATS)}')
+        if compression not in COMPRESSIONS:
+            raise ValueError(f'Unknown compression {compression!r}, use one of: {", ".join(COMPRESSIONS)}')
+
+        super().__init__(**kwargs)
+
+        self.output_path = output_path
+        self.format = format
+        self.compression = compression
+        self.batch_rows = batch_rows
+        self.buffer_size = buffer_size
+        self.row_count = 0
+
+    def start(self):
+        self.rows = []
+        with open_inventory(
+            self.output_path,
+            format=self.format,
+            compression=self.compression,
+            buffer_size=self.buffer_size,
+        ) as f:
+            self.writer = FORMATS[self.format](f)
+            try:
+                super().start()
+            finally:
+                # Store the rows of a KeyboardInterrupt, too:
+                self.flush_rows()
+                self.writer.close()
+
+    def flush_rows(self):
+        if self.rows:
+            self.writer.write_rows(self.rows)
+            self.row_count += len(self.rows)
+            self.rows = []
+
+    def process_dir_entry(self, dir_entry, process_bars):
+        entry_stat = dir_entry.stat(follow_symlinks=False)
+        self.rows.append((
+            os.fsdecode(dir_entry.path),
+            entry_stat.st_size,
+            entry_stat.st_mtime,
+            entry_stat.st_ino,
+            entry_stat.st_mode,
+        ))
+        if len(self.rows) >= self.batch_rows:
+            self.flush_rows()
+
+        if dir_entry.is_file(follow_symlinks=False):
+            self.update(
+                dir_entry=dir_entry,
+                file_size=entry_stat.st_size,
+                process_bars=process_bars
+            )
+
+
+def export_inventory(*, top_path, output_path, format='ndjson', compression='none', skip_dir_patterns=(),
+                     skip_file_patterns=(), batch_rows=1000, progress='tqdm'):
+    exporter = InventoryExporter(
+        ScanDirClass=ScandirWalker,
+        scan_dir_kwargs=dict(
+            top_path=top_path,
+            skip_dir_patterns=skip_dir_patterns,
+            skip_file_patterns=skip_file_patterns,
+            stat_entries=True,
+        ),
+        update_interval_sec=1,
+        output_path=output_path,
+        format=format,
+        compression=compression,
+        batch_rows=batch_rows,
+        ProcessBarClass=PROCESS_BAR_CLASSES[progress],
+    )
+    stats_helper = exporter.process()
+
+    print('\n\n')
+    print(
+        f'Exported {exporter.row_count} entries ({human_filesize(stats_helper.process_file_size)})'
+        f' in {stats_helper.process_duration:.2f} sec'
+    )
+    print(f'Inventory: {output_path} ({human_filesize(os.path.getsize(output_path))})')
+    if stats_helper.process_error_count:
+        print(f'{stats_helper.process_error_count} errors')
+    return exporter
@@ -1,10 +1,47 @@
 import fnmatch
 import logging
+import operator
 import os
 from pathlib import Path
 
+# IterFilesystem
+from iterfilesystem.dir_entry import DirEntryRecord
+from iterfilesystem.sharding import ShardFilter
+from iterfilesystem.skip_patterns import SkipPatterns
+
 log = logging.getLogger(__name__)
 
+# The order of the entries of one directory:
+ORDER_NAME = 'name'  # sorted by name -> reproducible order, e.g.: for a hash over all files
+ORDER_NATIVE = 'native'  # as the OS returns them: streamed, without reading the whole directory first
+ORDER_INODE = 'inode'  # sorted by inode number -> fewer seeks on spinning disks (e.g.: ext4)
+ORDERS = (ORDER_NAME, ORDER_NATIVE, ORDER_INODE)
+
+
+class PendingDir:
+    """
+    One directory on the stack of the ScandirWalker.
+    'entries' is None, if the listing was dropped because of the memory budget.
+    """
+    __slots__ = ('path', 'entries', 'last_entry', 'resume_parts', 'shard_parts')
+
+    def __init__(self, path, resume_parts=None, shard_parts=None):
+        self.path = path
+        self.entries = None  # a reversed list or a iterator (in native order)
+        self.last_entry = None  # the last processed entry -> resume point after dropped listing
+        self.resume_parts = resume_parts  # relative path parts of the resume position, see: set_resume_position()
+        self.shard_parts = shard_parts  # relative path parts, if the entries must be checked via the ShardFilter
+
+    def next_entry(self):
+        if isinstance(self.entries, list):
+            if not self.entries:
+                return None
+            dir_entry = self.entries.pop()
+        else:
+            dir_entry = next(self.entries, None)
+        self.last_entry = dir_entry
+        return dir_entry
+
 
 class ScandirWalker:
     def __init__(
@@ -13,12 +50,41 @@ class ScandirWalker:
             top_path,
             stats_helper,
             skip_dir_patterns=(),
-            skip_file_patterns=()):
-
+            skip_file_patterns=(),
+            stat_entries=False,
+            order=ORDER_NAME,
+            max_pending_entries=None,
+            shard_count=None,
+            shard_index=None,
+            shard_plan=None):
+        """
+        stat_entries == True -> yield DirEntryRecord instances that carries the stat result
+            of all non directories. So the stat() system call is made only once per entry.
+            These calls are counted in StatisticHelper.walker_stat_entries_count
+        order -> The order of the entries of one directory: 'name', 'native' or 'inode'
+            Note: on Windows 'inode' needs one stat() system call per entry.
+        max_pending_entries -> Memory budget: Max. number of not yet processed entries in the
+            listings of all parent directories. If exceeded, the listings of the top most directories
+            are dropped and read again (via os.scandir()) when the walk comes back to them.
+            None == unlimited. Not used in 'native' order: The entries are streamed there.
+        shard_count, shard_index -> Yield only the entries of one shard of the tree,
+            see: iterfilesystem.sharding.ShardFilter
+        shard_plan -> optional mapping of relative path parts to a shard index
+        """
+        if order not in ORDERS:
+            raise ValueError(f'Unknown order {order!r} (choose from: {", ".join(ORDERS)})')
+        self.order = order
+        self.max_pending_entries = max_pending_entries
+        self.resume_parts = None
+        if shard_count is None:
+            self.shard_filter = None
+        else:
+            self.shard_filter = ShardFilter(shard_count=shard_count, shard_index=shard_index, plan=shard_plan)
         self.top_path = self.get_top_path(top_path)
         self.stats_helper = stats_helper
-        self.skip_dir_patterns = self.get_skip_dir_patterns(skip_dir_patterns)
-        self.skip_file_patterns = self.get_skip_file_patterns(skip_file_patterns)
+        self.skip_dir_patterns = self._compile_patterns(self.get_skip_dir_patterns(skip_dir_patterns))
+        self.skip_file_patterns = self._compile_patterns(self.get_skip_file_patterns(skip_file_patterns))
+        self.stat_entries = stat_entries
 
     ##############################################################################################
     # These methods may be overwritten:
@@ -39,7 +105,8 @@ class ScandirWalker:
         else:
             log.info('No skip %s patterns, ok.', kind)
 
-        return skip_patterns
+        # Compile the patterns only once:
+        return SkipPatterns(skip_patterns)
 
     def get_skip_dir_patterns(self, skip_dir_patterns):
         return self.get_pattern(kind='directory', skip_patterns=skip_dir_patterns)
@@ -55,7 +122,16 @@ class ScandirWalker:
 
     ##############################################################################################
 
+    def _compile_patterns(self, patterns):
+        # The get_skip_*_patterns() hooks may return plain fnmatch patterns:
+        if isinstance(patterns, SkipPatterns):
+            return patterns
+        return SkipPatterns(patterns)
+
     def fnmatches(self, dir_item_name, patterns):
+        if isinstance(patterns, SkipPatterns):
+            return patterns.matches(dir_item_name)
+
         for skip_pattern in patterns:
             if fnmatch.fnmatch(dir_item_name, skip_pattern):
                 return True
@@ -64,26 +140,194 @@ class ScandirWalker:
     def __iter__(self):
         yield from self._iter_scandir(path=self.top_path)
 
-    def _iter_scandir(self, path):
+    def _stat_entry(self, dir_entry):
+        self.stats_helper.walker_stat_entries_count += 1
+        try:
+            # os.DirEntry caches the result and on Windows it needs no system call:
+            file_stat = dir_entry.stat(follow_symlinks=False)
+        except OSError as err:
+            log.error('stat error: %s', err)
+            file_stat = None
+
+        if isinstance(dir_entry, DirEntryRecord):
+            # e.g.: from IndexedScandirWalker -> stat result is cached in the record
+            return dir_entry
+
+        return DirEntryRecord.from_dir_entry(dir_entry, lstat=file_stat)
+
+    def _scandir(self, path):
+        self.stats_helper.walker_scandir_count += 1
+        return self._read_dir(path)
+
+    def _read_dir(self, path):
+        """
+        List one directory in the requested order.
+        Note: Called from worker threads in ParallelScandirWalker
+        """
         try:
             dir_entry_iterator = os.scandir(path)
         except PermissionError as err:
             log.error('scandir error: %s', err)
+            return []
+
+        if self.order == ORDER_NATIVE:
+            return self._stream_dir(dir_entry_iterator)
+
+        with dir_entry_iterator:
+            return self._order_entries(dir_entry_iterator)
+
+    def _stream_dir(self, dir_entry_iterator):
+        with dir_entry_iterator:
+            yield from dir_entry_iterator
+
+    def _order_entries(self, dir_entries):
+        if self.order == ORDER_NAME:
+            return sorted(dir_entries, key=lambda x: x.name)
+        elif self.order == ORDER_INODE:
+            return sorted(dir_entries, key=self._inode_key)
+        return dir_entries
+
+    def _inode_key(self, dir_entry):
+        return dir_entry.inode(), dir_entry.name
+
+    def set_resume_position(self, parts):
+        """
+        Continue the walk after the given entry (relative path parts), e.g.: to resume a scan from a checkpoint.
+        The walk order is the same as the order of the path parts tuples, so:
+        all entries <= the given entry are not yielded and not counted.
+        """
+        self.check_resumable()
+        self.resume_parts = tuple(parts)
+
+    def check_resumable(self):
+        """
+        Raise a error if a walk can't be resumed via set_resume_position(),
+        e.g.: before checkpoints are saved, that can never be used.
+        """
+        if self.order != ORDER_NAME:
+            raise ValueError(f'Resume is only possible in {ORDER_NAME!r} order!')
+
+    def _list_pending_dir(self, pending_dir):
+        """
+        Read the directory of the given PendingDir.
+        Returns a PendingDir for the next directory on the resume path, if any.
+        """
+        dir_entries = self._scandir(pending_dir.path)
+        if self.order == ORDER_NATIVE:
+            pending_dir.entries = iter(dir_entries)
             return
 
-        for dir_entry in sorted(dir_entry_iterator, key=lambda x: x.name):
-            if dir_entry.is_dir(follow_symlinks=False):
-                if self.fnmatches(dir_item_name=dir_entry.name, patterns=self.skip_dir_patterns):
+        dir_entries = list(dir_entries)
+        resume_dir = None
+        if pending_dir.resume_parts:
+            resume_name, sub_parts = pending_dir.resume_parts[0], pending_dir.resume_parts[1:]
+            pending_dir.resume_parts = None
+
+            remaining_entries = []
+            for dir_entry in dir_entries:
+                if dir_entry.name > resume_name:
+                    remaining_entries.append(dir_entry)
+                elif dir_entry.name == resume_name:
+                    pending_dir.last_entry = dir_entry
+                    if dir_entry.is_dir(follow_symlinks=False):
+                        # Already yielded -> continue in this sub directory:
+                        _, shard_parts = self._check_shard(pending_dir, dir_entry)
+                        resume_dir = PendingDir(dir_entry.path, resume_parts=sub_parts, shard_parts=shard_parts)
+            dir_entries = remaining_entries
+
+        elif pending_dir.last_entry is not None:
+            # Listing was dropped -> skip all entries that are already processed:
+            if self.order == ORDER_INODE:
+                get_key = self._inode_key
+            else:
+                get_key = operator.attrgetter('name')
+            last_key = get_key(pending_dir.last_entry)
+            dir_entries = [dir_entry for dir_entry in dir_entries if get_key(dir_entry) > last_key]
+
+        dir_entries.reverse()  # -> pop() returns the next entry
+        pending_dir.entries = dir_entries
+        return resume_dir
+
+    def _limit_pending_entries(self, stack):
+        """
+        Drop the listings of the top most directories, if the memory budget is exceeded.
+        Called after the top of the stack is listed. The running 'pending_count' and the
+        'drop_index' (all directories below are dropped or empty) makes this O(1) amortized.
+        """
+        self.pending_count += len(stack[-1].entries)
+        self.drop_index = min(self.drop_index, len(stack) - 1)
+        while self.pending_count > self.max_pending_entries and self.drop_index < len(stack) - 1:
+            pending_dir = stack[self.drop_index]
+            if pending_dir.entries:
+                self.pending_count -= len(pending_dir.entries)
+                pending_dir.entries = None
+            self.drop_index += 1
+
+    def _check_shard(self, pending_dir, dir_entry):
+        """
+        Returns (yield entry, relative path parts if the sub directory must be checked, too)
+        """
+        if pending_dir.shard_parts is None:
+            # The whole sub tree belongs to our shard
+            return True, None
+
+        parts = pending_dir.shard_parts + (dir_entry.name,)
+        own_entry, split = self.shard_filter.check(parts)
+        if split:
+            return own_entry, parts
+        return own_entry, None
+
+    def _iter_scandir(self, path):
+        """
+        Walk via a explicit stack: no recursion limit and O(1) per entry regardless of the depth.
+        """
+        top_shard_parts = None if self.shard_filter is None else ()
+        limit_pending = self.max_pending_entries is not None and self.order != ORDER_NATIVE
+        self.pending_count = 0  # Number of entries in all listings on the stack
+        self.drop_index = 0
+        stack = [PendingDir(path, resume_parts=self.resume_parts, shard_parts=top_shard_parts)]
+        while stack:
+            pending_dir = stack[-1]
+            if pending_dir.entries is None:
+                resume_dir = self._list_pending_dir(pending_dir)
+                if limit_pending:
+                    self._limit_pending_entries(stack)
+                if resume_dir is not None:
+                    stack.append(resume_dir)
+                    continue
+
+            dir_entry = pending_dir.next_entry()
+            if dir_entry is None:
+                stack.pop()
+                continue
+            if limit_pending:
+                self.pending_count -= 1
+
+            own_entry, shard_parts = self._check_shard(pending_dir, dir_entry)
+            if not own_entry:
+                # Entry of a other shard: Only walk into split directories, without counting
+                if (
+                    shard_parts is not None
+                    and dir_entry.is_dir(follow_symlinks=False)
+                    and not self.fnmatches(dir_entry.name, self.skip_dir_patterns)
+                ):
+                    stack.append(PendingDir(dir_entry.path, shard_parts=shard_parts))
+            elif dir_entry.is_dir(follow_symlinks=False):
+                if self.fnmatches(dir_entry.name, self.skip_dir_patterns):
                     self.stats_helper.walker_dir_skip_count += 1
                     self.on_skip_dir(dir_entry)
                 else:
                     self.stats_helper.walker_dir_count += 1
+                    if self.stat_entries:
+                        dir_entry = DirEntryRecord.from_dir_entry(dir_entry)
                     yield dir_entry
-                    yield from self._iter_scandir(dir_entry.path)
+                    stack.append(PendingDir(dir_entry.path, shard_parts=shard_parts))
             else:
-                if self.fnmatches(dir_item_name=dir_entry.name, patterns=self.skip_file_patterns):
+                if self.fnmatches(dir_entry.name, self.skip_file_patterns):
                     self.stats_helper.walker_file_skip_count += 1
                     self.on_skip_file(dir_entry)
                 else:
                     self.stats_helper.walker_file_count += 1
+                    if self.stat_entries:
+                        dir_entry = self._stat_entry(dir_entry)
                     yield dir_entry
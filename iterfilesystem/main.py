@@ -1,9 +1,14 @@
 import logging
+import os
+import queue
+import threading
 import traceback
-from multiprocessing import Manager, Process
+from multiprocessing import Process
+from pathlib import Path
 from timeit import default_timer
 
 # IterFilesystem
+from iterfilesystem.checkpoint import Checkpoint, get_checkpoint_stats, set_checkpoint_stats
 from iterfilesystem.constants import (
     COLLECT_COUNT_DONE,
     COLLECT_COUNT_DURATION,
@@ -13,47 +18,148 @@ from iterfilesystem.constants import (
     FILE_SIZE
 )
 from iterfilesystem.humanize import human_filesize, human_time
-from iterfilesystem.process_bar import IterFilesystemProcessBar, TqdmPrinter
+from iterfilesystem.partitioner import SubtreeTotals
+from iterfilesystem.process_bar import IterFilesystemProcessBar
 from iterfilesystem.process_priority import set_high_priority, set_low_priority
+from iterfilesystem.shared_stats import SharedStats
 from iterfilesystem.statistic_helper import StatisticHelper
-from iterfilesystem.utils import UpdateInterval
+from iterfilesystem.utils import AdaptiveUpdateInterval, UpdateInterval
 
 log = logging.getLogger(__name__)
 
 
+class EntryQueueWalker:
+    """
+    Used as worker "scan dir" in the single walk mode:
+    Yields the dir entries that the producer thread put into the queue.
+    """
+
+    def __init__(self, *, entry_queue, stats_helper, producer_stats_helper):
+        self.entry_queue = entry_queue
+        self.stats_helper = stats_helper
+        self.producer_stats_helper = producer_stats_helper
+
+    def __iter__(self):
+        while True:
+            dir_entry = self.entry_queue.get()
+            if dir_entry is None:
+                # The producer is done
+                break
+
+            if dir_entry.is_dir(follow_symlinks=False):
+                self.stats_helper.walker_dir_count += 1
+            else:
+                self.stats_helper.walker_file_count += 1
+
+            # Skipped entries are never put into the queue, so take them from the producer:
+            self.stats_helper.walker_dir_skip_count = self.producer_stats_helper.walker_dir_skip_count
+            self.stats_helper.walker_file_skip_count = self.producer_stats_helper.walker_file_skip_count
+
+            yield dir_entry
+
+        self.stats_helper.walker_dir_skip_count = self.producer_stats_helper.walker_dir_skip_count
+        self.stats_helper.walker_file_skip_count = self.producer_stats_helper.walker_file_skip_count
+
+        # The system calls are made only by the producer:
+        self.stats_helper.walker_scandir_count = self.producer_stats_helper.walker_scandir_count
+        self.stats_helper.walker_stat_entries_count = self.producer_stats_helper.walker_stat_entries_count
+        self.stats_helper.walker_index_hit_count = self.producer_stats_helper.walker_index_hit_count
+        self.stats_helper.walker_index_miss_count = self.producer_stats_helper.walker_index_miss_count
+
+
 class IterFilesystem:
     multiprocessing_stats = None  # will be created in process()
 
-    def __init__(self, *, ScanDirClass, scan_dir_kwargs, update_interval_sec, wait=False):
+    # Only the worker loop of IterFilesystem.start() stores/restores checkpoints and builds batches:
+    supports_checkpoints = True
+    supports_batches = True
+
+    # Max. number of dir entries the single walk producer may walk ahead of the worker:
+    single_walk_queue_size = 10000
+
+    def __init__(self, *, ScanDirClass, scan_dir_kwargs, update_interval_sec, wait=False, single_walk=False,
+                 instrumentation=None, ProcessBarClass=IterFilesystemProcessBar, process_bar_kwargs=None,
+                 metrics_exporter=None, checkpoint_interval_sec=None, resume=False, checkpoint_path=None,
+                 subtree_totals_path=None, batch_size=None, batch_max_file_size=4096):
+        """
+        single_walk == False -> Two background processes walks the filesystem to collect
+            the total item count and file size for the process bars.
+        single_walk == True -> Only one producer thread walks the filesystem: It feeds the
+            worker via a bounded queue and collects item count and file size on the fly.
+        instrumentation -> optional iterfilesystem.instrumentation.Instrumentation instance
+            to measure the worker phases.
+        ProcessBarClass -> The progress sink, e.g.: NoopProcessBar or JsonLinesProcessBar
+            (see: iterfilesystem.process_bar) if there is no terminal.
+        metrics_exporter -> optional iterfilesystem.metrics.MetricsExporter instance,
+            will be updated in the update interval.
+        checkpoint_interval_sec -> Store the worker position, the statistics and the subclass state
+            (see: get_checkpoint_state()) in this interval. Needs the 'name' walker order.
+        resume == True -> Continue after the last checkpoint of the same scan (if exists)
+        subtree_totals_path -> The collect size process stores the byte and item totals of all
+            sub trees in this file, see: iterfilesystem.partitioner
+        batch_size -> Pass up to this number of consecutive small files (<= batch_max_file_size)
+            to process_dir_entries() and update the statistics only once per batch.
+        """
         self.stats_helper = StatisticHelper()
         self.ScanDirClass = ScanDirClass
         self.scan_dir_kwargs = scan_dir_kwargs
+        self.ProcessBarClass = ProcessBarClass
+        self.process_bar_kwargs = process_bar_kwargs or {}
 
         # fail fast -> check if scan directory exists, before create sub processed:
         self.worker_scan_dir = self._get_scan_dir_instance()
 
         self.update_interval_sec = update_interval_sec
+        # Not adaptive: The worker evaluates it per processed file and per hashed chunk,
+        # a big file would delay the next update by many evaluations:
         self.worker_update_interval = UpdateInterval(interval=self.update_interval_sec)
         self.wait = wait
         if wait:
             log.warning('Wait set! (Use is only intended for testing.)')
 
+        self.single_walk = single_walk
+        self.instrumentation = instrumentation
+        self.metrics_exporter = metrics_exporter
+
+        self.checkpoint_interval_sec = checkpoint_interval_sec
+        self.resume = resume
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint = None  # created in process()
+        self.checkpoint_update_interval = None
+
+        self.subtree_totals_path = subtree_totals_path
+
+        if batch_size and not self.supports_batches:
+            raise NotImplementedError(f'Batches are not supported by {self.__class__.__name__}!')
+        self.batch_size = batch_size
+        self.batch_max_file_size = batch_max_file_size
+
         # init in self.start()
         self.update_file_interval = None  # status interval for big file processing
         self.low_priority_set = None
 
+    def __getstate__(self):
+        # The collect processes need no metrics exporter (e.g.: a HTTP server can't be pickled):
+        state = self.__dict__.copy()
+        state['metrics_exporter'] = None
+        return state
+
     def _get_scan_dir_instance(self):
         self.scan_dir_kwargs.update(dict(
             stats_helper=self.stats_helper
         ))
         return self.ScanDirClass(**self.scan_dir_kwargs)
 
+    def _get_process_bars(self):
+        return self.ProcessBarClass(**self.process_bar_kwargs)
+
     def _collect_counts(self, multiprocessing_stats):
         log.info('Collect filesystem item process starts')
         set_high_priority()
         scan_dir_walker = self._get_scan_dir_instance()
+        scan_dir_walker.stat_entries = False  # Just count -> no stat() calls needed
 
-        update_interval = UpdateInterval(interval=self.update_interval_sec)
+        update_interval = AdaptiveUpdateInterval(interval=self.update_interval_sec)
         start_time = default_timer()
         for _ in scan_dir_walker:
             if update_interval:
@@ -77,19 +183,32 @@ class IterFilesystem:
         collect_file_size = 0
         scan_dir_walker = self._get_scan_dir_instance()
 
-        update_interval = UpdateInterval(interval=self.update_interval_sec)
+        if self.subtree_totals_path:
+            subtree_totals = SubtreeTotals(top_path=scan_dir_walker.top_path)
+        else:
+            subtree_totals = None
+
+        update_interval = AdaptiveUpdateInterval(interval=self.update_interval_sec)
         start_time = default_timer()
         for dir_entry in scan_dir_walker:
+            file_size = 0
             if dir_entry.is_file(follow_symlinks=True):
                 try:
-                    collect_file_size += dir_entry.stat().st_size
+                    file_size = dir_entry.stat().st_size
                 except OSError as err:
                     log.error('Get file size error: %s', err)
+                collect_file_size += file_size
+
+            if subtree_totals is not None:
+                subtree_totals.add(dir_entry.path, file_size)
 
             if update_interval:
                 multiprocessing_stats[FILE_SIZE] = collect_file_size
         duration = default_timer() - start_time
 
+        if subtree_totals is not None:
+            subtree_totals.save(self.subtree_totals_path)
+
         multiprocessing_stats[FILE_SIZE] = collect_file_size
         multiprocessing_stats[COLLECT_SIZE_DONE] = True
         multiprocessing_stats[COLLECT_SIZE_DURATION] = duration
@@ -99,66 +218,234 @@ class IterFilesystem:
             f' ({human_filesize(collect_file_size)})'
         )
 
-    def process(self):
-        with Manager() as manager:
-            self.multiprocessing_stats = manager.dict()
+    def _put_entry(self, entry_queue, item, stop_event):
+        while not stop_event.is_set():
+            try:
+                entry_queue.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            else:
+                return True
+        return False
+
+    def _collect_single_walk(self, multiprocessing_stats, entry_queue, stop_event, producer_stats_helper):
+        log.info('Single walk producer starts')
+        collect_file_size = 0
+        scan_dir_walker = self.ScanDirClass(**dict(self.scan_dir_kwargs, stats_helper=producer_stats_helper))
+        if self.instrumentation is not None:
+            # The producer makes the system calls in single walk mode:
+            self.instrumentation.instrument_walker(scan_dir_walker)
 
-            collect_size_process = None
-            collect_count_process = None
+        if self.subtree_totals_path:
+            subtree_totals = SubtreeTotals(top_path=scan_dir_walker.top_path)
+        else:
+            subtree_totals = None
 
-            try:
-                collect_count_process = Process(
-                    name='collect_count',
-                    target=self._collect_counts,
-                    args=(self.multiprocessing_stats,)
-                )
-                collect_count_process.start()
-
-                collect_size_process = Process(
-                    name='collect_size',
-                    target=self._collect_size,
-                    args=(self.multiprocessing_stats,)
-                )
-                collect_size_process.start()
-
-                set_low_priority()
-                self.low_priority_set = True
-
-                start_time = default_timer()
-                self.start()
-                duration = default_timer() - start_time
-                self.stats_helper.process_duration = duration
-
-                if self.wait:
-                    # In tests we would like to see all results
-                    log.debug('Wait for collect processes.')
-                    collect_size_process.join()
-                    collect_count_process.join()
-                else:
-                    # After process all files, the stat processes not needed:
-                    log.debug('Terminate collect processes.')
-                    collect_size_process.terminate()
-                    collect_count_process.terminate()
-            except KeyboardInterrupt:
-                self.stats_helper.abort = True
-                self.stats_helper.process_duration = default_timer() - start_time
-                log.warning('*** Abort via keyboard interrupt! ***')
-            finally:
-                if collect_size_process is not None:
-                    collect_size_process.terminate()
-
-                if collect_count_process is not None:
-                    collect_count_process.terminate()
+        update_interval = AdaptiveUpdateInterval(interval=self.update_interval_sec)
+        start_time = default_timer()
+        try:
+            for dir_entry in scan_dir_walker:
+                file_size = 0
+                if dir_entry.is_file(follow_symlinks=True):
+                    try:
+                        # Note: DirEntry caches the stat result, so the worker will not call stat() again
+                        file_size = dir_entry.stat().st_size
+                    except OSError as err:
+                        log.error('Get file size error: %s', err)
+                    collect_file_size += file_size
+
+                if subtree_totals is not None:
+                    subtree_totals.add(dir_entry.path, file_size)
+
+                if not self._put_entry(entry_queue, dir_entry, stop_event):
+                    log.info('Single walk producer stopped.')
+                    return
+
+                if update_interval:
+                    multiprocessing_stats[DIR_ITEM_COUNT] = producer_stats_helper.get_walker_dir_item_count()
+                    multiprocessing_stats[FILE_SIZE] = collect_file_size
+            duration = default_timer() - start_time
+
+            if subtree_totals is not None:
+                subtree_totals.save(self.subtree_totals_path)
+
+            multiprocessing_stats[DIR_ITEM_COUNT] = producer_stats_helper.get_walker_dir_item_count()
+            multiprocessing_stats[COLLECT_COUNT_DONE] = True
+            multiprocessing_stats[COLLECT_COUNT_DURATION] = duration
+
+            multiprocessing_stats[FILE_SIZE] = collect_file_size
+            multiprocessing_stats[COLLECT_SIZE_DONE] = True
+            multiprocessing_stats[COLLECT_SIZE_DURATION] = duration
+
+            log.info(
+                f'Single walk producer done in {human_time(duration)}'
+                f' ({producer_stats_helper.get_walker_dir_item_count()} items,'
+                f' {human_filesize(collect_file_size)})'
+            )
+        except Exception:
+            log.exception('Single walk producer error')
+        finally:
+            self._put_entry(entry_queue, None, stop_event)  # Signal the worker: no more entries
+
+    def _init_checkpoint(self):
+        if not (self.checkpoint_interval_sec or self.resume):
+            return
+
+        if self.single_walk or not self.supports_checkpoints:
+            raise NotImplementedError(f'Checkpoints are not supported by {self.__class__.__name__} in this mode!')
+
+        # The walk order must be deterministic, otherwise the checkpoints can't be used:
+        self.worker_scan_dir.check_resumable()
+
+        self.checkpoint = Checkpoint(config=self.get_checkpoint_config(), path=self.checkpoint_path)
+        if self.checkpoint_interval_sec:
+            self.checkpoint_update_interval = UpdateInterval(interval=self.checkpoint_interval_sec)
+
+    def _restore_checkpoint(self):
+        if not self.resume:
+            return
+
+        data = self.checkpoint.load()
+        if data is None:
+            log.info('No checkpoint found in %s: Start from the beginning.', self.checkpoint.path)
+            return
+
+        self.worker_scan_dir.set_resume_position(data['resume_parts'])
+        set_checkpoint_stats(self.stats_helper, data['stats'])
+        self.set_checkpoint_state(data['state'])
+        log.info(
+            'Resume after %s (%i items processed)',
+            os.sep.join(data['resume_parts']), self.stats_helper.process_files
+        )
+
+    def _save_checkpoint(self, dir_entry):
+        resume_parts = Path(dir_entry.path).relative_to(self.worker_scan_dir.top_path).parts
+        self.checkpoint.save(
+            resume_parts=resume_parts,
+            stats=get_checkpoint_stats(self.stats_helper),
+            state=self.get_checkpoint_state(),
+        )
+
+    def process(self):
+        self._init_checkpoint()
+        if self.single_walk:
+            self._process_single_walk()
+        else:
+            self._process_collect_processes()
 
         self.stats_helper.done()
+        if self.checkpoint is not None and not self.stats_helper.abort:
+            self.checkpoint.remove()
+        if self.instrumentation is not None:
+            self.instrumentation.merge_into(self.stats_helper)
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.update(self.stats_helper, done=True)
         self.done()
         return self.stats_helper
 
+    def _start_worker(self):
+        if self.instrumentation is None:
+            self.start()
+            return
+
+        # Instrument not before the collect processes are started: The wrapped methods can't be pickled.
+        self.instrumentation.instrument_iter_filesystem(self)
+        self.instrumentation.instrument_walker(self.worker_scan_dir)
+        with self.instrumentation.profile():
+            self.start()
+
+    def _process_single_walk(self):
+        # The producer is a thread in the same process -> a normal dict is enough:
+        self.multiprocessing_stats = {}
+
+        entry_queue = queue.Queue(maxsize=self.single_walk_queue_size)
+        stop_event = threading.Event()
+        producer_stats_helper = StatisticHelper()
+
+        self.worker_scan_dir = EntryQueueWalker(
+            entry_queue=entry_queue,
+            stats_helper=self.stats_helper,
+            producer_stats_helper=producer_stats_helper,
+        )
+        producer_thread = threading.Thread(
+            name='single_walk',
+            target=self._collect_single_walk,
+            args=(self.multiprocessing_stats, entry_queue, stop_event, producer_stats_helper),
+            daemon=True,
+        )
+        start_time = default_timer()
+        try:
+            producer_thread.start()
+            self._start_worker()
+            self.stats_helper.process_duration = default_timer() - start_time
+        except KeyboardInterrupt:
+            self.stats_helper.abort = True
+            self.stats_helper.process_duration = default_timer() - start_time
+            log.warning('*** Abort via keyboard interrupt! ***')
+        finally:
+            stop_event.set()
+            producer_thread.join()
+
+    def _start_collect_processes(self, collect_processes):
+        # Lock-free counters in shared memory, written by the collect processes:
+        self.multiprocessing_stats = SharedStats()
+
+        for name, target in (('collect_count', self._collect_counts), ('collect_size', self._collect_size)):
+            process = Process(
+                name=name,
+                target=target,
+                args=(self.multiprocessing_stats,)
+            )
+            process.start()
+            collect_processes.append(process)
+
+    def _finish_collect_processes(self, collect_processes):
+        if self.wait:
+            # In tests we would like to see all results
+            log.debug('Wait for collect processes.')
+            for process in collect_processes:
+                process.join()
+        else:
+            # After process all files, the stat processes not needed:
+            log.debug('Terminate collect processes.')
+            for process in collect_processes:
+                if process.name == 'collect_size' and self.subtree_totals_path:
+                    # The subtree totals are saved at the end of the walk:
+                    log.debug('Wait for the subtree totals.')
+                    process.join()
+                else:
+                    process.terminate()
+
+    def _process_collect_processes(self):
+        collect_processes = []
+        try:
+            self._start_collect_processes(collect_processes)
+
+            set_low_priority()
+            self.low_priority_set = True
+
+            start_time = default_timer()
+            self._start_worker()
+            duration = default_timer() - start_time
+            self.stats_helper.process_duration = duration
+
+            self._finish_collect_processes(collect_processes)
+        except KeyboardInterrupt:
+            self.stats_helper.abort = True
+            self.stats_helper.process_duration = default_timer() - start_time
+            log.warning('*** Abort via keyboard interrupt! ***')
+        finally:
+            for process in collect_processes:
+                process.terminate()
+
     def _update_stats_helper(self, dir_entry, process_bars):
         self.stats_helper.update_from_worker(
             scan_dir_walker=self.worker_scan_dir,
             multiprocessing_stats=self.multiprocessing_stats,
         )
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.update(self.stats_helper)
+
         if self.low_priority_set:
             if self.stats_helper.collect_dir_item_count_done and self.stats_helper.collect_file_size_done:
                 set_high_priority()
@@ -166,6 +453,38 @@ class IterFilesystem:
 
         process_bars.update(self.stats_helper, dir_entry)
 
+    def _process_error(self, dir_entry):
+        self.stats_helper.process_error_count += 1
+        self.ProcessBarClass.write_error('\n'.join([
+            '=' * 100,
+            f'Error processing dir entry: {dir_entry.path}',
+            ' -' * 50,
+            traceback.format_exc().rstrip(),
+            '=' * 100,
+        ]))
+
+    def _is_batch_entry(self, dir_entry):
+        if not dir_entry.is_file(follow_symlinks=False):
+            return False
+        try:
+            return dir_entry.stat(follow_symlinks=False).st_size <= self.batch_max_file_size
+        except OSError:
+            return False  # -> the error will be handled in process_dir_entry()
+
+    def _process_batch(self, batch, process_bars):
+        try:
+            self.process_dir_entries(dir_entries=batch, process_bars=process_bars)
+        except OSError:
+            self._process_error(batch[-1])
+
+        self.stats_helper.process_files += len(batch)
+
+        if self.worker_update_interval:
+            self._update_stats_helper(batch[-1], process_bars)
+
+        if self.checkpoint_update_interval is not None and self.checkpoint_update_interval:
+            self._save_checkpoint(batch[-1])
+
     def update(self, dir_entry, file_size, process_bars):
         self.stats_helper.update(file_size=file_size)
         if self.worker_update_interval:
@@ -178,26 +497,39 @@ class IterFilesystem:
         log.debug('Worker starts')
 
         self.update_file_interval = UpdateInterval(interval=self.update_interval_sec)
-        with IterFilesystemProcessBar() as process_bars:
+        self._restore_checkpoint()
+        with self._get_process_bars() as process_bars:
             dir_entry = None
+            batch = []
             for dir_entry in self.worker_scan_dir:
+                if self.batch_size:
+                    if self._is_batch_entry(dir_entry):
+                        batch.append(dir_entry)
+                        if len(batch) >= self.batch_size:
+                            self._process_batch(batch, process_bars)
+                            batch = []
+                        continue
+                    elif batch:
+                        # Process the entries in the walk order:
+                        self._process_batch(batch, process_bars)
+                        batch = []
+
                 try:
                     self.process_dir_entry(dir_entry=dir_entry, process_bars=process_bars)
                 except OSError:
-                    self.stats_helper.process_error_count += 1
-                    TqdmPrinter.write('\n'.join([
-                        '=' * 100,
-                        f'Error processing dir entry: {dir_entry.path}',
-                        ' -' * 50,
-                        traceback.format_exc().rstrip(),
-                        '=' * 100,
-                    ]))
+                    self._process_error(dir_entry)
 
                 self.stats_helper.process_files += 1
 
                 if self.worker_update_interval:
                     self._update_stats_helper(dir_entry, process_bars)
 
+                if self.checkpoint_update_interval is not None and self.checkpoint_update_interval:
+                    self._save_checkpoint(dir_entry)
+
+            if batch:
+                self._process_batch(batch, process_bars)
+
             if dir_entry is not None:
                 self._update_stats_helper(dir_entry, process_bars)
 
@@ -215,6 +547,58 @@ class IterFilesystem:
         )
         raise NotImplementedError()
 
+    def process_dir_entries(self, dir_entries, process_bars):
+        """
+        Process a batch of small files (only used with 'batch_size').
+        An implementation should update the statistics only once, e.g.:
+            self.update(dir_entry=dir_entries[-1], file_size=<sum of all sizes>, process_bars=process_bars)
+        and handle errors of single entries via self._process_error(dir_entry)
+        """
+        for dir_entry in dir_entries:
+            try:
+                self.process_dir_entry(dir_entry=dir_entry, process_bars=process_bars)
+            except OSError:
+                self._process_error(dir_entry)
+
+    def get_checkpoint_config(self):
+        """
+        Identifies the scan: A checkpoint is only used to resume the same scan.
+        """
+        shard_filter = self.worker_scan_dir.shard_filter
+        return (
+            self.__class__.__name__,
+            str(self.worker_scan_dir.top_path),
+            tuple(self.worker_scan_dir.skip_dir_patterns),
+            tuple(self.worker_scan_dir.skip_file_patterns),
+            None if shard_filter is None else shard_filter.get_config(),
+        )
+
+    def get_checkpoint_state(self):
+        """
+        Returns a picklable state of the subclass (e.g.: partial results) that will be stored in the checkpoint.
+        """
+        return None
+
+    def set_checkpoint_state(self, state):
+        """
+        Will be called with the stored state on resume.
+        """
+        pass
+
+    def get_shard_result(self):
+        """
+        Returns the result of one shard (must be picklable and JSON serializable),
+        see: iterfilesystem.sharding
+        """
+        return None
+
+    @classmethod
+    def merge_shard_results(cls, results):
+        """
+        The reduce step: Combine the results of all shards (sorted by shard index)
+        """
+        return None
+
     def done(self):
         """
         Will be called after all dir items are processed
@@ -0,0 +1,194 @@
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from timeit import default_timer
+
+log = logging.getLogger(__name__)
+
+PREFIX = 'iterfilesystem'
+
+# (metric name, type, help text, function to get the value from StatisticHelper)
+METRICS = (
+    ('walker_dirs', 'counter', 'Directories yielded by the walker', lambda s: s.walker_dir_count),
+    ('walker_dirs_skipped', 'counter', 'Directories skipped via patterns', lambda s: s.walker_dir_skip_count),
+    ('walker_files', 'counter', 'Files yielded by the walker', lambda s: s.walker_file_count),
+    ('walker_files_skipped', 'counter', 'Files skipped via patterns', lambda s: s.walker_file_skip_count),
+    ('walker_scandir_calls', 'counter', 'os.scandir() calls of the walker', lambda s: s.walker_scandir_count),
+    ('walker_stat_entries_calls', 'counter', 'stat() calls of the walker with stat_entries',
+     lambda s: s.walker_stat_entries_count),
+    ('processed_entries', 'counter', 'Processed filesystem items', lambda s: s.process_files),
+    ('processed_bytes', 'counter', 'Processed file content', lambda s: s.process_file_size),
+    ('process_errors', 'counter', 'Errors while processing', lambda s: s.process_error_count),
+    ('collect_entries', 'gauge', 'Filesystem items counted by the collector', lambda s: s.collect_dir_item_count),
+    ('collect_entries_done', 'gauge', '1 if all items are counted', lambda s: s.collect_dir_item_count_done),
+    ('collect_bytes', 'gauge', 'File sizes summed up by the collector', lambda s: s.collect_file_size),
+    ('collect_bytes_done', 'gauge', '1 if all file sizes are summed up', lambda s: s.collect_file_size_done),
+)
+
+
+def escape_label_value(value):
+    """
+    >>> print(escape_label_value('C:\\\\foo "bar"\\n'))
+    C:\\\\foo \\"bar\\"\\n
+    """
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+class MetricsExporter:
+    """
+    Renders the StatisticHelper counters in the OpenMetrics text format.
+    update() is called in the update interval of the worker, see: IterFilesystem._update_stats_helper()
+    The rate gauges are the average since the previous update.
+    """
+    openmetrics = True  # False -> Prometheus text format 0.0.4
+
+    def __init__(self, *, labels=None):
+        if labels:
+            self.label_text = '{%s}' % ','.join(
+                f'{name}="{escape_label_value(value)}"' for name, value in sorted(labels.items())
+            )
+        else:
+            self.label_text = ''
+
+        self.last_time = None
+        self.last_snapshot = None
+        self.entries_per_second = 0.0
+        self.bytes_per_second = 0.0
+
+    def _update_rates(self, stats_helper):
+        now = default_timer()
+        if self.last_snapshot is not None and now > self.last_time:
+            duration = now - self.last_time
+            delta = stats_helper.delta(self.last_snapshot)
+            self.entries_per_second = delta['process_files'] / duration
+            self.bytes_per_second = delta['process_file_size'] / duration
+        self.last_time = now
+        self.last_snapshot = stats_helper.snapshot()
+
+    def _sample(self, lines, name, metric_type, help_text, value, openmetrics):
+        sample_name = f'{PREFIX}_{name}'
+        if metric_type == 'counter':
+            sample_name += '_total'
+        # OpenMetrics declares the counter family without "_total", the Prometheus text format 0.0.4 with it:
+        family_name = f'{PREFIX}_{name}' if openmetrics else sample_name
+
+        lines.append(f'# TYPE {family_name} {metric_type}')
+        lines.append(f'# HELP {family_name} {help_text}')
+        if isinstance(value, float):
+            value = repr(value)
+        else:
+            value = int(value or 0)  # e.g.: None or bool
+        lines.append(f'{sample_name}{self.label_text} {value}')
+
+    def render(self, stats_helper, done=False, openmetrics=True):
+        """
+        openmetrics -> True: OpenMetrics text format, False: Prometheus text format 0.0.4
+        """
+        lines = []
+        for name, metric_type, help_text, get_value in METRICS:
+            self._sample(lines, name, metric_type, help_text, get_value(stats_helper), openmetrics)
+
+        for name, help_text, value in (
+            ('entries_per_second', 'Processed items per second', self.entries_per_second),
+            ('bytes_per_second', 'Processed bytes per second', self.bytes_per_second),
+            ('done', '1 if the scan is finished', done),
+        ):
+            self._sample(lines, name, 'gauge', help_text, value, openmetrics)
+
+        if openmetrics:
+            lines.append('# EOF')
+        lines.append('')
+        return '\n'.join(lines)
+
+    def update(self, stats_helper, done=False):
+        self._update_rates(stats_helper)
+        self.export(self.render(stats_helper, done=done, openmetrics=self.openmetrics))
+
+    def export(self, text):
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
+
+class TextfileMetricsExporter(MetricsExporter):
+    """
+    Write the metrics into a file, e.g.: for the textfile collector of the Prometheus node exporter.
+    The file is replaced atomically, so a reader never sees a half written file.
+    The textfile collector only parses the Prometheus text format 0.0.4.
+    """
+    openmetrics = False
+
+    def __init__(self, *, path, **kwargs):
+        super().__init__(**kwargs)
+        self.path = Path(path)
+
+    def export(self, text):
+        temp_path = self.path.with_name(f'.{self.path.name}.{os.getpid()}.tmp')
+        try:
+            temp_path.write_text(text, encoding='UTF-8')
+            os.replace(temp_path, self.path)
+        except OSError as err:
+            log.error('Can not write metrics file: %s', err)
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+
+        if 'application/openmetrics-text' in self.headers.get('Accept', ''):
+            body = self.server.openmetrics_body
+            content_type = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+        else:
+            body = self.server.text_body
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        log.debug('metrics request: %s', format % args)
+
+
+class HttpMetricsExporter(MetricsExporter):
+    """
+    Serve the metrics via HTTP in a background thread, only on localhost by default.
+    The worker only replaces the pre rendered responses, so a slow scraper never blocks the worker.
+    The format is selected via the Accept header: OpenMetrics or the Prometheus text format 0.0.4
+    port=0 -> use a free port, see: self.port
+    """
+
+    def __init__(self, *, host='127.0.0.1', port=9808, **kwargs):
+        super().__init__(**kwargs)
+        self.server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+        self.server.openmetrics_body = b'# EOF\n'
+        self.server.text_body = b''
+        self.host, self.port = self.server.server_address[:2]
+
+        self.server_thread = threading.Thread(
+            name='metrics_http_server', target=self.server.serve_forever, daemon=True
+        )
+        self.server_thread.start()
+        log.info('Serve metrics on: http://%s:%i/metrics', self.host, self.port)
+
+    def update(self, stats_helper, done=False):
+        self._update_rates(stats_helper)
+        self.server.openmetrics_body = self.render(stats_helper, done=done, openmetrics=True).encode('UTF-8')
+        self.server.text_body = self.render(stats_helper, done=done, openmetrics=False).encode('UTF-8')
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.server_thread.join()
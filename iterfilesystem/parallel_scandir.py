@@ -0,0 +1,130 @@
+import logging
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# IterFilesystem
+from iterfilesystem.dir_entry import DirEntryRecord
+from iterfilesystem.iter_scandir import ScandirWalker
+
+log = logging.getLogger(__name__)
+
+
+class ParallelScandirWalker(ScandirWalker):
+    """
+    Keeps up to 'max_workers' os.scandir() calls in flight via a thread pool.
+    Useful for high-latency storage like NFS, CephFS or SMB.
+
+    The statistics are only updated in the iterating thread, so no locking is needed.
+
+    ordered == False -> Yield the dir entries as soon as the listing is done.
+        The pending directories are kept in one shared LIFO work queue,
+        so that the idle threads always take the next directory.
+    ordered == True -> Yield the dir entries in the same order as ScandirWalker
+        The listings of the sub directories are prefetched.
+
+    'order' is only the order of the entries of one directory: Every listing is read completely
+    in a worker thread, also in 'native' order. So there is no memory budget via 'max_pending_entries',
+    use 'max_prefetch' and 'max_workers' to limit the number of listings in memory.
+    """
+
+    def __init__(self, *, max_workers=8, ordered=False, max_prefetch=1000, **kwargs):
+        super().__init__(**kwargs)
+        if self.shard_filter is not None:
+            raise NotImplementedError(f'{self.__class__.__name__} can not walk a shard!')
+        if self.max_pending_entries is not None:
+            raise NotImplementedError(f'{self.__class__.__name__} has no max_pending_entries budget!')
+
+        self.max_workers = max_workers
+        self.ordered = ordered
+        self.max_prefetch = max_prefetch
+
+    def check_resumable(self):
+        raise NotImplementedError(f'{self.__class__.__name__} can not resume a walk!')
+
+    def _list_dir(self, path):
+        """
+        Called in worker threads: is_dir() may need a stat() syscall
+        if the filesystem doesn't return the entry type.
+        """
+        return [
+            (dir_entry, dir_entry.is_dir(follow_symlinks=False))
+            for dir_entry in self._read_dir(path)
+        ]
+
+    def _filter(self, dir_entry, is_dir):
+        """
+        Update the statistics and return True if the given dir entry should be yielded.
+        """
+        if is_dir:
+            if self.fnmatches(dir_entry.name, self.skip_dir_patterns):
+                self.stats_helper.walker_dir_skip_count += 1
+                self.on_skip_dir(dir_entry)
+                return False
+            self.stats_helper.walker_dir_count += 1
+        else:
+            if self.fnmatches(dir_entry.name, self.skip_file_patterns):
+                self.stats_helper.walker_file_skip_count += 1
+                self.on_skip_file(dir_entry)
+                return False
+            self.stats_helper.walker_file_count += 1
+        return True
+
+    def _yield_entry(self, dir_entry, is_dir):
+        if self.stat_entries:
+            if is_dir:
+                return DirEntryRecord.from_dir_entry(dir_entry)
+            return self._stat_entry(dir_entry)
+        return dir_entry
+
+    def __iter__(self):
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='scandir') as executor:
+            if self.ordered:
+                yield from self._iter_ordered(executor)
+            else:
+                yield from self._iter_unordered(executor)
+
+    def _iter_unordered(self, executor):
+        pending = deque([self.top_path])
+        in_flight = set()
+        while pending or in_flight:
+            while pending and len(in_flight) < self.max_workers:
+                in_flight.add(executor.submit(self._list_dir, pending.pop()))
+
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                self.stats_helper.walker_scandir_count += 1
+                for dir_entry, is_dir in future.result():
+                    if self._filter(dir_entry, is_dir):
+                        yield self._yield_entry(dir_entry, is_dir)
+                        if is_dir:
+                            pending.append(dir_entry.path)
+
+    def _iter_ordered(self, executor):
+        prefetched = {}  # path -> Future
+
+        def get_listing(path):
+            future = prefetched.pop(path, None)
+            if future is None:
+                future = executor.submit(self._list_dir, path)
+            listing = future.result()
+            self.stats_helper.walker_scandir_count += 1
+
+            # Prefetch the sub directories, in the order we will need them:
+            for dir_entry, is_dir in listing:
+                if len(prefetched) >= self.max_prefetch:
+                    break
+                if is_dir and not self.fnmatches(dir_entry.name, self.skip_dir_patterns):
+                    prefetched[dir_entry.path] = executor.submit(self._list_dir, dir_entry.path)
+
+            return iter(listing)
+
+        stack = [get_listing(self.top_path)]
+        while stack:
+            for dir_entry, is_dir in stack[-1]:
+                if self._filter(dir_entry, is_dir):
+                    yield self._yield_entry(dir_entry, is_dir)
+                    if is_dir:
+                        stack.append(get_listing(dir_entry.path))
+                        break
+            else:
+                stack.pop()
@@ -0,0 +1,181 @@
+import heapq
+import json
+import logging
+import os
+from pathlib import Path
+
+# IterFilesystem
+from iterfilesystem.humanize import human_filesize
+from iterfilesystem.utils import get_private_temp_path
+
+log = logging.getLogger(__name__)
+
+# The cost of one filesystem item (scandir, stat, open...) in bytes:
+ITEM_COST = 64 * 1024
+
+
+def get_subtree_totals_path(top_path):
+    """
+    The default path in the persist temp path, e.g.: to use the totals of the last scan for the next one.
+    The directory is created only accessible by us.
+    """
+    top_path = Path(top_path).expanduser().resolve()
+    persist_path = get_private_temp_path(seed=f'subtree totals {top_path}')
+    return Path(persist_path, 'subtree_totals.json')
+
+
+class SubtreeTotals:
+    """
+    Byte and item totals of all sub trees in a prefix tree.
+    A node is a list: [bytes, items, children] and children is a dict: name -> node
+    or None for a file. Only files >= 'file_unit_size' get a own node (they can be a work unit),
+    all other files are only summed up in the nodes of the parent directories.
+
+    >>> totals = SubtreeTotals(top_path='/data', max_depth=1, file_unit_size=100)
+    >>> totals.add('/data/video/big.mkv', 1000)
+    >>> totals.add('/data/video/small.txt', 10)
+    >>> totals.add('/data/video/sub/deep.txt', 10)
+    >>> totals.add('/data/video/sub', 0)
+    >>> totals.add('/data/video', 0)
+    >>> totals.root
+    [1020, 5, {'video': [1020, 4, {}]}]
+    >>> totals.max_depth = 2
+    >>> totals.add('/data/video/big2.mkv', 2000)
+    >>> totals.root[2]['video']
+    [3020, 5, {'big2.mkv': [2000, 1, None]}]
+    """
+
+    def __init__(self, *, top_path, max_depth=8, file_unit_size=16 * 1024 * 1024):
+        self.top_path = str(top_path)
+        self.prefix_len = len(os.path.join(self.top_path, ''))
+        self.max_depth = max_depth
+        self.file_unit_size = file_unit_size
+        self.root = [0, 0, {}]
+
+    def add(self, path, size):
+        """
+        Add one filesystem item, called for every dir entry in the walk.
+        """
+        parts = path[self.prefix_len:].split(os.sep)
+
+        node = self.root
+        node[0] += size
+        node[1] += 1
+        dir_parts = parts[:-1]
+        for name in dir_parts[:self.max_depth]:
+            node = node[2].setdefault(name, [0, 0, {}])
+            node[0] += size
+            node[1] += 1
+
+        if size >= self.file_unit_size and len(dir_parts) < self.max_depth:
+            node[2][parts[-1]] = [size, 1, None]
+
+    def save(self, path):
+        data = dict(
+            top_path=self.top_path,
+            max_depth=self.max_depth,
+            file_unit_size=self.file_unit_size,
+            root=self.root,
+        )
+        path = Path(path)
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        temp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+        temp_path.write_text(json.dumps(data, separators=(',', ':')), encoding='UTF-8')
+        os.replace(temp_path, path)
+        log.info('Subtree totals saved to: %s', path)
+
+    @classmethod
+    def load(cls, path):
+        data = json.loads(Path(path).read_text(encoding='UTF-8'))
+        subtree_totals = cls(
+            top_path=data['top_path'],
+            max_depth=data['max_depth'],
+            file_unit_size=data['file_unit_size'],
+        )
+        subtree_totals.root = data['root']
+        return subtree_totals
+
+
+def create_shard_plan(subtree_totals, *, shard_count, item_cost=ITEM_COST, units_per_shard=4):
+    """
+    Split the tree into work units of similar cost and assign them to the shards,
+    so that no shard gets e.g. a huge video directory alone and the others finish early.
+
+    The largest unit is split into the sub directories and big files, until all units are
+    smaller than total cost / (shard_count * units_per_shard) or can't be split.
+    Then the units are assigned via "longest processing time first" to the shard with the lowest cost.
+
+    The small files of a split directory are not in the plan: They are assigned via the hash
+    of the ShardFilter, so their cost is spread evenly over all shards.
+
+    Returns the plan for the ScandirWalker argument 'shard_plan'.
+
+    >>> totals = SubtreeTotals(top_path='/data', file_unit_size=100)
+    >>> for no in range(4):
+    ...     totals.add(f'/data/video/big{no}.mkv', 1000)
+    >>> for no in range(4):
+    ...     totals.add(f'/data/text/small{no}.txt', 10)
+    >>> plan = create_shard_plan(totals, shard_count=2, item_cost=0, units_per_shard=1)
+    >>> for parts, shard_index in plan.items():
+    ...     print('/'.join(parts), shard_index)
+    video/big0.mkv 0
+    video/big1.mkv 1
+    video/big2.mkv 0
+    video/big3.mkv 1
+    text 0
+    """
+    def get_cost(node):
+        return node[0] + node[1] * item_cost
+
+    root = subtree_totals.root
+    max_unit_cost = get_cost(root) / (shard_count * units_per_shard)
+
+    # heapq is a min heap -> use the negative cost. The parts are the tie breaker -> stable plan
+    heap = [(-get_cost(node), (name,), node) for name, node in root[2].items()]
+    heapq.heapify(heap)
+    unplanned_cost = get_cost(root) - sum(-item[0] for item in heap)
+
+    units = []
+    while heap:
+        neg_cost, parts, node = heapq.heappop(heap)
+        if not node[2]:
+            # A file or a directory without recorded content -> can't be split
+            units.append((-neg_cost, parts))
+            continue
+
+        if -neg_cost <= max_unit_cost:
+            # The largest unit is small enough -> all others are, too
+            units.append((-neg_cost, parts))
+            units.extend((-item[0], item[1]) for item in heap)
+            break
+
+        children_cost = 0
+        for name, child in node[2].items():
+            child_cost = get_cost(child)
+            children_cost += child_cost
+            heapq.heappush(heap, (-child_cost, parts + (name,), child))
+        unplanned_cost += -neg_cost - children_cost
+
+    # The unplanned items are spread evenly via the hash:
+    shard_costs = [(unplanned_cost / shard_count, shard_index) for shard_index in range(shard_count)]
+    heapq.heapify(shard_costs)
+
+    plan = {}
+    for cost, parts in sorted(units, key=lambda unit: (-unit[0], unit[1])):
+        shard_cost, shard_index = heapq.heappop(shard_costs)
+        plan[parts] = shard_index
+        heapq.heappush(shard_costs, (shard_cost + cost, shard_index))
+
+    for shard_cost, shard_index in sorted(shard_costs, key=lambda item: item[1]):
+        log.info('Shard %i: estimated cost %s', shard_index, human_filesize(shard_cost))
+    return plan
+
+
+def write_shard_plan(path, plan):
+    data = [dict(parts=list(parts), shard=shard_index) for parts, shard_index in plan.items()]
+    Path(path).write_text(json.dumps(data, indent=1), encoding='UTF-8')
+
+
+def read_shard_plan(path):
+    data = json.loads(Path(path).read_text(encoding='UTF-8'))
+    return {tuple(item['parts']): item['shard'] for item in data}
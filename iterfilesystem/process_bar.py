@@ -1,11 +1,37 @@
+import json
+import logging
 import sys
-from pathlib import Path
 from statistics import median_low
-from textwrap import shorten
+from timeit import default_timer
 
 # https://github.com/tqdm/tqdm
 from tqdm import tqdm
 
+# IterFilesystem
+from iterfilesystem.utils import shorten
+
+log = logging.getLogger(__name__)
+
+
+def get_progress_percent(stats_helper):
+    """
+    The "average" progress of item count and file size.
+    """
+    def percent(current, total):
+        if total == 0:
+            return 0
+        return current / total * 100
+
+    count_percent = percent(
+        current=stats_helper.get_walker_dir_item_count(),
+        total=stats_helper.collect_dir_item_count
+    )
+    size_percent = percent(
+        current=stats_helper.process_file_size,
+        total=stats_helper.collect_file_size
+    )
+    return median_low([count_percent, size_percent])
+
 
 class TqdmPrinter:
     @classmethod
@@ -66,21 +92,7 @@ class WorkerTqdm(tqdm):
         )
 
     def update(self, stats_helper, dir_entry):
-        def percent(current, total):
-            if total == 0:
-                return 0
-            return current / total * 100
-
-        count_percent = percent(
-            current=stats_helper.get_walker_dir_item_count(),
-            total=stats_helper.collect_dir_item_count
-        )
-        size_percent = percent(
-            current=stats_helper.process_file_size,
-            total=stats_helper.collect_file_size
-        )
-
-        self.n = median_low([count_percent, size_percent])
+        self.n = get_progress_percent(stats_helper)
         self.refresh(nolock=True)
 
 
@@ -101,8 +113,9 @@ class FileNameTqdm(tqdm):
             self.path_width = self.ncols - 10
 
     def update(self, stats_helper, dir_entry):
+        # The top path is resolved, so dir_entry.path is absolute: No need for system calls here
         file_path = shorten(
-            str(Path(dir_entry).resolve()),
+            dir_entry.path,
             width=self.path_width,
             placeholder='...'
         )
@@ -128,9 +141,17 @@ class FileProcessingTqdm(tqdm):
 
 
 class IterFilesystemProcessBar:
+    """
+    The default progress sink: tqdm process bars
+    """
+
     def __init__(self):
         tqdm.monitor_interval = 0
 
+    @staticmethod
+    def write_error(text):
+        TqdmPrinter.write(text)
+
     def __enter__(self):
         self.bars = (
             DirEntryTqdm(position=0),
@@ -151,3 +172,103 @@ class IterFilesystemProcessBar:
         self.file_bar.close()
 
         print('\n')
+
+
+class NoopFileBar:
+    """
+    Has the used API of FileProcessingTqdm, but displays nothing.
+    """
+    desc = ''
+
+    def reset(self, total=None):
+        pass
+
+    def update(self, n=1):
+        pass
+
+    def close(self):
+        pass
+
+
+class NoopProcessBar:
+    """
+    Progress sink without any output, e.g.: for cron jobs
+    """
+
+    def __enter__(self):
+        self.file_bar = NoopFileBar()
+        return self
+
+    def update(self, stats_helper, dir_entry):
+        pass
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    @staticmethod
+    def write_error(text):
+        log.error(text)
+
+
+class JsonLinesProcessBar(NoopProcessBar):
+    """
+    Headless progress sink: Writes one JSON object per line on every update interval,
+    e.g.: for Kubernetes jobs or log collectors. The rates are averages since start.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream  # None -> sys.stderr
+
+    def __enter__(self):
+        self.start_time = default_timer()
+        self.last_record = None
+        return super().__enter__()
+
+    def write(self, record):
+        stream = self.stream or sys.stderr
+        stream.write(json.dumps(record) + '\n')
+        stream.flush()
+
+    def update(self, stats_helper, dir_entry):
+        elapsed = default_timer() - self.start_time
+        entries = stats_helper.get_walker_dir_item_count()
+        processed_bytes = stats_helper.process_file_size
+        progress = get_progress_percent(stats_helper)
+
+        if progress and elapsed:
+            eta = elapsed * (100 - progress) / progress
+        else:
+            eta = None
+
+        self.last_record = dict(
+            event='progress',
+            elapsed=round(elapsed, 3),
+            entries=entries,
+            total_entries=max(stats_helper.collect_dir_item_count, entries),
+            total_entries_done=stats_helper.collect_dir_item_count_done,
+            bytes=processed_bytes,
+            total_bytes=max(stats_helper.collect_file_size, processed_bytes),
+            total_bytes_done=stats_helper.collect_file_size_done,
+            entries_per_sec=round(entries / elapsed, 1) if elapsed else None,
+            bytes_per_sec=round(processed_bytes / elapsed, 1) if elapsed else None,
+            progress=round(progress, 2),
+            eta=round(eta, 1) if eta is not None else None,
+            errors=stats_helper.process_error_count,
+            current=dir_entry.path,
+        )
+        self.write(self.last_record)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.last_record is not None:
+            self.write(dict(
+                self.last_record,
+                event='done' if exc_type is None else 'abort',
+                elapsed=round(default_timer() - self.start_time, 3),
+            ))
+
+
+PROCESS_BAR_CLASSES = {
+    'tqdm': IterFilesystemProcessBar,
+    'none': NoopProcessBar,
+    'json': JsonLinesProcessBar,
+}
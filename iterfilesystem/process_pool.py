@@ -0,0 +1,86 @@
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# IterFilesystem
+from iterfilesystem.main import IterFilesystem
+
+log = logging.getLogger(__name__)
+
+
+class ProcessPoolIterFilesystem(IterFilesystem):
+    """
+    Process the dir entries in a pool of worker processes, e.g.: for CPU heavy work.
+
+    os.DirEntry instances can't be pickled, so the workers get only the path.
+    The results are merged in the main process in the same order as the walker yields the entries.
+
+    The worker function must be a classmethod, so the class must be importable
+    from the worker processes (e.g.: defined on module level).
+    """
+    supports_checkpoints = False
+    supports_batches = False
+
+    def __init__(self, *, workers=None, max_pending=None, **kwargs):
+        super().__init__(**kwargs)
+        self.workers = workers or os.cpu_count()
+
+        # Limit the submitted, but not merged entries, to keep memory usage bounded:
+        self.max_pending = max_pending or self.workers * 4
+
+    def _merge_next(self, pending, process_bars):
+        dir_entry, future = pending.popleft()
+        try:
+            result, file_size = future.result()
+        except OSError:
+            self._process_error(dir_entry)
+        else:
+            self.merge_result(dir_entry=dir_entry, result=result)
+            self.stats_helper.update(file_size=file_size)
+
+        self.stats_helper.process_files += 1
+
+        if self.worker_update_interval:
+            self._update_stats_helper(dir_entry, process_bars)
+
+        return dir_entry
+
+    def start(self):
+        log.debug('Worker starts with %i processes', self.workers)
+
+        with self._get_process_bars() as process_bars:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                pending = deque()
+                dir_entry = None
+                for dir_entry in self.worker_scan_dir:
+                    future = executor.submit(type(self).process_path, dir_entry.path)
+                    pending.append((dir_entry, future))
+                    if len(pending) >= self.max_pending:
+                        self._merge_next(pending, process_bars)
+
+                while pending:
+                    self._merge_next(pending, process_bars)
+
+            if dir_entry is not None:
+                self._update_stats_helper(dir_entry, process_bars)
+
+        log.debug('Worker done.')
+
+    ##############################################################################################
+    # methods to overwrite:
+
+    @classmethod
+    def process_path(cls, path):
+        """
+        Will be called in the worker processes.
+        Must return a tuple of (result, processed file size)
+        """
+        raise NotImplementedError()
+
+    def merge_result(self, dir_entry, result):
+        """
+        Will be called in the main process with the result of process_path()
+        e.g.: combine the per file digests.
+        """
+        pass
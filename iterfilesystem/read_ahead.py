@@ -0,0 +1,193 @@
+import logging
+import os
+import queue
+import threading
+
+log = logging.getLogger(__name__)
+
+HAS_FADVISE = hasattr(os, 'posix_fadvise')
+
+
+class ReadAheadItem:
+    __slots__ = ('dir_entry', 'chunks', 'free_buffers', 'cancel', 'done')
+
+    def __init__(self, dir_entry, free_buffers=None):
+        self.dir_entry = dir_entry
+        self.free_buffers = free_buffers  # The buffer pool of the reader thread
+        self.chunks = None if free_buffers is None else queue.Queue()
+        self.cancel = False  # Set by the consumer -> stop reading
+        self.done = False  # All chunks are consumed
+
+
+class ReadAheadWalker:
+    """
+    Wraps a walker and reads the files in advance in a few reader threads, so that the disk
+    reads overlap with the processing (e.g.: hashing) in the worker thread.
+
+    The dir entries are yielded in the same order as the wrapped walker yields them.
+    The content of the current file is available via read_chunks().
+
+    Every reader thread has a own pool of 'buffers_per_worker' reusable buffers:
+    The memory usage is bounded and a reader can't block the file the consumer waits for.
+
+    All other attributes are taken from the wrapped walker (e.g.: the stats_helper).
+    """
+
+    def __init__(self, walker, *, workers=2, buffer_size=1024 * 1024, buffers_per_worker=4, max_pending=1000):
+        self.walker = walker
+        self.workers = workers
+        self.buffer_size = buffer_size
+        self.buffers_per_worker = buffers_per_worker
+        self.max_pending = max_pending
+        self.current_item = None
+
+    def __getattr__(self, name):
+        return getattr(self.walker, name)
+
+    def __iter__(self):
+        self.entries = iter(self.walker)
+        self.entries_lock = threading.Lock()
+        self.entries_done = False
+        self.items = queue.Queue(maxsize=self.max_pending)
+        self.stop_event = threading.Event()
+
+        threads = []
+        for no in range(self.workers):
+            free_buffers = queue.Queue()
+            for _ in range(self.buffers_per_worker):
+                free_buffers.put(memoryview(bytearray(self.buffer_size)))
+
+            thread = threading.Thread(
+                name=f'read_ahead_{no}', target=self._reader, args=(free_buffers,), daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+
+        try:
+            while True:
+                item = self.items.get()
+                if item is None:
+                    break
+                if isinstance(item, BaseException):
+                    raise item  # e.g.: error in the wrapped walker
+
+                self.current_item = item
+                yield item.dir_entry
+                self._skip_chunks(item)
+        finally:
+            self.current_item = None
+            self.stop_event.set()
+            for thread in threads:
+                thread.join()
+
+    def _put(self, target_queue, item):
+        """
+        Put into the queue, but don't block forever if the consumer stopped.
+        """
+        while not self.stop_event.is_set():
+            try:
+                target_queue.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            else:
+                return True
+        return False
+
+    def _reader(self, free_buffers):
+        while not self.stop_event.is_set():
+            with self.entries_lock:
+                # The items must be queued in the walker order -> take the next entry and queue it atomically
+                if self.entries_done:
+                    return
+                try:
+                    dir_entry = next(self.entries)
+                except StopIteration:
+                    self.entries_done = True
+                    self._put(self.items, None)
+                    return
+                except BaseException as err:
+                    self.entries_done = True
+                    self._put(self.items, err)
+                    return
+
+                if dir_entry.is_file(follow_symlinks=False):
+                    item = ReadAheadItem(dir_entry, free_buffers)
+                else:
+                    item = ReadAheadItem(dir_entry)
+
+                if not self._put(self.items, item):
+                    return
+
+            if item.chunks is not None:
+                self._read_file(item, free_buffers)
+
+    def _get_buffer(self, free_buffers):
+        while not self.stop_event.is_set():
+            try:
+                return free_buffers.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    def _read_file(self, item, free_buffers):
+        try:
+            with open(item.dir_entry.path, 'rb', buffering=0) as f:
+                if HAS_FADVISE:
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+
+                while not item.cancel:
+                    buffer = self._get_buffer(free_buffers)
+                    if buffer is None:
+                        return  # stopped
+
+                    size = f.readinto(buffer)
+                    if not size:
+                        free_buffers.put(buffer)
+                        break
+                    item.chunks.put((buffer, size))
+        except OSError as err:
+            item.chunks.put(err)
+        item.chunks.put(None)
+
+    def read_chunks(self, dir_entry):
+        """
+        Yields the content of the current file as memoryview slices of the pool buffers.
+        A chunk is only valid until the next one is requested.
+        Raises the OSError of the reader thread, e.g.: PermissionError
+        """
+        item = self.current_item
+        assert item is not None and item.dir_entry is dir_entry, 'Only the current file can be read!'
+        if item.chunks is None:
+            raise IsADirectoryError(f'Not a file: {dir_entry.path}')
+
+        while not item.done:
+            chunk = item.chunks.get()
+            if chunk is None:
+                item.done = True
+                break
+            if isinstance(chunk, OSError):
+                item.done = True  # The reader stops after a error
+                raise chunk
+
+            buffer, size = chunk
+            try:
+                yield buffer[:size]
+            finally:
+                item.free_buffers.put(buffer)
+
+    def _skip_chunks(self, item):
+        """
+        Return the buffers of not consumed chunks, e.g.: the hash cache was used or a error happened.
+        """
+        if item.chunks is None or item.done:
+            return
+
+        item.cancel = True
+        while True:
+            chunk = item.chunks.get()
+            if chunk is None:
+                break
+            if not isinstance(chunk, OSError):
+                item.free_buffers.put(chunk[0])
+        item.done = True
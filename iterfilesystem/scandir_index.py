@@ -0,0 +1,142 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+# IterFilesystem
+from iterfilesystem.dir_entry import DirEntryRecord
+from iterfilesystem.iter_scandir import ScandirWalker
+from iterfilesystem.utils import get_private_temp_path
+
+log = logging.getLogger(__name__)
+
+IS_DIR = 1
+IS_FILE = 2
+IS_SYMLINK = 4
+
+
+def get_entry_flags(dir_entry):
+    flags = 0
+    if dir_entry.is_dir(follow_symlinks=False):
+        flags |= IS_DIR
+    if dir_entry.is_file(follow_symlinks=False):
+        flags |= IS_FILE
+    if dir_entry.is_symlink():
+        flags |= IS_SYMLINK
+    return flags
+
+
+class IndexedScandirWalker(ScandirWalker):
+    """
+    Stores the listing of every directory together with the directory mtime/ctime in a SQLite index.
+    On the next run the os.scandir() call is skipped for all unchanged directories:
+    The children are replayed from the index as DirEntryRecord instances.
+
+    Only the directory listings are stored, not the stat results of the files:
+    A changed file content doesn't change the directory.
+    The ctime is compared, too: It changes also on permission changes.
+    """
+    # Directories changed in the last seconds are not stored, because a
+    # following change may not change the mtime (timestamp granularity):
+    racy_interval_sec = 2
+
+    commit_interval = 1000  # commit after x changed directories
+
+    def __init__(self, *, index_path=None, **kwargs):
+        super().__init__(**kwargs)
+        if index_path is None:
+            # A index planted by another user could hide files -> only use our own directory:
+            persist_path = get_private_temp_path(seed=str(self.top_path))
+            index_path = Path(persist_path, 'scandir_index.sqlite3')
+        self.index_path = Path(index_path)
+
+        # Will be created in __iter__(), because a connection can't be shared between processes:
+        self.connection = None
+        self.uncommitted = 0
+
+    def __iter__(self):
+        log.info('Use scandir index: %s', self.index_path)
+        self.connection = sqlite3.connect(str(self.index_path), timeout=30)
+        try:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS directories ('
+                ' path TEXT PRIMARY KEY, mtime_ns INTEGER, ctime_ns INTEGER, entries TEXT'
+                ')'
+            )
+            yield from super().__iter__()
+        finally:
+            self._commit()
+            self.connection.close()
+            self.connection = None
+
+    def _commit(self):
+        try:
+            self.connection.commit()
+        except sqlite3.Error as err:
+            log.warning('Scandir index commit error: %s', err)
+        self.uncommitted = 0
+
+    def _scandir(self, path):
+        path = os.fspath(path)
+        try:
+            dir_stat = os.stat(path)
+        except OSError as err:
+            log.error('stat error: %s', err)
+            return super()._scandir(path)
+
+        row = self.connection.execute(
+            'SELECT mtime_ns, ctime_ns, entries FROM directories WHERE path=?', (path,)
+        ).fetchone()
+        if row is not None and row[0] == dir_stat.st_mtime_ns and row[1] == dir_stat.st_ctime_ns:
+            self.stats_helper.walker_index_hit_count += 1
+            return self._order_entries([
+                DirEntryRecord(
+                    name=name,
+                    path=os.path.join(path, name),
+                    inode=inode,
+                    is_dir=bool(flags & IS_DIR),
+                    is_file=bool(flags & IS_FILE),
+                    is_symlink=bool(flags & IS_SYMLINK),
+                )
+                for name, inode, flags in json.loads(row[2])
+            ])
+
+        self.stats_helper.walker_index_miss_count += 1
+        dir_entries = list(super()._scandir(path))  # 'native' order returns a iterator
+        entries = [
+            (dir_entry.name, dir_entry.inode(), get_entry_flags(dir_entry))
+            for dir_entry in dir_entries
+        ]
+        try:
+            if row is not None:
+                self._prune(path, old_entries=json.loads(row[2]), new_entries=entries)
+
+            if time.time() - dir_stat.st_mtime > self.racy_interval_sec:
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO directories VALUES (?, ?, ?, ?)',
+                    (path, dir_stat.st_mtime_ns, dir_stat.st_ctime_ns, json.dumps(entries))
+                )
+                self.uncommitted += 1
+                if self.uncommitted >= self.commit_interval:
+                    self._commit()
+        except sqlite3.Error as err:
+            # e.g.: "database is locked" if the collect processes updates the index, too.
+            log.warning('Scandir index update error: %s', err)
+
+        return dir_entries
+
+    def _prune(self, path, old_entries, new_entries):
+        """
+        Remove the index entries of deleted sub directories
+        """
+        new_dirs = {name for name, inode, flags in new_entries if flags & IS_DIR}
+        for name, inode, flags in old_entries:
+            if flags & IS_DIR and name not in new_dirs:
+                sub_path = os.path.join(path, name)
+                self.connection.execute(
+                    'DELETE FROM directories WHERE path=? OR (path>=? AND path<?)',
+                    (sub_path, sub_path + os.sep, sub_path + chr(ord(os.sep) + 1))
+                )
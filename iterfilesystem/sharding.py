@@ -0,0 +1,203 @@
+import json
+import logging
+import multiprocessing
+import queue
+import zlib
+from pathlib import Path
+
+# IterFilesystem
+from iterfilesystem.process_bar import NoopProcessBar
+from iterfilesystem.statistic_helper import StatisticHelper
+
+log = logging.getLogger(__name__)
+
+
+def get_shard_index(parts, shard_count):
+    """
+    Stable hash of the relative path parts: Same result on every machine and every Python run.
+
+    >>> get_shard_index(('foo', 'bar'), shard_count=4)
+    2
+    >>> [get_shard_index((name,), shard_count=3) for name in ('one', 'two', 'three')]
+    [2, 0, 2]
+    """
+    key = '/'.join(parts).encode('UTF-8', errors='surrogateescape')
+    return zlib.crc32(key) % shard_count
+
+
+class ShardFilter:
+    """
+    Assigns every entry of the tree to exactly one of 'shard_count' shards.
+    The ScandirWalker yields only the entries of 'shard_index'.
+
+    Without a plan, a top level entry and the whole sub tree belongs to one shard,
+    selected by a stable hash of the name. So all nodes agree without any communication.
+
+    The plan maps relative path parts to a shard index, e.g.: a size balanced plan.
+    The parent directories of the plan entries are "split": They are walked by all shards,
+    but yielded only by one. Entries that are not in the plan are assigned via the hash.
+
+    >>> shard_filter = ShardFilter(shard_count=2, shard_index=1, plan={('big', 'a'): 0, ('big', 'b'): 1})
+    >>> shard_filter.check(('big',))  # yielded only by shard 1, but walked by both
+    (True, True)
+    >>> shard_filter.check(('big', 'b'))
+    (True, False)
+    >>> shard_filter.check(('big', 'a'))
+    (False, False)
+    """
+
+    def __init__(self, *, shard_count, shard_index, plan=None):
+        if shard_count < 1:
+            raise ValueError(f'Invalid shard count: {shard_count!r}')
+        if not 0 <= shard_index < shard_count:
+            raise ValueError(f'Shard index {shard_index!r} not in range 0-{shard_count - 1}')
+
+        self.shard_count = shard_count
+        self.shard_index = shard_index
+
+        self.plan = {}
+        for parts, plan_shard_index in (plan or {}).items():
+            if not 0 <= plan_shard_index < shard_count:
+                raise ValueError(f'Shard index {plan_shard_index!r} of {parts!r} not in range 0-{shard_count - 1}')
+            self.plan[tuple(parts)] = plan_shard_index
+
+        self.split_parts = {parts[:pos] for parts in self.plan for pos in range(1, len(parts))}
+
+    def get_config(self):
+        return (self.shard_count, self.shard_index, tuple(sorted(self.plan.items())))
+
+    def check(self, parts):
+        """
+        Returns (yield entry, walk into the directory with further checks) for the relative path parts.
+        """
+        shard_index = self.plan.get(parts)
+        if shard_index is None:
+            shard_index = get_shard_index(parts, self.shard_count)
+        return shard_index == self.shard_index, parts in self.split_parts
+
+
+def merge_statistics(stats_helpers):
+    """
+    The reduce step for the StatisticHelper of all shards, see: StatisticHelper.merge()
+    Other values (e.g.: the hash of CalcFilesystemSHA512) are not merged, see: IterFilesystem.merge_shard_results()
+
+    >>> shard1, shard2 = StatisticHelper(), StatisticHelper()
+    >>> shard1.process_files, shard2.process_files = 10, 5
+    >>> shard1.process_duration, shard2.process_duration = 1.5, 2.5
+    >>> shard1.collect_file_size_done = True
+    >>> shard1.done(); shard2.done()
+    >>> merged = merge_statistics([shard1, shard2])
+    >>> merged.process_files, merged.process_duration, merged.collect_file_size_done, merged.abort
+    (15, 2.5, False, False)
+    """
+    merged = None
+    for stats_helper in stats_helpers:
+        merged = stats_helper if merged is None else merged.merge(stats_helper)
+    if merged is None:
+        merged = StatisticHelper()
+    return merged
+
+
+def _run_shard(*, result_queue, IterFilesystemClass, shard_count, shard_index, shard_plan, kwargs):
+    scan_dir_kwargs = dict(
+        kwargs.pop('scan_dir_kwargs'),
+        shard_count=shard_count,
+        shard_index=shard_index,
+        shard_plan=shard_plan,
+    )
+    iter_fs = IterFilesystemClass(scan_dir_kwargs=scan_dir_kwargs, **kwargs)
+    stats_helper = iter_fs.process()
+    result_queue.put((shard_index, stats_helper.to_bytes(), iter_fs.get_shard_result()))
+
+
+def run_shards_locally(IterFilesystemClass, *, shard_count, shard_plan=None, **kwargs):
+    """
+    Run every shard in a own process on this machine, e.g.: to test a sharded scan.
+    The keyword arguments are passed to IterFilesystemClass.
+    The class must be importable from the child processes (e.g.: defined on module level).
+
+    Returns the merged StatisticHelper and the merged shard results.
+    """
+    kwargs.setdefault('ProcessBarClass', NoopProcessBar)  # Process bars of parallel shards would be garbled
+
+    result_queue = multiprocessing.Queue()
+    processes = []
+    for shard_index in range(shard_count):
+        process = multiprocessing.Process(
+            name=f'shard_{shard_index}',
+            target=_run_shard,
+            kwargs=dict(
+                result_queue=result_queue,
+                IterFilesystemClass=IterFilesystemClass,
+                shard_count=shard_count,
+                shard_index=shard_index,
+                shard_plan=shard_plan,
+                kwargs=dict(kwargs),
+            ),
+        )
+        # Not daemonic: The shard starts the collect processes
+        process.start()
+        processes.append(process)
+
+    shard_results = {}
+    try:
+        while len(shard_results) < shard_count:
+            try:
+                shard_index, stats_data, result = result_queue.get(timeout=0.5)
+            except queue.Empty:
+                for process in processes:
+                    if process.exitcode:
+                        raise RuntimeError(f'{process.name} failed with exit code {process.exitcode}')
+            else:
+                shard_results[shard_index] = (StatisticHelper.from_bytes(stats_data), result)
+                log.info('Shard %i done', shard_index)
+    finally:
+        for process in processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+
+    shard_indexes = sorted(shard_results)
+    stats_helper = merge_statistics(shard_results[index][0] for index in shard_indexes)
+    result = IterFilesystemClass.merge_shard_results([shard_results[index][1] for index in shard_indexes])
+    return stats_helper, result
+
+
+def write_shard_file(path, *, shard_count, shard_index, stats_helper, result):
+    """
+    Store the output of one shard, e.g.: to merge the shards of multiple machines via merge_shard_files()
+    """
+    data = dict(
+        shard_count=shard_count,
+        shard_index=shard_index,
+        stats=dict(stats_helper.items()),
+        result=result,
+    )
+    Path(path).write_text(json.dumps(data, indent=4, default=str), encoding='UTF-8')
+
+
+def merge_shard_files(paths, IterFilesystemClass):
+    """
+    Returns the merged StatisticHelper and the merged shard results of the given shard files.
+    """
+    shard_results = {}
+    shard_counts = set()
+    for path in paths:
+        data = json.loads(Path(path).read_text(encoding='UTF-8'))
+        shard_counts.add(data['shard_count'])
+
+        stats_helper = StatisticHelper()
+        for key, value in data['stats'].items():
+            setattr(stats_helper, key, value)
+        shard_results[data['shard_index']] = (stats_helper, data['result'])
+
+    if len(shard_counts) != 1:
+        raise ValueError(f'Shard files are from different scans: shard counts {sorted(shard_counts)}')
+    shard_count = shard_counts.pop()
+    missing = sorted(set(range(shard_count)) - set(shard_results))
+    if missing:
+        raise ValueError(f'Missing shards: {", ".join(str(index) for index in missing)}')
+
+    stats_helper = merge_statistics(shard_results[index][0] for index in range(shard_count))
+    result = IterFilesystemClass.merge_shard_results([shard_results[index][1] for index in range(shard_count)])
+    return stats_helper, result
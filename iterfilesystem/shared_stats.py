@@ -0,0 +1,63 @@
+import math
+from multiprocessing.sharedctypes import RawArray
+
+# IterFilesystem
+from iterfilesystem.constants import SHARED_STATS_LAYOUT
+
+INT_SLOTS = {}
+FLOAT_SLOTS = {}
+VALUE_TYPES = {}
+for key, value_type in SHARED_STATS_LAYOUT:
+    if value_type is float:
+        FLOAT_SLOTS[key] = len(FLOAT_SLOTS)
+    else:
+        INT_SLOTS[key] = len(INT_SLOTS)
+    VALUE_TYPES[key] = value_type
+
+
+class SharedStats:
+    """
+    Statistics of the collect processes in shared memory, without a Manager process.
+
+    Every key has a fixed slot and is written by only one process, so no lock is needed.
+    Supports the used dict API: stats[key] = value and stats.get(key, default)
+
+    >>> shared_stats = SharedStats()
+    >>> shared_stats.get('dir item count', 0), shared_stats.get('count duration', None)
+    (0, None)
+    >>> shared_stats['dir item count'] = 123
+    >>> shared_stats['count done'] = True
+    >>> shared_stats['count duration'] = 1.5
+    >>> shared_stats.get('dir item count', 0), shared_stats['count done'], shared_stats['count duration']
+    (123, True, 1.5)
+    """
+
+    def __init__(self):
+        self.int_values = RawArray('q', len(INT_SLOTS))  # int64 -> enough for file sizes
+        self.float_values = RawArray('d', len(FLOAT_SLOTS))
+        for slot in range(len(FLOAT_SLOTS)):
+            self.float_values[slot] = math.nan  # -> not set
+
+    def __setitem__(self, key, value):
+        if key in FLOAT_SLOTS:
+            self.float_values[FLOAT_SLOTS[key]] = value
+        else:
+            self.int_values[INT_SLOTS[key]] = value
+
+    def __getitem__(self, key):
+        if key in FLOAT_SLOTS:
+            value = self.float_values[FLOAT_SLOTS[key]]
+            if math.isnan(value):
+                raise KeyError(key)
+            return value
+        return VALUE_TYPES[key](self.int_values[INT_SLOTS[key]])
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def items(self):
+        for key, value_type in SHARED_STATS_LAYOUT:
+            yield key, self.get(key)
@@ -0,0 +1,55 @@
+import fnmatch
+import os
+import re
+
+# fnmatch.fnmatch() normalize the case only on Windows:
+NORMCASE = os.name == 'nt'
+
+MAGIC_CHARS = re.compile(r'[*?[]')
+
+
+class SkipPatterns(tuple):
+    """
+    fnmatch patterns, compiled once to a set of literal names and one combined regular expression.
+    Has the same semantic as a fnmatch.fnmatch() call for every pattern.
+
+    >>> patterns = SkipPatterns(('.*', '*.egg-info', 'build', 'tmp?'))
+    >>> patterns
+    ('.*', '*.egg-info', 'build', 'tmp?')
+    >>> patterns.matches('.git'), patterns.matches('build'), patterns.matches('foo.egg-info')
+    (True, True, True)
+    >>> patterns.matches('builds'), patterns.matches('tmp'), patterns.matches('tmp1')
+    (False, False, True)
+    >>> SkipPatterns(()).matches('foo')
+    False
+    """
+
+    def __new__(cls, patterns):
+        self = super().__new__(cls, patterns)
+
+        literals = set()
+        regex_patterns = []
+        for pattern in self:
+            if NORMCASE:
+                pattern = os.path.normcase(pattern)
+
+            if MAGIC_CHARS.search(pattern):
+                regex_patterns.append(fnmatch.translate(pattern))
+            else:
+                literals.add(pattern)
+
+        self.literals = frozenset(literals)
+        if regex_patterns:
+            self.regex_match = re.compile('|'.join(regex_patterns)).match
+        else:
+            self.regex_match = None
+        return self
+
+    def matches(self, name):
+        if NORMCASE:
+            name = os.path.normcase(name)
+
+        if name in self.literals:
+            return True
+
+        return self.regex_match is not None and self.regex_match(name) is not None
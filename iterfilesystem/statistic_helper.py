@@ -1,6 +1,9 @@
-# IterFilesystem
+import math
+import operator
 import pprint
+import struct
 
+# IterFilesystem
 from iterfilesystem.constants import (
     COLLECT_COUNT_DONE,
     COLLECT_COUNT_DURATION,
@@ -11,35 +14,203 @@ from iterfilesystem.constants import (
 )
 
 
+COUNTER = 'counter'  # int -> merge(): sum
+FLAG = 'flag'  # bool -> merge(): True only if True in all
+DURATION = 'duration'  # None or seconds as float -> merge(): maximum (e.g.: the shards run in parallel)
+ABORT = 'abort'  # None, True or False -> merge(): True if one is True, False only if all are False
+
+FIELDS = (
+    # set by ScandirWalker:
+    ('walker_dir_count', COUNTER),
+    ('walker_dir_skip_count', COUNTER),
+    ('walker_file_count', COUNTER),
+    ('walker_file_skip_count', COUNTER),
+
+    # system calls made by ScandirWalker:
+    ('walker_scandir_count', COUNTER),
+    # Only the stat() calls for 'stat_entries', not the stat() calls of the collect processes,
+    # of process_dir_entry() or of the IndexedScandirWalker directory check:
+    ('walker_stat_entries_count', COUNTER),
+
+    # set by IndexedScandirWalker:
+    ('walker_index_hit_count', COUNTER),
+    ('walker_index_miss_count', COUNTER),
+
+    # from collect_count_process:
+    ('collect_dir_item_count', COUNTER),
+    ('collect_dir_item_count_done', FLAG),
+    ('collect_dir_item_duration', DURATION),
+
+    # form collect_size_process:
+    ('collect_file_size', COUNTER),
+    ('collect_file_size_done', FLAG),
+    ('collect_file_size_duration', DURATION),
+
+    # from worker_process:
+    ('process_files', COUNTER),
+    ('process_file_size', COUNTER),
+    ('process_error_count', COUNTER),
+    ('process_duration', DURATION),
+
+    # set by CalcFilesystemSHA512 with hash cache:
+    ('hash_cache_hit_count', COUNTER),
+    ('hash_cache_miss_count', COUNTER),
+
+    # Keeps track if everything is processed:
+    # == None -> done() was not called / unknown error
+    # == True -> KeyboardInterrupt was used
+    # == False -> processed completed
+    ('abort', ABORT),
+)
+FIELD_NAMES = tuple(name for name, _ in FIELDS)
+COUNTER_FIELDS = tuple((index, name) for index, (name, kind) in enumerate(FIELDS) if kind == COUNTER)
+
+DEFAULTS = {COUNTER: 0, FLAG: False, DURATION: None, ABORT: None}
+STRUCT_FORMATS = {COUNTER: 'q', FLAG: '?', DURATION: 'd', ABORT: 'b'}
+STATS_STRUCT = struct.Struct('<' + ''.join(STRUCT_FORMATS[kind] for _, kind in FIELDS))
+
+ABORT2INT = {None: -1, False: 0, True: 1}
+INT2ABORT = {value: key for key, value in ABORT2INT.items()}
+
+get_field_values = operator.attrgetter(*FIELD_NAMES)
+
+
+def merge_values(kind, value1, value2):
+    if kind == COUNTER:
+        return value1 + value2
+    elif kind == FLAG:
+        return value1 and value2
+    elif kind == DURATION:
+        if value1 is None:
+            return value2
+        elif value2 is None:
+            return value1
+        return max(value1, value2)
+    else:
+        assert kind == ABORT
+        if value1 is True or value2 is True:
+            return True
+        elif value1 is False and value2 is False:
+            return False
+        return None
+
+
+def get_value_kind(value):
+    """
+    The merge kind of a not declared value (e.g.: the duplicate_* counters of DuplicateFinder)
+    """
+    if isinstance(value, bool):
+        return FLAG
+    elif isinstance(value, int):
+        return COUNTER
+    elif value is None or isinstance(value, float):
+        return DURATION
+
+
 class StatisticHelper:
+    """
+    The counters of a scan with the fixed field schema in FIELDS.
+    Other values (e.g.: the hash of CalcFilesystemSHA512) can be added as normal attributes.
+
+    The schema values can be copied with snapshot(), merged with merge()
+    and serialized with to_bytes(), e.g.:
+
+    >>> shard1, shard2 = StatisticHelper(), StatisticHelper()
+    >>> shard1.process_files, shard2.process_files = 10, 5
+    >>> shard1.process_duration = 1.5
+    >>> shard1.collect_file_size_done = True
+    >>> shard1.duplicate_file_count, shard2.duplicate_file_count = 2, 3  # a additional value
+    >>> merged = shard1.merge(shard2)
+    >>> merged.process_files, merged.process_duration, merged.collect_file_size_done, merged.abort
+    (15, 1.5, False, None)
+    >>> merged.duplicate_file_count
+    5
+
+    >>> snapshot = merged.snapshot()
+    >>> merged.process_files += 3
+    >>> merged.delta(snapshot)['process_files']
+    3
+
+    >>> data = merged.to_bytes()
+    >>> len(data)
+    147
+    >>> StatisticHelper.from_bytes(data).process_files
+    18
+    """
+    __slots__ = FIELD_NAMES + ('__dict__',)  # __dict__ for additional values, e.g.: hash, phase_timings
+
     def __init__(self):
-        # set by ScandirWalker:
-        self.walker_dir_count = 0
-        self.walker_dir_skip_count = 0
-
-        self.walker_file_count = 0
-        self.walker_file_skip_count = 0
-
-        # from collect_count_process:
-        self.collect_dir_item_count = 0
-        self.collect_dir_item_count_done = False
-        self.collect_dir_item_duration = None
-
-        # form collect_size_process:
-        self.collect_file_size = 0
-        self.collect_file_size_done = False
-        self.collect_file_size_duration = None
-
-        # from worker_process:
-        self.process_files = 0
-        self.process_file_size = 0
-        self.process_error_count = 0
-
-        # Keeps track if everything is processed:
-        # == None -> done() was not called / unknown error
-        # == True -> KeyboardInterrupt was used
-        # == False -> processed completed
-        self.abort = None
+        for name, kind in FIELDS:
+            setattr(self, name, DEFAULTS[kind])
+
+    def snapshot(self):
+        """
+        Returns the schema values as a tuple, e.g.: to calculate rates via delta()
+        """
+        return get_field_values(self)
+
+    def delta(self, snapshot):
+        """
+        Returns the counter changes since the given snapshot()
+        """
+        values = get_field_values(self)
+        return {name: values[index] - snapshot[index] for index, name in COUNTER_FIELDS}
+
+    def merge(self, other):
+        """
+        Returns a new StatisticHelper with the merged values of both. The merge is associative,
+        so the results of parallel workers or shards can be merged in any grouping.
+        Additional values are merged by their type, e.g.: a int is summed up like a COUNTER field.
+        Values that are missing on one side are taken (a missing flag is False)
+        and additional values of other types are dropped.
+        """
+        merged = StatisticHelper.__new__(StatisticHelper)
+        for (name, kind), value1, value2 in zip(FIELDS, get_field_values(self), get_field_values(other)):
+            setattr(merged, name, merge_values(kind, value1, value2))
+
+        missing = object()
+        for key in {**self.__dict__, **other.__dict__}:
+            value1 = self.__dict__.get(key, missing)
+            value2 = other.__dict__.get(key, missing)
+            values = [value for value in (value1, value2) if value is not missing]
+            kinds = {get_value_kind(value) for value in values}
+            if len(kinds) != 1 or None in kinds:
+                continue
+
+            kind = kinds.pop()
+            if len(values) == 2:
+                value = merge_values(kind, *values)
+            elif kind == FLAG:
+                value = False
+            else:
+                value = values[0]
+            setattr(merged, key, value)
+        return merged
+
+    def to_bytes(self):
+        """
+        Pack the schema values into a few bytes, e.g.: to send them to a other process.
+        The additional values are not included.
+        """
+        values = []
+        for (_, kind), value in zip(FIELDS, get_field_values(self)):
+            if kind == DURATION:
+                value = float('nan') if value is None else value
+            elif kind == ABORT:
+                value = ABORT2INT[value]
+            values.append(value)
+        return STATS_STRUCT.pack(*values)
+
+    @classmethod
+    def from_bytes(cls, data):
+        stats_helper = cls.__new__(cls)
+        for (name, kind), value in zip(FIELDS, STATS_STRUCT.unpack(data)):
+            if kind == DURATION:
+                value = None if math.isnan(value) else value
+            elif kind == ABORT:
+                value = INT2ABORT[value]
+            setattr(stats_helper, name, value)
+        return stats_helper
 
     def get_walker_dir_item_count(self):
         item_count = self.walker_dir_count
@@ -55,6 +226,12 @@ class StatisticHelper:
         self.walker_file_count = scan_dir_walker.stats_helper.walker_file_count
         self.walker_file_skip_count = scan_dir_walker.stats_helper.walker_file_skip_count
 
+        self.walker_scandir_count = scan_dir_walker.stats_helper.walker_scandir_count
+        self.walker_stat_entries_count = scan_dir_walker.stats_helper.walker_stat_entries_count
+
+        self.walker_index_hit_count = scan_dir_walker.stats_helper.walker_index_hit_count
+        self.walker_index_miss_count = scan_dir_walker.stats_helper.walker_index_miss_count
+
     def update_from_multiprocessing_stats(self, multiprocessing_stats):
         self.collect_dir_item_count = multiprocessing_stats.get(DIR_ITEM_COUNT, 0)
         self.collect_dir_item_count_done = multiprocessing_stats.get(COLLECT_COUNT_DONE, False)
@@ -72,15 +249,10 @@ class StatisticHelper:
         self.process_file_size += file_size
 
     def items(self):
-        for attr_name in dir(self):
-            if attr_name.startswith('_'):
-                continue
-
-            attr = getattr(self, attr_name)
-            if callable(attr):
-                continue
-
-            yield attr_name, attr
+        yield from zip(FIELD_NAMES, get_field_values(self))
+        for key, value in self.__dict__.items():
+            if not key.startswith('_'):
+                yield key, value
 
     def pformat(self):
         return pprint.pformat(dict(self.items()))
@@ -1,7 +1,12 @@
+import os
 from pathlib import Path
 
 # IterFilesystem
 import iterfilesystem
+from iterfilesystem.iter_scandir import ScandirWalker
+from iterfilesystem.main import IterFilesystem
+from iterfilesystem.process_bar import NoopProcessBar
+from iterfilesystem.statistic_helper import StatisticHelper
 
 
 class BaseTestCase:
@@ -13,3 +18,133 @@ class BaseTestCase:
     skip_file_patterns = (
         '.*', '*.egg-info'
     )
+
+
+def verbose_get_capsys(capsys):
+    captured = capsys.readouterr()
+
+    captured_out = captured.out
+    print('_' * 100)
+    print('Captured stdout:')
+    print(captured_out)
+    print('-' * 100)
+
+    captured_err = captured.err
+    print('_' * 100)
+    print('Captured stderr:')
+    print(captured_err)
+    print('-' * 100)
+    return captured_out, captured_err
+
+
+def stats_helper2assertments(stats_helper):
+    for key, value in stats_helper.items():
+        if 'duration' in key:
+            continue
+
+        print(f'assert stats_helper.{key} == {value}')
+
+    print(
+        f'assert stats_helper.get_walker_dir_item_count()'
+        f' == {stats_helper.get_walker_dir_item_count()}'
+    )
+
+
+def create_tree(top_path, *, dir_count=3, sub_count=0, file_count=4, file_name='file_{file_no}.txt', content=None):
+    """
+    Create the directories 'dir_<no>' with 'file_count' files in 'sub_count' sub directories 'sub_<no>'
+    or directly in 'dir_<no>', if 'sub_count' is 0.
+    content(dir_no, sub_no, file_no) returns the bytes of a file (sub_no is None without sub directories),
+    default: '<dir_no>-<sub_no>-<file_no>'
+    """
+    for dir_no in range(dir_count):
+        dir_path = Path(top_path, f'dir_{dir_no}')
+        if sub_count:
+            sub_paths = [(sub_no, Path(dir_path, f'sub_{sub_no}')) for sub_no in range(sub_count)]
+        else:
+            sub_paths = [(None, dir_path)]
+
+        for sub_no, sub_path in sub_paths:
+            sub_path.mkdir(parents=True)
+            for file_no in range(file_count):
+                if content is None:
+                    numbers = (dir_no, sub_no, file_no)
+                    file_content = '-'.join(str(no) for no in numbers if no is not None).encode('ASCII')
+                else:
+                    file_content = content(dir_no, sub_no, file_no)
+                Path(sub_path, file_name.format(file_no=file_no)).write_bytes(file_content)
+
+
+SKIP_PATTERNS = dict(skip_dir_patterns=('skip_*',), skip_file_patterns=('*.foo',))
+
+
+def create_skip_tree(top_path):
+    """
+    A tree with entries that are skipped with SKIP_PATTERNS
+    """
+    create_tree(top_path, dir_count=5, sub_count=3, file_count=4, content=lambda *numbers: b'')
+    for dir_no in range(5):
+        for sub_no in range(3):
+            Path(top_path, f'dir_{dir_no}', f'sub_{sub_no}', 'skip.foo').touch()
+        os.makedirs(Path(top_path, f'dir_{dir_no}', 'skip_dir', 'not_listed'))
+        Path(top_path, f'dir_{dir_no}', 'file.txt').touch()
+
+
+def walk(top_path, *, ScanDirClass=ScandirWalker, resume_parts=None, **kwargs):
+    """
+    Returns all dir entries and the statistics of a walk
+    """
+    stats_helper = StatisticHelper()
+    walker = ScanDirClass(top_path=top_path, stats_helper=stats_helper, **kwargs)
+    if resume_parts is not None:
+        walker.set_resume_position(resume_parts)
+    return list(walker), stats_helper
+
+
+def walk_parts(top_path, **kwargs):
+    """
+    Like walk(), but returns the path parts relative to 'top_path' instead of the dir entries
+    """
+    dir_entries, stats_helper = walk(top_path, **kwargs)
+    paths = [Path(dir_entry.path).relative_to(top_path).parts for dir_entry in dir_entries]
+    return paths, stats_helper
+
+
+def process(IterFilesystemClass, top_path, *, scan_dir_kwargs=None, **kwargs):
+    """
+    Process 'top_path' without process bars.
+    Returns the IterFilesystem instance and the statistics.
+    """
+    iter_fs_kwargs = dict(
+        ScanDirClass=ScandirWalker,
+        update_interval_sec=0.5,
+        wait=True,
+        ProcessBarClass=NoopProcessBar,
+    )
+    iter_fs_kwargs.update(kwargs)
+    iter_fs = IterFilesystemClass(
+        scan_dir_kwargs=dict(top_path=top_path, **(scan_dir_kwargs or {})),
+        **iter_fs_kwargs
+    )
+    return iter_fs, iter_fs.process()
+
+
+class FileSizes(IterFilesystem):
+    """
+    Sum the file sizes and record the names of all processed entries.
+    Raises OSError for 'error.txt' files.
+    """
+
+    def start(self):
+        self.calls = []
+        super().start()
+
+    def process_dir_entry(self, dir_entry, process_bars):
+        self.calls.append(dir_entry.name)
+        if dir_entry.name == 'error.txt':
+            raise OSError('Test error')
+
+        if dir_entry.is_file():
+            process_bars.file_bar.reset(total=1)
+            process_bars.file_bar.update(1)
+            self.update(dir_entry=dir_entry, file_size=dir_entry.stat().st_size, process_bars=process_bars)
@@ -0,0 +1,101 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+# IterFilesystem
+from iterfilesystem.async_main import AsyncIterFilesystem
+from iterfilesystem.async_scandir import AsyncScandirWalker
+from iterfilesystem.iter_scandir import ScandirWalker
+from iterfilesystem.statistic_helper import StatisticHelper
+from iterfilesystem.tests import SKIP_PATTERNS, create_skip_tree, walk
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+async def async_walk(top_path, **kwargs):
+    stats_helper = StatisticHelper()
+    walker = AsyncScandirWalker(
+        top_path=top_path,
+        stats_helper=stats_helper,
+        **SKIP_PATTERNS,
+        **kwargs
+    )
+    dir_entries = [dir_entry async for dir_entry in walker]
+    return dir_entries, stats_helper
+
+
+def test_async_scandir_walker(tmp_path):
+    create_skip_tree(tmp_path)
+
+    expected_dir_entries, expected_stats = walk(tmp_path, **SKIP_PATTERNS)
+    expected_paths = [dir_entry.path for dir_entry in expected_dir_entries]
+
+    for max_prefetch in (0, 2, 1000):
+        dir_entries, stats_helper = run(async_walk(tmp_path, max_workers=4, ordered=True, max_prefetch=max_prefetch))
+        assert [dir_entry.path for dir_entry in dir_entries] == expected_paths
+        assert dict(stats_helper.items()) == dict(expected_stats.items())
+
+    dir_entries, stats_helper = run(async_walk(tmp_path, max_workers=4))
+    assert sorted(dir_entry.path for dir_entry in dir_entries) == sorted(expected_paths)
+    assert dict(stats_helper.items()) == dict(expected_stats.items())
+
+
+class SlowFileSizes(AsyncIterFilesystem):
+    async def start(self):
+        self.running = 0
+        self.max_running = 0
+        self.file_sizes = {}
+        await super().start()
+
+    async def process_dir_entry(self, dir_entry, process_bars):
+        self.running += 1
+        self.max_running = max(self.running, self.max_running)
+        try:
+            await asyncio.sleep(0.01)  # e.g.: a upload
+        finally:
+            self.running -= 1
+
+        if dir_entry.is_file(follow_symlinks=False):
+            file_size = dir_entry.stat().st_size
+            self.file_sizes[dir_entry.name] = file_size
+            self.update(dir_entry=dir_entry, file_size=file_size, process_bars=process_bars)
+
+
+def test_async_iter_filesystem(tmp_path):
+    for no in range(30):
+        Path(tmp_path, f'file_{no:02}.txt').write_bytes(b'X' * no)
+
+    iter_fs = SlowFileSizes(
+        ScanDirClass=AsyncScandirWalker,
+        scan_dir_kwargs=dict(top_path=tmp_path),
+        update_interval_sec=0.01,
+        wait=True,
+        max_tasks=5,
+    )
+    stats_helper = run(iter_fs.process())
+
+    assert iter_fs.max_running == 5
+    assert iter_fs.file_sizes == {f'file_{no:02}.txt': no for no in range(30)}
+
+    assert stats_helper.process_files == 30
+    assert stats_helper.process_file_size == sum(range(30))
+    assert stats_helper.collect_file_size == sum(range(30))
+    assert stats_helper.collect_dir_item_count == 30
+    assert stats_helper.walker_scandir_count == 1
+
+
+def test_sync_walker(tmp_path):
+    with pytest.raises(TypeError) as err:
+        SlowFileSizes(
+            ScanDirClass=ScandirWalker,
+            scan_dir_kwargs=dict(top_path=tmp_path),
+            update_interval_sec=0.01,
+        )
+    assert str(err.value) == 'ScandirWalker does not support "async for"!'
@@ -0,0 +1,93 @@
+import os
+from pathlib import Path
+
+import pytest
+
+# IterFilesystem
+from iterfilesystem.example import CalcFilesystemSHA512
+from iterfilesystem.tests import FileSizes, create_tree, process
+
+
+def create_batch_tree(top_path):
+    create_tree(
+        top_path,
+        dir_count=2,
+        file_count=12,
+        file_name='small_{file_no:02}.txt',
+        content=lambda dir_no, sub_no, file_no: b'X' * (dir_no * 100 + file_no),
+    )
+    for dir_no in range(2):
+        Path(top_path, f'dir_{dir_no}', 'small_05_big.bin').write_bytes(b'B' * 5000)  # interrupts the batch
+
+
+class BatchFileSizes(FileSizes):
+    def process_dir_entries(self, dir_entries, process_bars):
+        self.calls.append([dir_entry.name for dir_entry in dir_entries])
+        self.update(
+            dir_entry=dir_entries[-1],
+            file_size=sum(dir_entry.stat().st_size for dir_entry in dir_entries),
+            process_bars=process_bars
+        )
+
+
+def test_batches(tmp_path):
+    create_batch_tree(tmp_path)
+    iter_fs, stats_helper = process(BatchFileSizes, tmp_path, batch_size=4)
+
+    assert iter_fs.calls[:6] == [
+        'dir_0',
+        ['small_00.txt', 'small_01.txt', 'small_02.txt', 'small_03.txt'],
+        ['small_04.txt', 'small_05.txt'],
+        'small_05_big.bin',
+        ['small_06.txt', 'small_07.txt', 'small_08.txt', 'small_09.txt'],
+        ['small_10.txt', 'small_11.txt'],
+    ]
+    assert iter_fs.calls[6] == 'dir_1'
+    assert stats_helper.process_files == 2 * 14
+    assert stats_helper.process_file_size == sum(range(12)) + sum(range(100, 112)) + 2 * 5000
+
+
+def test_default_process_dir_entries(tmp_path):
+    create_batch_tree(tmp_path)
+    _, expected_stats = process(FileSizes, tmp_path)
+    iter_fs, stats_helper = process(FileSizes, tmp_path, batch_size=4)
+    assert len(iter_fs.calls) == 2 * 14
+    assert stats_helper.process_files == expected_stats.process_files
+    assert stats_helper.process_file_size == expected_stats.process_file_size
+
+
+@pytest.mark.parametrize('tree_hash', (False, True))
+def test_calc_sha512_batches(tmp_path, tree_hash):
+    create_batch_tree(tmp_path)
+    _, expected_stats = process(CalcFilesystemSHA512, tmp_path, tree_hash=tree_hash)
+    _, stats_helper = process(CalcFilesystemSHA512, tmp_path, tree_hash=tree_hash, batch_size=5)
+    assert stats_helper.hash == expected_stats.hash
+    assert stats_helper.process_files == expected_stats.process_files
+    assert stats_helper.process_file_size == expected_stats.process_file_size
+
+
+def test_batches_and_read_ahead(tmp_path):
+    with pytest.raises(ValueError):
+        process(CalcFilesystemSHA512, tmp_path, batch_size=5, read_ahead=True)
+
+
+@pytest.mark.parametrize('tree_hash', (False, True))
+def test_short_reads(tmp_path, monkeypatch, tree_hash):
+    create_batch_tree(tmp_path)
+    _, expected_stats = process(CalcFilesystemSHA512, tmp_path, tree_hash=tree_hash)
+
+    # e.g.: NFS or FUSE -> a read may return less bytes in the middle of a file:
+    read = os.read
+    monkeypatch.setattr(os, 'read', lambda fd, size: read(fd, min(size, 3)))
+
+    _, stats_helper = process(CalcFilesystemSHA512, tmp_path, tree_hash=tree_hash, batch_size=5)
+    assert stats_helper.hash == expected_stats.hash
+    assert stats_helper.process_file_size == expected_stats.process_file_size
+
+
+def test_read_grown_small_file(tmp_path):
+    path = Path(tmp_path, 'grown.txt')
+    path.write_bytes(b'X' * 100)
+    calc_sha, _ = process(CalcFilesystemSHA512, tmp_path, batch_size=5)
+    assert calc_sha.read_small_file(path, file_size=10) == b'X' * 100
+    assert calc_sha.read_small_file(path, file_size=100) == b'X' * 100
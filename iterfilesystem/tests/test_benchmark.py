@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+# IterFilesystem
+from iterfilesystem.benchmark.suite import compare_reports, run_benchmarks
+from iterfilesystem.benchmark.tree_generator import (
+    SKIP_DIR_PATTERNS,
+    SKIP_FILE_PATTERNS,
+    TREE_SHAPES,
+    generate_tree,
+    scale_shape
+)
+from iterfilesystem.iter_scandir import ScandirWalker
+from iterfilesystem.statistic_helper import StatisticHelper
+
+
+def get_tree_content(top_path):
+    content = {}
+    for root, dirs, files in os.walk(top_path):
+        for file_name in files:
+            path = Path(root, file_name)
+            content[str(path.relative_to(top_path))] = hashlib.sha512(path.read_bytes()).hexdigest()
+    return content
+
+
+def test_generate_tree(tmp_path):
+    shape = scale_shape(TREE_SHAPES['skip_heavy'], scale=0.1)
+    dir_count, file_count, total_size = generate_tree(Path(tmp_path, 'one'), shape, seed=1)
+    assert dir_count == 8 + 8 * 8
+    assert file_count == (1 + dir_count) * 5
+    assert total_size > 0
+
+    generate_tree(Path(tmp_path, 'two'), shape, seed=1)
+    generate_tree(Path(tmp_path, 'three'), shape, seed=2)
+
+    one = get_tree_content(Path(tmp_path, 'one'))
+    assert len(one) == file_count
+    assert one == get_tree_content(Path(tmp_path, 'two'))
+    assert one != get_tree_content(Path(tmp_path, 'three'))
+
+    stats_helper = StatisticHelper()
+    list(ScandirWalker(
+        top_path=Path(tmp_path, 'one'),
+        stats_helper=stats_helper,
+        skip_dir_patterns=SKIP_DIR_PATTERNS,
+        skip_file_patterns=SKIP_FILE_PATTERNS,
+    ))
+    assert stats_helper.walker_dir_skip_count > 0
+    assert stats_helper.walker_file_skip_count > 0
+
+
+def test_run_benchmarks():
+    report = run_benchmarks(shapes=('wide', 'deep'), scale=0.05, repeat=1)
+    json.dumps(report)  # serializable?
+
+    assert set(report['shapes']) == {'wide', 'deep'}
+    wide = report['shapes']['wide']
+    assert wide['tree']['dirs'] == 200
+    assert wide['tree']['files'] == 201
+    assert set(wide['phases']) == {'walker', 'collectors', 'sha512'}
+
+    walker = wide['phases']['walker']
+    assert walker['entries'] == 200 + 201
+    assert walker['scandir_calls'] == 1 + 200
+    assert walker['entries_per_sec'] > 0
+    assert walker['peak_rss'] > 0
+
+    sha512 = wide['phases']['sha512']
+    assert sha512['file_size'] == wide['tree']['file_size']
+    assert sha512['mb_per_sec'] > 0
+
+    assert report['shapes']['deep']['phases']['walker']['scandir_calls'] == 1 + 100
+
+    assert compare_reports(report, report) == []
+
+    slower = json.loads(json.dumps(report))
+    slower['shapes']['deep']['phases']['collectors']['duration'] *= 2
+    assert compare_reports(slower, report) == [
+        'deep / collectors / duration:'
+        f' {report["shapes"]["deep"]["phases"]["collectors"]["duration"]:g}'
+        f' -> {slower["shapes"]["deep"]["phases"]["collectors"]["duration"]:g} (+100%)'
+    ]
@@ -0,0 +1,157 @@
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# IterFilesystem
+from iterfilesystem.checkpoint import Checkpoint
+from iterfilesystem.example import CalcFilesystemSHA512
+from iterfilesystem.iter_scandir import ORDER_NATIVE, ScandirWalker
+from iterfilesystem.parallel_scandir import ParallelScandirWalker
+from iterfilesystem.statistic_helper import StatisticHelper
+from iterfilesystem.tests import create_tree, process, walk_parts
+
+
+def create_checkpoint_tree(top_path):
+    create_tree(top_path, dir_count=3, sub_count=2, file_count=3)
+    Path(top_path, 'top.txt').write_text('top')
+
+
+def test_walker_resume_position(tmp_path):
+    create_checkpoint_tree(tmp_path)
+    all_paths, _ = walk_parts(tmp_path)
+    assert len(all_paths) == 3 + 3 * 2 + 3 * 2 * 3 + 1
+
+    for index, resume_parts in enumerate(all_paths):
+        paths, stats_helper = walk_parts(tmp_path, resume_parts=resume_parts)
+        assert paths == all_paths[index + 1:]
+        assert stats_helper.get_walker_dir_item_count() == len(paths)
+
+
+def test_resume_needs_name_order(tmp_path):
+    walker = ScandirWalker(top_path=tmp_path, stats_helper=StatisticHelper(), order=ORDER_NATIVE)
+    with pytest.raises(ValueError):
+        walker.set_resume_position(('foo',))
+
+
+class InterruptedSHA512(CalcFilesystemSHA512):
+    interrupt_after = None
+
+    def process_dir_entry(self, dir_entry, process_bars):
+        if self.interrupt_after is not None and self.stats_helper.process_files >= self.interrupt_after:
+            raise KeyboardInterrupt
+        super().process_dir_entry(dir_entry, process_bars)
+
+
+def calc(top_path, checkpoint_path, **kwargs):
+    _, stats_helper = process(
+        InterruptedSHA512, top_path, tree_hash=True, checkpoint_path=checkpoint_path, **kwargs
+    )
+    return stats_helper
+
+
+def test_interrupt_and_resume(tmp_path):
+    top_path = Path(tmp_path, 'tree')
+    create_checkpoint_tree(top_path)
+    checkpoint_path = Path(tmp_path, 'checkpoint.pickle')
+
+    full_stats = calc(top_path, checkpoint_path=None)
+    assert full_stats.process_files == 28
+    assert not checkpoint_path.exists()
+
+    InterruptedSHA512.interrupt_after = 10
+    try:
+        stats_helper = calc(top_path, checkpoint_path, checkpoint_interval_sec=1e-9)
+    finally:
+        InterruptedSHA512.interrupt_after = None
+    assert stats_helper.abort is True
+    assert stats_helper.process_files == 10
+    assert checkpoint_path.is_file()
+
+    stats_helper = calc(top_path, checkpoint_path, checkpoint_interval_sec=1e-9, resume=True)
+    assert stats_helper.abort is False
+    assert stats_helper.hash == full_stats.hash
+    assert stats_helper.process_files == full_stats.process_files
+    assert stats_helper.process_file_size == full_stats.process_file_size
+    assert stats_helper.walker_dir_count == full_stats.walker_dir_count
+    assert stats_helper.walker_file_count == full_stats.walker_file_count
+    assert not checkpoint_path.exists()  # removed after a complete scan
+
+
+def test_resume_without_checkpoint(tmp_path):
+    top_path = Path(tmp_path, 'tree')
+    create_checkpoint_tree(top_path)
+    stats_helper = calc(top_path, Path(tmp_path, 'checkpoint.pickle'), resume=True)
+    assert stats_helper.process_files == 28
+
+
+def test_checkpoint_needs_tree_hash(tmp_path):
+    with pytest.raises(ValueError) as err:
+        CalcFilesystemSHA512(
+            ScanDirClass=ScandirWalker,
+            scan_dir_kwargs=dict(top_path=tmp_path),
+            update_interval_sec=1,
+            resume=True,
+        )
+    assert str(err.value) == 'Checkpoints can only be used with tree hash!'
+
+
+@pytest.mark.parametrize('ScanDirClass, scan_dir_kwargs, error_class', (
+    (ScandirWalker, dict(order=ORDER_NATIVE), ValueError),
+    (ParallelScandirWalker, dict(ordered=True), NotImplementedError),
+))
+def test_checkpoint_needs_resumable_walker(tmp_path, ScanDirClass, scan_dir_kwargs, error_class):
+    checkpoint_path = Path(tmp_path, 'checkpoint.pickle')
+    with pytest.raises(error_class):
+        process(
+            CalcFilesystemSHA512,
+            tmp_path,
+            ScanDirClass=ScanDirClass,
+            scan_dir_kwargs=scan_dir_kwargs,
+            tree_hash=True,
+            checkpoint_interval_sec=1,
+            checkpoint_path=checkpoint_path,
+        )
+    assert not checkpoint_path.exists()
+
+
+def test_other_scan(tmp_path):
+    path = Path(tmp_path, 'checkpoint.pickle')
+    Checkpoint(config=('foo',), path=path).save(resume_parts=('a',), stats={}, state=None)
+    assert Checkpoint(config=('foo',), path=path).load()['resume_parts'] == ('a',)
+    with pytest.raises(ValueError):
+        Checkpoint(config=('bar',), path=path).load()
+
+
+def test_broken_checkpoint(tmp_path):
+    path = Path(tmp_path, 'checkpoint.pickle')
+    path.write_bytes(b'broken')
+    path.chmod(0o600)
+    assert Checkpoint(config=('foo',), path=path).load() is None
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='POSIX only')
+def test_writeable_by_others(tmp_path):
+    path = Path(tmp_path, 'checkpoint.pickle')
+    checkpoint = Checkpoint(config=('foo',), path=path)
+    checkpoint.save(resume_parts=('a',), stats={}, state=None)
+    assert path.stat().st_mode & 0o777 == 0o600
+
+    path.chmod(0o666)
+    with pytest.raises(PermissionError):
+        checkpoint.load()
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='POSIX only')
+def test_private_temp_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+
+    checkpoint = Checkpoint(config=('foo',))
+    assert checkpoint.path.parent.stat().st_mode & 0o777 == 0o700
+
+    # e.g.: pre-created by another user -> rejected before a checkpoint is written:
+    checkpoint.path.parent.chmod(0o777)
+    with pytest.raises(PermissionError):
+        Checkpoint(config=('foo',))
+    assert not checkpoint.path.exists()
@@ -5,8 +5,7 @@ import pytest
 
 # IterFilesystem
 from iterfilesystem.bin.print_fs_stats import main
-from iterfilesystem.tests import BaseTestCase
-from iterfilesystem.tests.test_utils import verbose_get_capsys
+from iterfilesystem.tests import BaseTestCase, verbose_get_capsys
 
 
 class TestCli(BaseTestCase):
@@ -0,0 +1,89 @@
+import os
+from pathlib import Path
+
+import pytest
+
+# IterFilesystem
+from iterfilesystem.bin.find_duplicates import main
+from iterfilesystem.duplicates import DuplicateFinder
+from iterfilesystem.iter_scandir import ScandirWalker
+from iterfilesystem.process_bar import NoopProcessBar
+
+SIZE = 200 * 1024
+
+
+def create_files(top_path):
+    big = b'A' * SIZE
+    Path(top_path, 'big_1.bin').write_bytes(big)
+    Path(top_path, 'sub').mkdir()
+    Path(top_path, 'sub', 'big_2.bin').write_bytes(big)
+    os.link(Path(top_path, 'big_1.bin'), Path(top_path, 'hardlink.bin'))
+
+    # Same size, first and last 64 KiB are the same -> only the full hash differs:
+    middle_differs = bytearray(big)
+    middle_differs[SIZE // 2] = ord('B')
+    Path(top_path, 'middle_differs.bin').write_bytes(middle_differs)
+
+    # Same size, but the partial hash differs:
+    Path(top_path, 'head_differs.bin').write_bytes(b'B' + big[1:])
+
+    Path(top_path, 'small_1.txt').write_bytes(b'small')
+    Path(top_path, 'sub', 'small_2.txt').write_bytes(b'small')
+    Path(top_path, 'other.txt').write_bytes(b'other')
+
+    Path(top_path, 'unique.txt').write_bytes(b'unique size')
+    Path(top_path, 'empty_1.txt').touch()
+    Path(top_path, 'empty_2.txt').touch()
+
+
+def test_duplicate_finder(tmp_path):
+    create_files(tmp_path)
+
+    finder = DuplicateFinder(
+        ScanDirClass=ScandirWalker,
+        scan_dir_kwargs=dict(top_path=tmp_path, stat_entries=True),
+        update_interval_sec=0.5,
+        wait=True,
+        ProcessBarClass=NoopProcessBar,
+    )
+    stats_helper = finder.process()
+
+    assert finder.duplicates == [
+        (SIZE, [str(Path(tmp_path, 'big_1.bin')), str(Path(tmp_path, 'sub', 'big_2.bin'))]),
+        (5, [str(Path(tmp_path, 'small_1.txt')), str(Path(tmp_path, 'sub', 'small_2.txt'))]),
+    ]
+    assert stats_helper.duplicate_group_count == 2
+    assert stats_helper.duplicate_file_count == 2
+    assert stats_helper.duplicate_wasted_bytes == SIZE + 5
+    assert stats_helper.duplicate_hardlink_count == 1
+
+    partial_size = DuplicateFinder.PARTIAL_SIZE * 2
+    assert stats_helper.duplicate_size_skip_bytes == len(b'unique size')
+    assert stats_helper.duplicate_partial_read_bytes == 4 * partial_size + 3 * 5
+    assert stats_helper.duplicate_partial_skip_bytes == SIZE - partial_size  # head_differs.bin
+    assert stats_helper.duplicate_full_read_bytes == 3 * SIZE
+    assert stats_helper.process_error_count == 0
+
+
+def test_cli(tmp_path, capsys):
+    create_files(tmp_path)
+    main('--path', str(tmp_path), '--progress', 'none')
+
+    captured = capsys.readouterr()
+    assert '2 files with 200.0 KB:' in captured.out
+    assert f'\t{Path(tmp_path, "sub", "big_2.bin")}\n' in captured.out
+    assert '2 groups with 2 duplicates: 200.0 KB wasted' in captured.out
+    assert captured.err == ''
+
+
+def test_no_checkpoints(tmp_path):
+    finder = DuplicateFinder(
+        ScanDirClass=ScandirWalker,
+        scan_dir_kwargs=dict(top_path=tmp_path),
+        update_interval_sec=0.5,
+        checkpoint_interval_sec=1,
+        checkpoint_path=Path(tmp_path, 'checkpoint.pickle'),
+        ProcessBarClass=NoopProcessBar,
+    )
+    with pytest.raises(NotImplementedError):
+        finder.process()
@@ -1,14 +1,18 @@
 import hashlib
 import logging
+import os
 import sys
+import tempfile
+import time
 from pathlib import Path
 
 import pytest
 
 # IterFilesystem
-from iterfilesystem.example import calc_sha512
-from iterfilesystem.tests import BaseTestCase
-from iterfilesystem.tests.test_utils import stats_helper2assertments, verbose_get_capsys
+from iterfilesystem.example import CalcFilesystemSHA512, calc_sha512
+from iterfilesystem.iter_scandir import ScandirWalker
+from iterfilesystem.tests import BaseTestCase, stats_helper2assertments, verbose_get_capsys
+from iterfilesystem.tree_hash import TreeHash
 
 
 class TestExample(BaseTestCase):
@@ -76,6 +80,132 @@ class TestExample(BaseTestCase):
         assert stats_helper.get_walker_dir_item_count() == 10
         assert stats_helper.hash == expected_hash
 
+    def test_single_walk(self, tmp_path):
+        hash = hashlib.sha512()
+        for no in range(10):
+            with Path(tmp_path, f'working_file_{no}.dat').open("wb") as f:
+                data = b'X%i' % no
+                f.write(data)
+                hash.update(data)
+
+        stats_helper = calc_sha512(
+            top_path=tmp_path,
+            single_walk=True,
+            stat_entries=True,
+        )
+
+        stats_helper2assertments(stats_helper)
+
+        # Only one walk and one stat() call per file:
+        assert stats_helper.walker_scandir_count == 1
+        assert stats_helper.walker_stat_entries_count == 10
+
+        assert stats_helper.collect_dir_item_count == 10
+        assert stats_helper.collect_file_size == 20
+        assert stats_helper.process_file_size == 20
+        assert stats_helper.process_files == 10
+        assert stats_helper.walker_file_count == 10
+        assert stats_helper.hash == hash.hexdigest()
+
+    def test_scandir_workers(self, tmp_path):
+        hash = hashlib.sha512()
+        for dir_no in range(3):
+            Path(tmp_path, f'dir_{dir_no}').mkdir()
+            for no in range(10):
+                with Path(tmp_path, f'dir_{dir_no}', f'working_file_{no}.dat').open("wb") as f:
+                    data = b'X%i' % no
+                    f.write(data)
+                    hash.update(data)
+
+        stats_helper = calc_sha512(
+            top_path=tmp_path,
+            scandir_workers=4
+        )
+
+        stats_helper2assertments(stats_helper)
+
+        assert stats_helper.process_file_size == 60
+        assert stats_helper.walker_dir_count == 3
+        assert stats_helper.walker_file_count == 30
+        assert stats_helper.hash == hash.hexdigest()
+
+    def test_tree_hash_and_hash_cache(self, tmp_path, monkeypatch, capsys):
+        # The hash cache will be stored in the persist temp path:
+        monkeypatch.setattr(tempfile, 'tempdir', str(Path(tmp_path, 'temp')))
+        Path(tmp_path, 'temp').mkdir()
+
+        top_path = Path(tmp_path, 'top')
+        top_path.mkdir()
+
+        tree_hash = TreeHash()
+        for no in range(10):
+            data = b'X%i' % no
+            Path(top_path, f'working_file_{no}.dat').write_bytes(data)
+            tree_hash.update(hashlib.sha512(data).digest())
+
+            # Files changed in the last seconds are not cached:
+            past = time.time() - 60
+            os.utime(Path(top_path, f'working_file_{no}.dat'), (past, past))
+
+        expected_hash = tree_hash.hexdigest()
+
+        stats_helper = calc_sha512(top_path=top_path, tree_hash=True)
+        assert stats_helper.hash == expected_hash
+        assert stats_helper.hash_cache_hit_count == 0
+        assert stats_helper.hash_cache_miss_count == 0
+
+        stats_helper = calc_sha512(top_path=top_path, tree_hash=True, hash_cache=True)
+        assert stats_helper.hash == expected_hash
+        assert stats_helper.hash_cache_hit_count == 0
+        assert stats_helper.hash_cache_miss_count == 10
+
+        stats_helper = calc_sha512(top_path=top_path, tree_hash=True, hash_cache=True)
+        assert stats_helper.hash == expected_hash
+        assert stats_helper.hash_cache_hit_count == 10
+        assert stats_helper.hash_cache_miss_count == 0
+        assert stats_helper.process_file_size == 20
+
+        # Change one file:
+        Path(top_path, 'working_file_5.dat').write_bytes(b'XX')
+
+        stats_helper = calc_sha512(top_path=top_path, tree_hash=True, hash_cache=True)
+        assert stats_helper.hash != expected_hash
+        assert stats_helper.hash_cache_hit_count == 9
+        assert stats_helper.hash_cache_miss_count == 1
+
+        captured_out, captured_err = verbose_get_capsys(capsys)
+        assert 'SHA512 tree hash calculated over all file digests:' in captured_out
+        assert 'Hash cache: 9 hits / 1 misses' in captured_out
+
+        with pytest.raises(ValueError):
+            calc_sha512(top_path=top_path, hash_cache=True)
+
+    def test_big_files(self, tmp_path):
+        class SmallBufferCalcFilesystemSHA512(CalcFilesystemSHA512):
+            BUFFER_SIZE = 7
+            MIN_CHUNK_SIZE = 20
+            MAX_CHUNK_SIZE = 30
+
+        hash = hashlib.sha512()
+        for no, size in enumerate((0, 6, 7, 8, 19, 20, 21, 100, 1000)):
+            data = bytes(range(256)) * 4
+            data = data[no:no + size]
+            Path(tmp_path, f'working_file_{no}.dat').write_bytes(data)
+            hash.update(data)
+
+        calc_sha = SmallBufferCalcFilesystemSHA512(
+            ScanDirClass=ScandirWalker,
+            scan_dir_kwargs=dict(top_path=tmp_path),
+            update_interval_sec=1,
+        )
+        stats_helper = calc_sha.process()
+
+        assert stats_helper.hash == hash.hexdigest()
+        assert stats_helper.process_file_size == 6 + 7 + 8 + 19 + 20 + 21 + 100 + 1000
+        assert calc_sha.big_file_count >= 2  # depends on the adaptive chunk size
+        assert calc_sha.chunk_size == 30
+        assert len(calc_sha.buffer) == 7
+
     def test_error_handling(self, tmp_path, caplog, capsys):
         hash = hashlib.sha512()
         for no in range(10):
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+# IterFilesystem
+from iterfilesystem.hash_cache import HashCache
+
+
+def test_hash_cache(tmp_path):
+    file_path = Path(tmp_path, 'file.txt')
+    file_path.write_bytes(b'XX')
+    past = time.time() - 60
+    os.utime(file_path, (past, past))
+
+    cache_path = Path(tmp_path, 'cache.sqlite3')
+    hash_cache = HashCache(cache_path=cache_path)
+    assert hash_cache.get(str(file_path), file_path.stat()) is None
+    hash_cache.set(str(file_path), file_path.stat(), b'digest')
+    assert hash_cache.get(str(file_path), file_path.stat()) == b'digest'
+    hash_cache.close()
+
+    # persistent:
+    hash_cache = HashCache(cache_path=cache_path)
+    assert hash_cache.get(str(file_path), file_path.stat()) == b'digest'
+
+    # Changed file:
+    file_path.write_bytes(b'XY')
+    os.utime(file_path, (past, past))
+    assert hash_cache.get(str(file_path), file_path.stat()) is None
+
+    # Files changed in the last seconds are not stored:
+    file_path.write_bytes(b'XYZ')
+    hash_cache.set(str(file_path), file_path.stat(), b'new digest')
+    assert hash_cache.get(str(file_path), file_path.stat()) is None
+    hash_cache.close()
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='POSIX only')
+def test_private_temp_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+
+    hash_cache = HashCache()
+    assert hash_cache.cache_path.parent.stat().st_mode & 0o777 == 0o700
+    hash_cache.close()
+
+    # e.g.: pre-created by another user:
+    hash_cache.cache_path.parent.chmod(0o777)
+    with pytest.raises(PermissionError):
+        HashCache()
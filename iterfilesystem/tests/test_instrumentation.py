@@ -0,0 +1,75 @@
+import time
+from pathlib import Path
+
+import pytest
+
+# IterFilesystem
+from iterfilesystem.instrumentation import Instrumentation
+from iterfilesystem.iter_scandir import ScandirWalker
+from iterfilesystem.main import IterFilesystem
+
+
+class SlowFileSizes(IterFilesystem):
+    def process_dir_entry(self, dir_entry, process_bars):
+        time.sleep(0.01)
+        if dir_entry.is_file():
+            self.update(dir_entry=dir_entry, file_size=dir_entry.stat().st_size, process_bars=process_bars)
+
+
+def process(tmp_path, instrumentation, **kwargs):
+    Path(tmp_path, 'sub_dir').mkdir()
+    for no in range(10):
+        Path(tmp_path, 'sub_dir', f'file_{no}.txt').write_bytes(b'X' * no)
+        Path(tmp_path, f'skip_{no}.foo').touch()
+
+    iter_fs = SlowFileSizes(
+        ScanDirClass=ScandirWalker,
+        scan_dir_kwargs=dict(
+            top_path=tmp_path,
+            skip_dir_patterns=('skip_dir',),
+            skip_file_patterns=('*.foo',),
+            stat_entries=True,
+        ),
+        update_interval_sec=0.5,
+        instrumentation=instrumentation,
+        **kwargs
+    )
+    return iter_fs.process()
+
+
+@pytest.mark.parametrize('single_walk', (False, True))
+def test_phase_timings(tmp_path, single_walk):
+    stats_helper = process(tmp_path, Instrumentation(profiler='cprofile'), single_walk=single_walk)
+    assert stats_helper.process_file_size == sum(range(10))
+
+    phase_timings = stats_helper.phase_timings
+    assert phase_timings['SlowFileSizes.process_dir_entry']['count'] == 11
+    assert phase_timings['SlowFileSizes.process_dir_entry']['total'] >= 0.1
+    assert phase_timings['SlowFileSizes.process_dir_entry']['min'] >= 0.01
+    assert phase_timings['SlowFileSizes.update']['count'] == 10
+    assert phase_timings['SlowFileSizes._update_stats_helper']['count'] >= 1
+    assert phase_timings['ScandirWalker._scandir']['count'] == 2
+    assert phase_timings['ScandirWalker._stat_entry']['count'] == 10
+    assert phase_timings['ScandirWalker.skip_dir_patterns.matches']['count'] == 1
+    assert phase_timings['ScandirWalker.skip_file_patterns.matches']['count'] == 20
+    assert sum(phase_timings['ScandirWalker._scandir']['buckets'].values()) == 2
+
+    assert 'process_dir_entry' in stats_helper.profile
+    assert 'cumulative' in stats_helper.profile
+
+
+def test_sampling_profiler(tmp_path):
+    stats_helper = process(tmp_path, Instrumentation(profiler='sampling', sampling_interval=0.001))
+    assert ' samples every 1.0 ms:' in stats_helper.profile
+    assert 'process_dir_entry' in stats_helper.profile
+
+
+def test_without_instrumentation(tmp_path):
+    stats_helper = process(tmp_path, instrumentation=None)
+    assert not hasattr(stats_helper, 'phase_timings')
+
+
+def test_unknown_profiler():
+    with pytest.raises(ValueError) as err:
+        Instrumentation(profiler='foo')
+    assert str(err.value) == "Unknown profiler 'foo' (choose from: cprofile, sampling)"
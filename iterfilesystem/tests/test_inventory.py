@@ -0,0 +1,146 @@
+import csv
+import io
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+# IterFilesystem
+from iterfilesystem.bin.export_inventory import main
+from iterfilesystem.inventory import COMPRESSIONS, FORMATS, InventoryExporter, open_inventory, read_columnar
+from iterfilesystem.iter_scandir import ScandirWalker
+from iterfilesystem.tests import create_tree, process, walk
+
+
+def create_inventory_tree(top_path):
+    create_tree(top_path, content=lambda dir_no, sub_no, file_no: b'X' * (dir_no * 10 + file_no))
+
+
+def get_expected_rows(top_path):
+    rows = {}
+    dir_entries, _ = walk(top_path)
+    for dir_entry in dir_entries:
+        entry_stat = os.lstat(dir_entry.path)
+        rows[dir_entry.path] = (
+            dir_entry.path, entry_stat.st_size, entry_stat.st_mtime, entry_stat.st_ino, entry_stat.st_mode
+        )
+    return rows
+
+
+def read_rows(path, format, compression):
+    with open_inventory(path, format=format, compression=compression, mode='rb') as f:
+        if format == 'ndjson':
+            return [tuple(json.loads(line).values()) for line in f]
+        elif format == 'csv':
+            reader = csv.reader(f)
+            assert next(reader) == ['path', 'size', 'mtime', 'inode', 'mode']
+            return [
+                (path, int(size), float(mtime), int(inode), int(mode))
+                for path, size, mtime, inode, mode in reader
+            ]
+        return list(read_columnar(f))
+
+
+@pytest.mark.parametrize('format', tuple(FORMATS))
+@pytest.mark.parametrize('compression', tuple(COMPRESSIONS))
+def test_inventory_exporter(tmp_path, format, compression):
+    top_path = Path(tmp_path, 'tree')
+    top_path.mkdir()
+    create_inventory_tree(top_path)
+    output_path = Path(tmp_path, 'inventory.out')
+
+    exporter, stats_helper = process(
+        InventoryExporter,
+        top_path,
+        scan_dir_kwargs=dict(stat_entries=True),
+        output_path=output_path,
+        format=format,
+        compression=compression,
+        batch_rows=5,  # -> more than one batch
+    )
+    assert exporter.row_count == 3 + 3 * 4
+    assert stats_helper.process_files == 3 + 3 * 4
+    assert stats_helper.process_file_size == sum(dir_no * 10 + file_no for dir_no in range(3) for file_no in range(4))
+
+    rows = read_rows(output_path, format, compression)
+    expected_rows = get_expected_rows(top_path)
+    assert len(rows) == len(expected_rows)
+    for row in rows:
+        assert row == expected_rows[row[0]]
+
+
+def test_columnar_is_compact(tmp_path):
+    rows = [
+        (f'/foo/bar/file_{no}.txt', no * 123456, 1700000000.123456 + no, no + 12345678, 0o100644)
+        for no in range(100)
+    ]
+    sizes = {}
+    for format, Writer in FORMATS.items():
+        with io.BytesIO() as raw:
+            f = raw if Writer.binary else io.TextIOWrapper(raw, encoding='utf-8', newline='')
+            Writer(f).write_rows(rows)
+            f.flush()
+            sizes[format] = len(raw.getvalue())
+            if format == 'columnar':
+                raw.seek(0)
+                assert list(read_columnar(raw)) == rows
+
+    assert sizes['columnar'] < sizes['csv'] < sizes['ndjson']
+
+
+class BrokenEntry:
+    def __init__(self, dir_entry):
+        self.dir_entry = dir_entry
+        self.path = dir_entry.path
+
+    def stat(self, *, follow_symlinks=True):
+        raise PermissionError('stat denied')
+
+
+class BrokenStatWalker(ScandirWalker):
+    def __iter__(self):
+        for dir_entry in super().__iter__():
+            if dir_entry.name == 'file_0.txt':
+                dir_entry = BrokenEntry(dir_entry)
+            yield dir_entry
+
+
+def test_stat_error(tmp_path):
+    top_path = Path(tmp_path, 'tree')
+    top_path.mkdir()
+    create_inventory_tree(top_path)
+    output_path = Path(tmp_path, 'inventory.out')
+
+    exporter, stats_helper = process(
+        InventoryExporter, top_path, ScanDirClass=BrokenStatWalker, output_path=output_path
+    )
+
+    # The errors are handled by IterFilesystem._process_error():
+    assert stats_helper.process_error_count == 3
+    assert exporter.row_count == 3 + 3 * 3
+    assert len(read_rows(output_path, 'ndjson', 'none')) == 3 + 3 * 3
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        InventoryExporter(
+            ScanDirClass=ScandirWalker, scan_dir_kwargs={}, update_interval_sec=1, output_path='foo', format='xml'
+        )
+
+
+def test_cli(tmp_path, capsys):
+    top_path = Path(tmp_path, 'tree')
+    top_path.mkdir()
+    create_inventory_tree(top_path)
+    output_path = Path(tmp_path, 'inventory.csv.gz')
+
+    main(
+        '--path', str(top_path), '--output', str(output_path),
+        '--format', 'csv', '--compression', 'gzip', '--progress', 'none'
+    )
+
+    captured = capsys.readouterr()
+    assert 'Exported 15 entries' in captured.out
+    assert captured.err == ''
+    assert len(read_rows(output_path, 'csv', 'gzip')) == 15
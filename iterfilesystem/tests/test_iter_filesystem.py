@@ -188,3 +188,98 @@ def test_keyboard_interrupt(tmp_path, capsys, caplog):
     assert stats_helper.walker_file_count == 3
     assert stats_helper.walker_dir_skip_count == 0
     assert stats_helper.walker_file_skip_count == 0
+
+
+def test_single_walk(tmp_path, caplog):
+    for no in range(10):
+        with Path(tmp_path, f'file_{no}.txt').open('wb') as f:
+            f.write(b'XX')
+    Path(tmp_path, 'skip.foo').touch()
+    Path(tmp_path, 'skip_dir').mkdir()
+    Path(tmp_path, 'sub_dir').mkdir()
+    Path(tmp_path, 'sub_dir', 'sub_file.txt').write_bytes(b'XXX')
+
+    class TestIterFilesystem(IterFilesystem):
+        def process_dir_entry(self, dir_entry, process_bars):
+            self.update(
+                dir_entry=dir_entry,
+                file_size=dir_entry.stat().st_size if dir_entry.is_file() else 0,
+                process_bars=process_bars
+            )
+
+    with caplog.at_level(logging.DEBUG, logger="iterfilesystem"):
+        iter_fs = TestIterFilesystem(
+            ScanDirClass=ScandirWalker,
+            scan_dir_kwargs=dict(
+                top_path=tmp_path,
+                skip_dir_patterns=('skip_*',),
+                skip_file_patterns=('*.foo',),
+            ),
+            update_interval_sec=0.01,
+            single_walk=True,
+        )
+        iter_fs.single_walk_queue_size = 2  # producer must wait for the worker
+        stats_helper = iter_fs.process()
+
+    stats_helper.print_stats()
+
+    logs = caplog.text
+    print('-' * 100)
+    print(logs)
+    print('-' * 100)
+
+    assert 'Single walk producer starts' in logs
+    assert 'Single walk producer done' in logs
+    assert '(14 items, 23 Bytes)' in logs
+    assert 'Collect filesystem item process starts' not in logs
+    assert 'Collect file size process starts' not in logs
+
+    assert stats_helper.abort is False
+
+    assert stats_helper.collect_dir_item_count == 14
+    assert stats_helper.collect_dir_item_count_done is True
+    assert stats_helper.collect_file_size == 23
+    assert stats_helper.collect_file_size_done is True
+
+    assert stats_helper.process_files == 12
+    assert stats_helper.process_file_size == 23
+
+    assert stats_helper.walker_dir_count == 1
+    assert stats_helper.walker_file_count == 11
+    assert stats_helper.walker_dir_skip_count == 1
+    assert stats_helper.walker_file_skip_count == 1
+
+
+def test_single_walk_keyboard_interrupt(tmp_path, caplog):
+    for no in range(5):
+        Path(tmp_path, f'file_{no}.txt').touch()
+
+    class TestIterFilesystem(IterFilesystem):
+        def process_dir_entry(self, dir_entry, process_bars):
+            if dir_entry.name == 'file_2.txt':
+                raise KeyboardInterrupt
+            self.update(
+                dir_entry=dir_entry,
+                file_size=dir_entry.stat().st_size,
+                process_bars=process_bars
+            )
+
+    iter_fs = TestIterFilesystem(
+        ScanDirClass=ScandirWalker,
+        scan_dir_kwargs=dict(
+            top_path=tmp_path,
+            skip_dir_patterns=(),
+            skip_file_patterns=(),
+        ),
+        update_interval_sec=0.5,
+        single_walk=True,
+    )
+    iter_fs.single_walk_queue_size = 1
+    stats_helper = iter_fs.process()
+
+    stats_helper.print_stats()
+
+    assert stats_helper.abort is True  # KeyboardInterrupt was raised
+    assert '*** Abort via keyboard interrupt! ***' in caplog.text
+
+    assert stats_helper.walker_file_count == 3
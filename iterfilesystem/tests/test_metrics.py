@@ -0,0 +1,119 @@
+import urllib.request
+from pathlib import Path
+
+# IterFilesystem
+from iterfilesystem.metrics import HttpMetricsExporter, MetricsExporter, TextfileMetricsExporter
+from iterfilesystem.statistic_helper import StatisticHelper
+from iterfilesystem.tests import FileSizes, process
+
+
+def parse_samples(text, openmetrics=True):
+    """
+    Returns the sample values and checks, that every sample has a declared type.
+    """
+    if openmetrics:
+        assert text.endswith('# EOF\n')
+    else:
+        assert '# EOF' not in text
+
+    types = {}
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith('# TYPE '):
+            _, _, name, metric_type = line.split(' ')
+            types[name] = metric_type
+        elif not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = value
+
+            name = name.split('{', 1)[0]
+            if openmetrics and name.endswith('_total'):
+                # The counter family is declared without the suffix:
+                name = name[:-len('_total')]
+            assert name in types, f'No TYPE for {name}'
+    return samples
+
+
+def test_render():
+    stats_helper = StatisticHelper()
+    stats_helper.walker_file_count = 10
+    stats_helper.process_file_size = 12345678901234
+    stats_helper.collect_file_size_done = True
+
+    exporter = MetricsExporter(labels=dict(path='/foo "bar"'))
+    samples = parse_samples(exporter.render(stats_helper))
+    assert samples['iterfilesystem_walker_files_total{path="/foo \\"bar\\""}'] == '10'
+    assert samples['iterfilesystem_processed_bytes_total{path="/foo \\"bar\\""}'] == '12345678901234'
+    assert samples['iterfilesystem_collect_bytes_done{path="/foo \\"bar\\""}'] == '1'
+    assert samples['iterfilesystem_bytes_per_second{path="/foo \\"bar\\""}'] == '0.0'
+
+
+def test_text_format():
+    stats_helper = StatisticHelper()
+    stats_helper.walker_dir_count = 2
+    text = MetricsExporter().render(stats_helper, openmetrics=False)
+    assert '# TYPE iterfilesystem_walker_dirs_total counter\n' in text
+    assert '# TYPE iterfilesystem_collect_entries gauge\n' in text
+    assert parse_samples(text, openmetrics=False)['iterfilesystem_walker_dirs_total'] == '2'
+
+    text = MetricsExporter().render(stats_helper)
+    assert '# TYPE iterfilesystem_walker_dirs counter\n' in text
+    assert parse_samples(text)['iterfilesystem_walker_dirs_total'] == '2'
+
+
+def test_rates():
+    stats_helper = StatisticHelper()
+    exporter = MetricsExporter()
+    exporter._update_rates(stats_helper)
+
+    exporter.last_time -= 2  # fake the elapsed time
+    stats_helper.process_files = 100
+    stats_helper.process_file_size = 1000
+    exporter._update_rates(stats_helper)
+    assert 49 < exporter.entries_per_second <= 50
+    assert 490 < exporter.bytes_per_second <= 500
+
+    samples = parse_samples(exporter.render(stats_helper))
+    assert samples['iterfilesystem_processed_entries_total'] == '100'
+    assert 49 < float(samples['iterfilesystem_entries_per_second']) <= 50
+
+
+def test_textfile_exporter(tmp_path):
+    top_path = Path(tmp_path, 'top')
+    top_path.mkdir()
+    for no in range(10):
+        Path(top_path, f'file_{no}.txt').write_bytes(b'X' * no)
+
+    metrics_path = Path(tmp_path, 'iterfilesystem.prom')
+    process(FileSizes, top_path, update_interval_sec=0, metrics_exporter=TextfileMetricsExporter(path=metrics_path))
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['iterfilesystem.prom', 'top']
+    samples = parse_samples(metrics_path.read_text(), openmetrics=False)
+    assert samples['iterfilesystem_walker_files_total'] == '10'
+    assert samples['iterfilesystem_processed_entries_total'] == '10'
+    assert samples['iterfilesystem_processed_bytes_total'] == str(sum(range(10)))
+    assert samples['iterfilesystem_collect_entries'] == '10'
+    assert samples['iterfilesystem_done'] == '1'
+
+
+def test_http_exporter():
+    exporter = HttpMetricsExporter(port=0)
+    try:
+        stats_helper = StatisticHelper()
+        stats_helper.process_error_count = 3
+        exporter.update(stats_helper)
+
+        url = f'http://{exporter.host}:{exporter.port}/metrics'
+        request = urllib.request.Request(url, headers={'Accept': 'application/openmetrics-text'})
+        with urllib.request.urlopen(request) as response:
+            assert response.headers['Content-Type'].startswith('application/openmetrics-text')
+            samples = parse_samples(response.read().decode('UTF-8'))
+        assert samples['iterfilesystem_process_errors_total'] == '3'
+        assert samples['iterfilesystem_done'] == '0'
+
+        with urllib.request.urlopen(url) as response:
+            assert response.headers['Content-Type'] == 'text/plain; version=0.0.4; charset=utf-8'
+            samples = parse_samples(response.read().decode('UTF-8'), openmetrics=False)
+        assert samples['iterfilesystem_process_errors_total'] == '3'
+    finally:
+        exporter.close()
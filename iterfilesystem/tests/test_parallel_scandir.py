@@ -0,0 +1,75 @@
+import os
+from pathlib import Path
+
+import pytest
+
+# IterFilesystem
+from iterfilesystem.dir_entry import DirEntryRecord
+from iterfilesystem.parallel_scandir import ParallelScandirWalker
+from iterfilesystem.statistic_helper import StatisticHelper
+from iterfilesystem.tests import SKIP_PATTERNS, BaseTestCase, create_skip_tree, walk
+
+
+class TestParallelScandirWalker(BaseTestCase):
+    def test_ordered(self, tmp_path):
+        create_skip_tree(tmp_path)
+
+        expected_dir_entries, expected_stats = walk(tmp_path, **SKIP_PATTERNS)
+        expected_paths = [dir_entry.path for dir_entry in expected_dir_entries]
+
+        for max_prefetch in (0, 2, 1000):
+            dir_entries, stats_helper = walk(
+                tmp_path,
+                ScanDirClass=ParallelScandirWalker,
+                max_workers=4,
+                ordered=True,
+                max_prefetch=max_prefetch,
+                **SKIP_PATTERNS
+            )
+            assert [dir_entry.path for dir_entry in dir_entries] == expected_paths
+            assert dict(stats_helper.items()) == dict(expected_stats.items())
+
+        assert expected_stats.walker_dir_count == 5 + 5 * 3
+        assert expected_stats.walker_dir_skip_count == 5
+        assert expected_stats.walker_file_count == 5 * 3 * 4 + 5
+        assert expected_stats.walker_file_skip_count == 5 * 3
+
+    def test_unordered(self, tmp_path):
+        create_skip_tree(tmp_path)
+
+        expected_dir_entries, expected_stats = walk(tmp_path, **SKIP_PATTERNS)
+        expected_paths = [dir_entry.path for dir_entry in expected_dir_entries]
+        dir_entries, stats_helper = walk(
+            tmp_path, ScanDirClass=ParallelScandirWalker, max_workers=4, **SKIP_PATTERNS
+        )
+
+        assert sorted(dir_entry.path for dir_entry in dir_entries) == sorted(expected_paths)
+        assert dict(stats_helper.items()) == dict(expected_stats.items())
+
+    def test_dir_entries(self, tmp_path):
+        Path(tmp_path, 'one.txt').write_bytes(b'X')
+
+        walker = ParallelScandirWalker(top_path=tmp_path, stats_helper=StatisticHelper())
+        dir_entries = list(walker)
+        assert len(dir_entries) == 1
+        assert isinstance(dir_entries[0], os.DirEntry)
+        assert dir_entries[0].stat().st_size == 1
+        assert walker.stats_helper.walker_scandir_count == 1
+
+    def test_stat_entries(self, tmp_path):
+        create_skip_tree(tmp_path)
+
+        for ordered in (True, False):
+            dir_entries, stats_helper = walk(
+                tmp_path, ScanDirClass=ParallelScandirWalker, ordered=ordered, stat_entries=True, **SKIP_PATTERNS
+            )
+            assert len(dir_entries) == 20 + 65
+            assert all(isinstance(dir_entry, DirEntryRecord) for dir_entry in dir_entries)
+            assert stats_helper.walker_scandir_count == 1 + 20
+            assert stats_helper.walker_stat_entries_count == 65
+
+    def test_not_supported(self, tmp_path):
+        with pytest.raises(NotImplementedError):
+            ParallelScandirWalker(top_path=tmp_path, stats_helper=StatisticHelper(), max_pending_entries=1000)
+        with pytest.raises(NotImplementedError):
+            ParallelScandirWalker(top_path=tmp_path, stats_helper=StatisticHelper(), shard_count=2, shard_index=0)
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+# IterFilesystem
+from iterfilesystem.example import CalcFilesystemSHA512
+from iterfilesystem.partitioner import (
+    SubtreeTotals,
+    create_shard_plan,
+    get_subtree_totals_path,
+    read_shard_plan,
+    write_shard_plan
+)
+from iterfilesystem.tests import create_tree, process, walk
+
+
+def create_partitioner_tree(top_path):
+    """
+    One directory with a few big files and some directories with small files.
+    """
+    Path(top_path, 'video').mkdir(parents=True)
+    for no in range(6):
+        Path(top_path, 'video', f'movie_{no}.mkv').write_bytes(b'X' * 100_000)
+
+    create_tree(top_path, dir_count=5, sub_count=1, file_count=10, content=lambda *numbers: b'X' * 1000)
+
+
+def get_shard_sizes(top_path, shard_count, shard_plan):
+    shard_sizes = []
+    for shard_index in range(shard_count):
+        dir_entries, _ = walk(top_path, shard_count=shard_count, shard_index=shard_index, shard_plan=shard_plan)
+        shard_sizes.append(sum(dir_entry.stat().st_size for dir_entry in dir_entries if dir_entry.is_file()))
+    return shard_sizes
+
+
+@pytest.mark.parametrize('single_walk, wait', ((False, True), (False, False), (True, False)))
+def test_collect_subtree_totals(tmp_path, monkeypatch, single_walk, wait):
+    top_path = Path(tmp_path, 'tree')
+    create_partitioner_tree(top_path)
+    subtree_totals_path = Path(tmp_path, 'totals', 'subtree_totals.json')
+
+    # A slow save: Without 'wait' the collect process must not be terminated before it's done:
+    save = SubtreeTotals.save
+
+    def slow_save(self, path):
+        time.sleep(0.5)
+        save(self, path)
+
+    monkeypatch.setattr(SubtreeTotals, 'save', slow_save)
+
+    _, stats_helper = process(
+        CalcFilesystemSHA512,
+        top_path,
+        single_walk=single_walk,
+        wait=wait,
+        subtree_totals_path=subtree_totals_path,
+    )
+
+    subtree_totals = SubtreeTotals.load(subtree_totals_path)
+    assert subtree_totals.root[0] == stats_helper.process_file_size == 650_000
+    assert subtree_totals.root[1] == 1 + 6 + 5 * (2 + 10)
+    if wait:
+        assert stats_helper.collect_dir_item_count == subtree_totals.root[1]
+    assert subtree_totals.root[2]['video'][:2] == [600_000, 6]
+    assert subtree_totals.root[2]['dir_0'][2]['sub_0'][:2] == [10_000, 10]
+
+
+def test_size_balanced_plan(tmp_path):
+    create_partitioner_tree(tmp_path)
+    subtree_totals = SubtreeTotals(top_path=tmp_path, file_unit_size=50_000)
+    dir_entries, _ = walk(tmp_path)
+    for dir_entry in dir_entries:
+        subtree_totals.add(dir_entry.path, dir_entry.stat().st_size if dir_entry.is_file() else 0)
+
+    shard_plan = create_shard_plan(subtree_totals, shard_count=3, item_cost=0)
+    assert shard_plan[('video', 'movie_0.mkv')] != shard_plan[('video', 'movie_1.mkv')]
+
+    plan_path = Path(tmp_path.parent, f'{tmp_path.name}_plan.json')
+    write_shard_plan(plan_path, shard_plan)
+    assert read_shard_plan(plan_path) == shard_plan
+
+    shard_sizes = get_shard_sizes(tmp_path, shard_count=3, shard_plan=shard_plan)
+    assert sum(shard_sizes) == 650_000
+    assert max(shard_sizes) - min(shard_sizes) <= 10_000
+
+    # Without a plan, the whole video directory is in one shard:
+    assert max(get_shard_sizes(tmp_path, shard_count=3, shard_plan=None)) >= 600_000
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='POSIX only')
+def test_private_subtree_totals_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+
+    subtree_totals_path = get_subtree_totals_path(tmp_path)
+    assert subtree_totals_path.parent.stat().st_mode & 0o777 == 0o700
+
+    # e.g.: pre-created by another user:
+    subtree_totals_path.parent.chmod(0o777)
+    with pytest.raises(PermissionError):
+        get_subtree_totals_path(tmp_path)
@@ -0,0 +1,60 @@
+import io
+import json
+import logging
+import os
+from pathlib import Path
+
+# IterFilesystem
+from iterfilesystem.process_bar import JsonLinesProcessBar, NoopProcessBar
+from iterfilesystem.tests import FileSizes, process
+
+
+def process_files(tmp_path, **kwargs):
+    for no in range(10):
+        Path(tmp_path, f'file_{no}.txt').write_bytes(b'X' * no)
+    Path(tmp_path, 'error.txt').touch()
+
+    _, stats_helper = process(FileSizes, tmp_path, update_interval_sec=0, **kwargs)
+    return stats_helper
+
+
+def test_noop_process_bar(tmp_path, capsys, caplog):
+    with caplog.at_level(logging.ERROR):
+        stats_helper = process_files(tmp_path, ProcessBarClass=NoopProcessBar)
+
+    assert stats_helper.process_file_size == sum(range(10))
+    assert stats_helper.process_error_count == 1
+
+    captured = capsys.readouterr()
+    assert captured.out == ''
+    assert captured.err == ''
+
+    assert f'Error processing dir entry: {Path(tmp_path, "error.txt")}' in caplog.text
+    assert 'OSError: Test error' in caplog.text
+
+
+def test_json_lines_process_bar(tmp_path, capsys):
+    stream = io.StringIO()
+    stats_helper = process_files(tmp_path, ProcessBarClass=JsonLinesProcessBar, process_bar_kwargs=dict(stream=stream))
+    assert stats_helper.process_files == 11
+
+    captured = capsys.readouterr()
+    assert captured.out == ''
+    assert 'Current File' not in captured.err
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(records) >= 2
+    assert {record['event'] for record in records[:-1]} == {'progress'}
+
+    first = records[0]
+    assert set(first) == {
+        'event', 'elapsed', 'entries', 'total_entries', 'total_entries_done', 'bytes', 'total_bytes',
+        'total_bytes_done', 'entries_per_sec', 'bytes_per_sec', 'progress', 'eta', 'errors', 'current'
+    }
+    assert first['current'].startswith(str(tmp_path) + os.sep)
+
+    last = records[-1]
+    assert last['event'] == 'done'
+    assert last['entries'] == 11
+    assert last['bytes'] == sum(range(10))
+    assert last['errors'] == 1
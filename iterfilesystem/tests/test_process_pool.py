@@ -0,0 +1,85 @@
+import hashlib
+import logging
+from pathlib import Path
+
+# IterFilesystem
+from iterfilesystem.iter_scandir import ScandirWalker
+from iterfilesystem.process_pool import ProcessPoolIterFilesystem
+from iterfilesystem.tests import stats_helper2assertments, verbose_get_capsys
+
+
+class FileDigests(ProcessPoolIterFilesystem):
+    def start(self):
+        self.digests = {}
+        super().start()
+
+    @classmethod
+    def process_path(cls, path):
+        path = Path(path)
+        if path.is_dir():
+            return None, 0
+
+        data = path.read_bytes()
+        return hashlib.sha512(data).hexdigest(), len(data)
+
+    def merge_result(self, dir_entry, result):
+        if result is not None:
+            self.digests[dir_entry.name] = result
+
+
+def get_file_digests(top_path, **kwargs):
+    iter_fs = FileDigests(
+        ScanDirClass=ScandirWalker,
+        scan_dir_kwargs=dict(
+            top_path=top_path,
+            skip_dir_patterns=(),
+            skip_file_patterns=(),
+        ),
+        update_interval_sec=0.01,
+        **kwargs
+    )
+    stats_helper = iter_fs.process()
+    return iter_fs.digests, stats_helper
+
+
+def test_process_pool(tmp_path, caplog):
+    expected_digests = {}
+    for no in range(20):
+        data = b'X%i' % no
+        Path(tmp_path, f'file_{no:02}.txt').write_bytes(data)
+        expected_digests[f'file_{no:02}.txt'] = hashlib.sha512(data).hexdigest()
+    Path(tmp_path, 'sub_dir').mkdir()
+
+    with caplog.at_level(logging.DEBUG, logger="iterfilesystem"):
+        digests, stats_helper = get_file_digests(tmp_path, workers=2, max_pending=3)
+
+    stats_helper2assertments(stats_helper)
+
+    assert 'Worker starts with 2 processes' in caplog.text
+
+    assert digests == expected_digests
+    assert list(digests) == sorted(expected_digests)  # merged in walker order
+
+    assert stats_helper.abort is False
+    assert stats_helper.process_error_count == 0
+    assert stats_helper.process_files == 21
+    assert stats_helper.process_file_size == 10 * 2 + 10 * 3
+    assert stats_helper.walker_dir_count == 1
+    assert stats_helper.walker_file_count == 20
+
+
+def test_process_pool_error(tmp_path, capsys):
+    Path(tmp_path, 'file.txt').write_bytes(b'XX')
+    Path(tmp_path, 'broken_symlink').symlink_to(Path(tmp_path, 'does_not_exists'))
+
+    digests, stats_helper = get_file_digests(tmp_path, workers=1)
+
+    captured_out, captured_err = verbose_get_capsys(capsys)
+    assert 'Error processing dir entry' in captured_out
+    assert 'broken_symlink' in captured_out
+    assert 'FileNotFoundError' in captured_out
+
+    assert list(digests) == ['file.txt']
+    assert stats_helper.process_error_count == 1
+    assert stats_helper.process_files == 2
+    assert stats_helper.process_file_size == 2
@@ -0,0 +1,91 @@
+import os
+from pathlib import Path
+
+import pytest
+
+# IterFilesystem
+from iterfilesystem.example import CalcFilesystemSHA512
+from iterfilesystem.iter_scandir import ScandirWalker
+from iterfilesystem.read_ahead import ReadAheadWalker
+from iterfilesystem.statistic_helper import StatisticHelper
+from iterfilesystem.tests import create_tree, process, walk
+
+
+def create_read_ahead_tree(top_path):
+    create_tree(
+        top_path,
+        file_count=5,
+        content=lambda dir_no, sub_no, file_no: f'{dir_no}-{file_no}-'.encode('ASCII') * (file_no * 10),
+    )
+
+
+@pytest.mark.parametrize('workers, buffers_per_worker', ((1, 1), (3, 2)))
+def test_read_ahead_walker(tmp_path, workers, buffers_per_worker):
+    create_read_ahead_tree(tmp_path)
+    expected_dir_entries, _ = walk(tmp_path)
+    expected_paths = [dir_entry.path for dir_entry in expected_dir_entries]
+
+    stats_helper = StatisticHelper()
+    walker = ReadAheadWalker(
+        ScandirWalker(top_path=tmp_path, stats_helper=stats_helper),
+        workers=workers,
+        buffer_size=7,
+        buffers_per_worker=buffers_per_worker,
+    )
+    assert walker.stats_helper is stats_helper
+
+    paths = []
+    for no, dir_entry in enumerate(walker):
+        paths.append(dir_entry.path)
+        if not dir_entry.is_file() or no % 3 == 0:
+            # Skipped files must not block the reader threads
+            continue
+
+        content = b''.join(bytes(chunk) for chunk in walker.read_chunks(dir_entry))
+        assert content == Path(dir_entry.path).read_bytes()
+
+    assert paths == expected_paths
+    assert stats_helper.walker_file_count == 15
+
+
+def test_read_error(tmp_path):
+    for name in ('one.txt', 'two.txt', 'three.txt'):
+        Path(tmp_path, name).write_text(name)
+    dir_entries = sorted(os.scandir(tmp_path), key=lambda dir_entry: dir_entry.name)
+    Path(tmp_path, 'three.txt').unlink()
+
+    walker = ReadAheadWalker(dir_entries, workers=2, buffer_size=2, buffers_per_worker=1)
+    contents = {}
+    for dir_entry in walker:
+        try:
+            contents[dir_entry.name] = b''.join(bytes(chunk) for chunk in walker.read_chunks(dir_entry))
+        except FileNotFoundError:
+            contents[dir_entry.name] = None
+
+    assert contents == {'one.txt': b'one.txt', 'three.txt': None, 'two.txt': b'two.txt'}
+
+
+@pytest.mark.parametrize('tree_hash', (False, True))
+def test_calc_sha512_read_ahead(tmp_path, tree_hash):
+    create_read_ahead_tree(tmp_path)
+
+    hashes = []
+    for read_ahead in (False, True):
+        _, stats_helper = process(CalcFilesystemSHA512, tmp_path, tree_hash=tree_hash, read_ahead=read_ahead)
+        assert stats_helper.process_error_count == 0
+        assert stats_helper.process_file_size == sum(file_no * 10 * 4 for file_no in range(5)) * 3
+        hashes.append(stats_helper.hash)
+
+    assert hashes[0] == hashes[1]
+
+
+def test_read_ahead_and_hash_cache(tmp_path):
+    with pytest.raises(ValueError):
+        CalcFilesystemSHA512(
+            ScanDirClass=ScandirWalker,
+            scan_dir_kwargs=dict(top_path=tmp_path),
+            update_interval_sec=0.5,
+            tree_hash=True,
+            hash_cache=True,
+            read_ahead=True,
+        )
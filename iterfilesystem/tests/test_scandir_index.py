@@ -0,0 +1,146 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+# IterFilesystem
+from iterfilesystem.dir_entry import DirEntryRecord
+from iterfilesystem.iter_scandir import ScandirWalker
+from iterfilesystem.scandir_index import IndexedScandirWalker
+from iterfilesystem.statistic_helper import StatisticHelper
+from iterfilesystem.tests import BaseTestCase
+
+
+def set_dir_mtimes(top_path, mtime):
+    """
+    Directories changed in the last seconds are not stored in the index
+    """
+    for root, dirs, files in os.walk(top_path):
+        os.utime(root, (mtime, mtime))
+
+
+def walk(ScanDirClass, top_path, **kwargs):
+    stats_helper = StatisticHelper()
+    walker = ScanDirClass(
+        top_path=top_path,
+        stats_helper=stats_helper,
+        skip_dir_patterns=('skip_*',),
+        skip_file_patterns=('*.foo',),
+        **kwargs
+    )
+    dir_entries = list(walker)
+    return dir_entries, stats_helper
+
+
+class TestIndexedScandirWalker(BaseTestCase):
+    def test_index(self, tmp_path):
+        top_path = Path(tmp_path, 'top')
+        for dir_no in range(3):
+            sub_path = Path(top_path, f'dir_{dir_no}', 'sub')
+            os.makedirs(sub_path)
+            Path(sub_path, 'file.txt').write_bytes(b'X' * dir_no)
+            Path(sub_path, 'skip.foo').touch()
+            os.makedirs(Path(top_path, f'dir_{dir_no}', 'skip_dir'))
+        Path(top_path, 'symlink').symlink_to(Path(top_path, 'dir_1', 'sub', 'file.txt'))
+        set_dir_mtimes(top_path, time.time() - 60)
+
+        index_path = Path(tmp_path, 'index.sqlite3')
+
+        expected_dir_entries, expected_stats = walk(ScandirWalker, top_path)
+        expected_paths = [dir_entry.path for dir_entry in expected_dir_entries]
+
+        # First run: The index is empty
+        dir_entries, stats_helper = walk(IndexedScandirWalker, top_path, index_path=index_path)
+        assert [dir_entry.path for dir_entry in dir_entries] == expected_paths
+        assert all(isinstance(dir_entry, os.DirEntry) for dir_entry in dir_entries)
+        assert stats_helper.walker_index_hit_count == 0
+        assert stats_helper.walker_index_miss_count == 7
+        assert stats_helper.walker_file_count == expected_stats.walker_file_count
+        assert stats_helper.walker_dir_skip_count == 3
+        assert stats_helper.walker_file_skip_count == 3
+
+        # Second run: All directory listings comes from the index
+        dir_entries, stats_helper = walk(IndexedScandirWalker, top_path, index_path=index_path)
+        assert [dir_entry.path for dir_entry in dir_entries] == expected_paths
+        assert all(isinstance(dir_entry, DirEntryRecord) for dir_entry in dir_entries)
+        assert stats_helper.walker_index_hit_count == 7
+        assert stats_helper.walker_index_miss_count == 0
+        assert stats_helper.walker_dir_count == expected_stats.walker_dir_count
+        assert stats_helper.walker_file_count == expected_stats.walker_file_count
+        assert stats_helper.walker_dir_skip_count == 3
+        assert stats_helper.walker_file_skip_count == 3
+
+        for expected, dir_entry in zip(expected_dir_entries, dir_entries):
+            assert dir_entry.name == expected.name
+            assert dir_entry.inode() == expected.inode()
+            assert dir_entry.is_dir() == expected.is_dir()
+            assert dir_entry.is_file() == expected.is_file()
+            assert dir_entry.is_file(follow_symlinks=False) == expected.is_file(follow_symlinks=False)
+            assert dir_entry.is_symlink() == expected.is_symlink()
+            assert dir_entry.stat() == expected.stat()
+            assert dir_entry.stat(follow_symlinks=False) == expected.stat(follow_symlinks=False)
+            assert Path(dir_entry) == Path(expected)
+
+        # Change one directory and remove a other one:
+        Path(top_path, 'dir_0', 'sub', 'new.txt').touch()
+        shutil.rmtree(Path(top_path, 'dir_2'))
+        set_dir_mtimes(top_path, time.time() - 30)
+
+        expected_dir_entries, expected_stats = walk(ScandirWalker, top_path)
+        dir_entries, stats_helper = walk(IndexedScandirWalker, top_path, index_path=index_path)
+        assert [dir_entry.path for dir_entry in dir_entries] == [
+            dir_entry.path for dir_entry in expected_dir_entries
+        ]
+        assert stats_helper.walker_file_count == expected_stats.walker_file_count
+        assert stats_helper.walker_index_miss_count == 5  # utime() changes the ctime, too
+        assert stats_helper.walker_index_hit_count == 0
+
+        walker = IndexedScandirWalker(top_path=top_path, stats_helper=StatisticHelper(), index_path=index_path)
+        list(walker)
+        assert walker.stats_helper.walker_index_hit_count == 5
+
+        # The removed directories are pruned from the index
+        # (The last walker was without skip patterns):
+        connection = sqlite3.connect(str(index_path))
+        paths = sorted(row[0] for row in connection.execute('SELECT path FROM directories'))
+        connection.close()
+        assert [Path(path).relative_to(top_path).as_posix() for path in paths] == [
+            '.', 'dir_0', 'dir_0/skip_dir', 'dir_0/sub', 'dir_1', 'dir_1/skip_dir', 'dir_1/sub'
+        ]
+
+    def test_racy_directories(self, tmp_path):
+        top_path = Path(tmp_path, 'top')
+        top_path.mkdir()
+        Path(top_path, 'file.txt').touch()
+
+        index_path = Path(tmp_path, 'index.sqlite3')
+        for no in range(2):
+            dir_entries, stats_helper = walk(IndexedScandirWalker, top_path, index_path=index_path)
+            assert [dir_entry.name for dir_entry in dir_entries] == ['file.txt']
+            assert stats_helper.walker_index_hit_count == 0
+            assert stats_helper.walker_index_miss_count == 1
+
+    def test_default_index_path(self, tmp_path):
+        walker = IndexedScandirWalker(top_path=tmp_path, stats_helper=StatisticHelper())
+        assert walker.index_path.name == 'scandir_index.sqlite3'
+        assert walker.index_path.parent.is_dir()
+        assert walker.index_path.parent.name.startswith('iterfilesystem_')
+        shutil.rmtree(walker.index_path.parent)
+
+    @pytest.mark.skipif(not hasattr(os, 'getuid'), reason='POSIX only')
+    def test_private_index_directory(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(tempfile, 'tempdir', str(Path(tmp_path, 'temp')))
+        Path(tmp_path, 'temp').mkdir()
+
+        walker = IndexedScandirWalker(top_path=tmp_path, stats_helper=StatisticHelper())
+        index_dir = walker.index_path.parent
+        assert index_dir.stat().st_mode & 0o777 == 0o700
+
+        # e.g.: pre-created by another user:
+        index_dir.chmod(0o777)
+        with pytest.raises(PermissionError):
+            IndexedScandirWalker(top_path=tmp_path, stats_helper=StatisticHelper())
@@ -1,7 +1,12 @@
+import inspect
 import os
+import sys
 from pathlib import Path
 
+import pytest
+
 # IterFilesystem
+from iterfilesystem.dir_entry import DirEntryRecord
 from iterfilesystem.iter_scandir import ScandirWalker
 from iterfilesystem.statistic_helper import StatisticHelper
 from iterfilesystem.tests import BaseTestCase
@@ -91,3 +96,160 @@ class TestScanDirWalk(BaseTestCase):
         assert stats_helper.walker_file_count == 2
         assert stats_helper.walker_dir_skip_count == 2
         assert stats_helper.walker_file_skip_count == 0
+
+    def test_stat_entries(self, tmp_path):
+        os.makedirs(Path(tmp_path, 'one'), exist_ok=True)
+        Path(tmp_path, 'one', 'one.txt').write_bytes(b'X')
+        Path(tmp_path, 'two.txt').write_bytes(b'XX')
+        Path(tmp_path, 'symlink').symlink_to(Path(tmp_path, 'two.txt'))
+
+        stats_helper = StatisticHelper()
+        sw = ScandirWalker(
+            top_path=tmp_path,
+            stats_helper=stats_helper,
+            stat_entries=True,
+        )
+        dir_entries = list(sw)
+        assert [dir_entry.name for dir_entry in dir_entries] == ['one', 'one.txt', 'symlink', 'two.txt']
+        assert all(isinstance(dir_entry, DirEntryRecord) for dir_entry in dir_entries)
+
+        assert stats_helper.walker_scandir_count == 2
+        assert stats_helper.walker_stat_entries_count == 3  # only non directories
+
+        one, one_txt, symlink, two_txt = dir_entries
+        assert one.is_dir() is True
+        assert one_txt.is_file() is True
+        assert one_txt.stat().st_size == 1
+        assert two_txt.stat().st_size == 2
+        assert symlink.is_symlink() is True
+        assert symlink.is_file() is True
+        assert symlink.is_file(follow_symlinks=False) is False
+        assert symlink.stat().st_size == 2
+
+        # The stat results are cached:
+        assert one_txt.stat() is one_txt.stat()
+        assert symlink.stat() is symlink.stat()
+
+        stats_helper = StatisticHelper()
+        sw = ScandirWalker(top_path=tmp_path, stats_helper=stats_helper)
+        assert all(isinstance(dir_entry, os.DirEntry) for dir_entry in sw)
+        assert stats_helper.walker_scandir_count == 2
+        assert stats_helper.walker_stat_entries_count == 0
+
+    def test_order(self, tmp_path):
+        for dir_no in range(3):
+            for file_no in range(10):
+                Path(tmp_path, f'dir_{dir_no}', f'sub_{file_no % 2}').mkdir(parents=True, exist_ok=True)
+                Path(tmp_path, f'dir_{dir_no}', f'sub_{file_no % 2}', f'file_{file_no}.txt').touch()
+                Path(tmp_path, f'dir_{dir_no}', f'skip_{file_no}.foo').touch()
+
+        def walk(order):
+            stats_helper = StatisticHelper()
+            sw = ScandirWalker(
+                top_path=tmp_path,
+                stats_helper=stats_helper,
+                skip_dir_patterns=('sub_1',),
+                skip_file_patterns=('*.foo',),
+                order=order,
+            )
+            return [dir_entry.path for dir_entry in sw], dict(stats_helper.items())
+
+        paths, stats = walk(order='name')
+        assert len(paths) == 3 + 3 + 3 * 5
+        assert paths == sorted(paths)
+        assert stats['walker_dir_skip_count'] == 3
+        assert stats['walker_file_skip_count'] == 30
+
+        for order in ('native', 'inode'):
+            order_paths, order_stats = walk(order=order)
+            assert sorted(order_paths) == paths
+            assert order_stats == stats
+
+            # The children of a directory follows directly after the directory:
+            for no, path in enumerate(order_paths):
+                if Path(path).name == 'sub_0':
+                    assert all(p.startswith(path + os.sep) for p in order_paths[no + 1:no + 6])
+
+        inode_paths, _ = walk(order='inode')
+        sub_dir = str(Path(tmp_path, 'dir_0', 'sub_0'))
+        children = [path for path in inode_paths if path.startswith(sub_dir + os.sep)]
+        assert children == sorted(children, key=lambda path: os.lstat(path).st_ino)
+
+    def test_unknown_order(self, tmp_path):
+        with pytest.raises(ValueError) as err:
+            ScandirWalker(top_path=tmp_path, stats_helper=StatisticHelper(), order='size')
+        assert str(err.value) == "Unknown order 'size' (choose from: name, native, inode)"
+
+    def test_deep_tree(self, tmp_path):
+        depth = 200
+        path = os.path.join(tmp_path, *['d'] * depth)
+        os.makedirs(path)
+        Path(path, 'deepest.txt').touch()
+
+        stats_helper = StatisticHelper()
+        walker = ScandirWalker(top_path=tmp_path, stats_helper=stats_helper)
+
+        # The walk doesn't need a stack frame per directory level:
+        recursion_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(len(inspect.stack()) + 50)
+        try:
+            dir_entries = list(walker)
+        finally:
+            sys.setrecursionlimit(recursion_limit)
+
+        assert len(dir_entries) == depth + 1
+        assert dir_entries[-1].name == 'deepest.txt'
+        assert stats_helper.walker_dir_count == depth
+        assert stats_helper.walker_file_count == 1
+
+    def test_max_pending_entries(self, tmp_path):
+        for dir_no in range(4):
+            for sub_no in range(4):
+                sub_path = Path(tmp_path, f'dir_{dir_no}', f'sub_{sub_no}')
+                os.makedirs(sub_path)
+                for file_no in range(5):
+                    Path(sub_path, f'file_{file_no}.txt').touch()
+                Path(sub_path, 'skip.foo').touch()
+            Path(tmp_path, f'dir_{dir_no}', 'skip_dir').mkdir()
+            Path(tmp_path, f'file_{dir_no}.txt').touch()
+
+        class PendingCountWalker(ScandirWalker):
+            max_count = 0
+
+            def _limit_pending_entries(self, stack):
+                super()._limit_pending_entries(stack)
+                # The running counter is up to date:
+                assert self.pending_count == sum(
+                    len(pending_dir.entries) for pending_dir in stack if pending_dir.entries
+                )
+                count = sum(len(pending_dir.entries) for pending_dir in stack[:-1] if pending_dir.entries)
+                self.max_count = max(self.max_count, count)
+
+        def walk(order, max_pending_entries):
+            stats_helper = StatisticHelper()
+            walker = PendingCountWalker(
+                top_path=tmp_path,
+                stats_helper=stats_helper,
+                skip_dir_patterns=('skip_*',),
+                skip_file_patterns=('*.foo',),
+                order=order,
+                max_pending_entries=max_pending_entries,
+            )
+            paths = [dir_entry.path for dir_entry in walker]
+            return paths, stats_helper, walker.max_count
+
+        for order in ('name', 'inode'):
+            expected_paths, expected_stats, max_count = walk(order, max_pending_entries=1000)
+            assert max_count > 3
+            assert expected_stats.walker_scandir_count == 1 + 4 + 4 * 4
+
+            paths, stats_helper, max_count = walk(order, max_pending_entries=3)
+            assert paths == expected_paths
+            assert max_count == 0
+            assert stats_helper.walker_dir_count == expected_stats.walker_dir_count == 4 + 4 * 4
+            assert stats_helper.walker_dir_skip_count == expected_stats.walker_dir_skip_count == 4
+            assert stats_helper.walker_file_count == expected_stats.walker_file_count == 4 + 4 * 4 * 5
+            assert stats_helper.walker_file_skip_count == expected_stats.walker_file_skip_count == 4 * 4
+
+            # The dropped listings are read again:
+            assert stats_helper.walker_scandir_count > expected_stats.walker_scandir_count
@@ -0,0 +1,98 @@
+from pathlib import Path
+
+import pytest
+
+# IterFilesystem
+from iterfilesystem.example import CalcFilesystemSHA512
+from iterfilesystem.iter_scandir import ScandirWalker
+from iterfilesystem.sharding import merge_shard_files, run_shards_locally, write_shard_file
+from iterfilesystem.tests import create_tree, process, walk, walk_parts
+
+
+def create_shard_tree(top_path):
+    create_tree(top_path, dir_count=5, sub_count=3, file_count=2)
+    Path(top_path, 'top.txt').write_text('top')
+    Path(top_path, 'skip.foo').touch()
+
+
+@pytest.mark.parametrize('shard_plan', (
+    None,
+    {('dir_0', 'sub_0'): 0, ('dir_0', 'sub_1'): 1, ('dir_0', 'sub_2'): 2, ('dir_3', 'sub_1', 'file_1.txt'): 1},
+))
+def test_walk_shards(tmp_path, shard_plan):
+    create_shard_tree(tmp_path)
+    all_paths, all_stats = walk_parts(tmp_path, skip_file_patterns=('*.foo',))
+
+    shard_paths = []
+    shard_stats = []
+    for shard_index in range(3):
+        paths, stats_helper = walk_parts(
+            tmp_path, skip_file_patterns=('*.foo',), shard_count=3, shard_index=shard_index, shard_plan=shard_plan
+        )
+        assert paths
+        assert paths == [parts for parts in all_paths if parts in paths]  # same order
+        shard_paths.append(paths)
+        shard_stats.append(stats_helper)
+
+    assert sorted(sum(shard_paths, [])) == sorted(all_paths)  # each entry in exactly one shard
+    assert sum(stats.walker_file_count for stats in shard_stats) == all_stats.walker_file_count
+    assert sum(stats.walker_dir_count for stats in shard_stats) == all_stats.walker_dir_count
+    assert sum(stats.walker_file_skip_count for stats in shard_stats) == all_stats.walker_file_skip_count
+
+    if shard_plan:
+        for parts, shard_index in shard_plan.items():
+            assert parts in shard_paths[shard_index]
+
+
+def test_invalid_shard(tmp_path):
+    with pytest.raises(ValueError):
+        walk(tmp_path, shard_count=2, shard_index=2)
+    with pytest.raises(ValueError):
+        walk(tmp_path, shard_count=2, shard_index=0, shard_plan={('foo',): 5})
+
+
+def test_run_shards_locally(tmp_path):
+    top_path = Path(tmp_path, 'tree')
+    create_shard_tree(top_path)
+    _, full_stats = process(CalcFilesystemSHA512, top_path, tree_hash=True)
+
+    stats_helper, merged_hash = run_shards_locally(
+        CalcFilesystemSHA512,
+        shard_count=3,
+        ScanDirClass=ScandirWalker,
+        scan_dir_kwargs=dict(top_path=top_path),
+        update_interval_sec=0.5,
+        wait=True,
+        tree_hash=True,
+    )
+    assert stats_helper.abort is False
+    assert stats_helper.process_files == full_stats.process_files
+    assert stats_helper.process_file_size == full_stats.process_file_size
+    assert stats_helper.walker_dir_count == full_stats.walker_dir_count
+    assert stats_helper.collect_dir_item_count == full_stats.collect_dir_item_count
+    assert len(merged_hash) == 128
+
+    # The same result via shard files, e.g.: from multiple machines:
+    shard_files = []
+    for shard_index in range(3):
+        calc_sha, shard_stats = process(
+            CalcFilesystemSHA512,
+            top_path,
+            scan_dir_kwargs=dict(shard_count=3, shard_index=shard_index),
+            tree_hash=True,
+        )
+
+        shard_file = Path(tmp_path, f'shard_{shard_index}.json')
+        write_shard_file(
+            shard_file, shard_count=3, shard_index=shard_index,
+            stats_helper=shard_stats, result=calc_sha.get_shard_result()
+        )
+        shard_files.append(shard_file)
+
+    file_stats, file_hash = merge_shard_files(shard_files, IterFilesystemClass=CalcFilesystemSHA512)
+    assert file_hash == merged_hash
+    assert file_stats.process_files == full_stats.process_files
+
+    with pytest.raises(ValueError) as err:
+        merge_shard_files(shard_files[:2], IterFilesystemClass=CalcFilesystemSHA512)
+    assert str(err.value) == 'Missing shards: 2'
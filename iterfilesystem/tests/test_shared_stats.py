@@ -0,0 +1,54 @@
+from multiprocessing import Process
+
+import pytest
+
+# IterFilesystem
+from iterfilesystem.constants import (
+    COLLECT_COUNT_DONE,
+    COLLECT_COUNT_DURATION,
+    COLLECT_SIZE_DONE,
+    COLLECT_SIZE_DURATION,
+    DIR_ITEM_COUNT,
+    FILE_SIZE
+)
+from iterfilesystem.shared_stats import SharedStats
+from iterfilesystem.statistic_helper import StatisticHelper
+
+
+def collect(shared_stats):
+    shared_stats[DIR_ITEM_COUNT] = 123
+    shared_stats[COLLECT_COUNT_DONE] = True
+    shared_stats[COLLECT_COUNT_DURATION] = 0.5
+    shared_stats[FILE_SIZE] = 10 * 1024 ** 5  # 10 PiB
+
+
+def test_shared_between_processes():
+    shared_stats = SharedStats()
+
+    process = Process(target=collect, args=(shared_stats,))
+    process.start()
+    process.join()
+
+    assert dict(shared_stats.items()) == {
+        DIR_ITEM_COUNT: 123,
+        COLLECT_COUNT_DONE: True,
+        COLLECT_COUNT_DURATION: 0.5,
+        FILE_SIZE: 10 * 1024 ** 5,
+        COLLECT_SIZE_DONE: False,
+        COLLECT_SIZE_DURATION: None,
+    }
+
+    stats_helper = StatisticHelper()
+    stats_helper.update_from_multiprocessing_stats(shared_stats)
+    assert stats_helper.collect_dir_item_count == 123
+    assert stats_helper.collect_dir_item_count_done is True
+    assert stats_helper.collect_dir_item_duration == 0.5
+    assert stats_helper.collect_file_size == 10 * 1024 ** 5
+    assert stats_helper.collect_file_size_done is False
+    assert stats_helper.collect_file_size_duration is None
+
+
+def test_unknown_key():
+    shared_stats = SharedStats()
+    with pytest.raises(KeyError):
+        shared_stats['foo'] = 1
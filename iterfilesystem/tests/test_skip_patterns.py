@@ -0,0 +1,71 @@
+import fnmatch
+import itertools
+from pathlib import Path
+
+# IterFilesystem
+from iterfilesystem.benchmark.skip_patterns import BUILD_TREE_SKIP_PATTERNS
+from iterfilesystem.iter_scandir import ScandirWalker
+from iterfilesystem.skip_patterns import SkipPatterns
+from iterfilesystem.statistic_helper import StatisticHelper
+
+NAMES = (
+    '', '.', '..', '.git', 'build', 'Build', 'BUILD', 'builds', 'Build123', 'foo.egg-info', 'egg-info',
+    'tmp', 'tmp1', 'tmp12', 'foo.py', 'foo.pyc', 'foo.pyd', 'foo.pyx', 'file~', 'foo.min.js', 'a[b]',
+    'ab', 'a*b', 'a?b', 'line\nbreak', 'Thumbs.db', 'thumbs.db', 'ümlaut', 'node_modules',
+)
+PATTERNS = BUILD_TREE_SKIP_PATTERNS + ('a[b]', 'a[!x]', '[', 'a[*]b', 'a?b', 'line*', 'ümlaut', '*')
+
+
+def test_same_semantic_as_fnmatch():
+    for pattern_count in (1, 2):
+        for patterns in itertools.combinations(PATTERNS, pattern_count):
+            skip_patterns = SkipPatterns(patterns)
+            for name in NAMES:
+                expected = any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+                assert skip_patterns.matches(name) == expected, f'{name!r} with {patterns!r}'
+
+
+def test_build_tree_patterns():
+    skip_patterns = SkipPatterns(BUILD_TREE_SKIP_PATTERNS)
+    for name in NAMES:
+        expected = any(fnmatch.fnmatch(name, pattern) for pattern in BUILD_TREE_SKIP_PATTERNS)
+        assert skip_patterns.matches(name) == expected, name
+
+
+def test_walker_compiles_patterns(tmp_path):
+    walker = ScandirWalker(
+        top_path=tmp_path,
+        stats_helper=StatisticHelper(),
+        skip_dir_patterns=['.*', 'build'],
+        skip_file_patterns=(),
+    )
+    assert isinstance(walker.skip_dir_patterns, SkipPatterns)
+    assert walker.skip_dir_patterns == ('.*', 'build')
+    assert walker.skip_dir_patterns.literals == {'build'}
+
+    assert walker.fnmatches(dir_item_name='.git', patterns=walker.skip_dir_patterns) is True
+    assert walker.fnmatches(dir_item_name='.git', patterns=('foo', '.g?t')) is True
+    assert walker.fnmatches(dir_item_name='foo', patterns=walker.skip_dir_patterns) is False
+
+
+def test_overwritten_pattern_hooks(tmp_path):
+    for name in ('.git', 'build', 'src'):
+        Path(tmp_path, name).mkdir()
+        Path(tmp_path, name, 'file.txt').touch()
+    Path(tmp_path, 'skip.tmp').touch()
+
+    class PlainPatternsWalker(ScandirWalker):
+        def get_skip_dir_patterns(self, skip_dir_patterns):
+            return ('.*',)  # A plain tuple, as before the SkipPatterns
+
+        def get_skip_file_patterns(self, skip_file_patterns):
+            return ['*.tmp']
+
+        def fnmatches(self, dir_item_name, patterns):
+            if dir_item_name == 'build':
+                return True
+            return super().fnmatches(dir_item_name, patterns)
+
+    walker = PlainPatternsWalker(top_path=tmp_path, stats_helper=StatisticHelper())
+    paths = sorted(Path(dir_entry.path).relative_to(tmp_path).as_posix() for dir_entry in walker)
+    assert paths == ['src', 'src/file.txt']
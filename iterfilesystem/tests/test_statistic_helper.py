@@ -0,0 +1,71 @@
+import pickle
+
+# IterFilesystem
+from iterfilesystem.statistic_helper import FIELD_NAMES, StatisticHelper
+
+
+def create_stats(no, abort):
+    stats_helper = StatisticHelper()
+    stats_helper.walker_file_count = no * 10
+    stats_helper.process_file_size = no * 1000
+    stats_helper.collect_file_size_done = no != 2
+    stats_helper.collect_file_size_duration = no * 0.5
+    stats_helper.abort = abort
+    stats_helper.hash = f'hash {no}'
+    stats_helper.big_file_count = no
+    return stats_helper
+
+
+def test_merge_is_associative():
+    stats1, stats2, stats3 = create_stats(1, False), create_stats(2, None), create_stats(3, False)
+
+    left = stats1.merge(stats2).merge(stats3)
+    right = stats1.merge(stats2.merge(stats3))
+    assert dict(left.items()) == dict(right.items())
+
+    assert left.walker_file_count == 60
+    assert left.process_file_size == 6000
+    assert left.collect_file_size_done is False
+    assert left.collect_file_size_duration == 1.5
+    assert left.abort is None
+    assert left.big_file_count == 6
+    assert not hasattr(left, 'hash')  # not mergeable
+
+    assert stats1.merge(stats3).abort is False
+    assert stats1.merge(create_stats(4, True)).abort is True
+
+
+def test_snapshot_and_delta():
+    stats_helper = create_stats(1, None)
+    snapshot = stats_helper.snapshot()
+    assert len(snapshot) == len(FIELD_NAMES)
+
+    stats_helper.walker_file_count += 5
+    stats_helper.process_file_size += 123
+    delta = stats_helper.delta(snapshot)
+    assert delta['walker_file_count'] == 5
+    assert delta['process_file_size'] == 123
+    assert delta['process_files'] == 0
+    assert 'abort' not in delta
+
+
+def test_bytes_round_trip():
+    stats_helper = create_stats(3, True)
+    stats_helper.process_files = 2 ** 40
+
+    data = stats_helper.to_bytes()
+    assert len(data) < len(pickle.dumps(stats_helper))
+
+    restored = StatisticHelper.from_bytes(data)
+    assert restored.snapshot() == stats_helper.snapshot()
+    assert restored.collect_dir_item_duration is None
+    assert restored.abort is True
+    assert not hasattr(restored, 'hash')  # only the schema values
+
+
+def test_items():
+    stats_helper = create_stats(1, None)
+    items = dict(stats_helper.items())
+    assert tuple(items)[:len(FIELD_NAMES)] == FIELD_NAMES
+    assert items['hash'] == 'hash 1'
+    assert 'items' not in items
@@ -2,7 +2,8 @@ import tempfile
 from pathlib import Path
 
 # IterFilesystem
-from iterfilesystem.utils import get_persist_temp_path
+from iterfilesystem import utils
+from iterfilesystem.utils import AdaptiveUpdateInterval, UpdateInterval, get_persist_temp_path
 
 
 def test_get_persist_temp_path():
@@ -13,31 +14,63 @@ def test_get_persist_temp_path():
     assert persist_path == Path(tempfile.gettempdir(), 'iterfilesystem_QLJEE')
 
 
-def verbose_get_capsys(capsys):
-    captured = capsys.readouterr()
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.reads = 0
 
-    captured_out = captured.out
-    print('_' * 100)
-    print('Captured stdout:')
-    print(captured_out)
-    print('-' * 100)
+    def __call__(self):
+        self.reads += 1
+        return self.now
 
-    captured_err = captured.err
-    print('_' * 100)
-    print('Captured stderr:')
-    print(captured_err)
-    print('-' * 100)
-    return captured_out, captured_err
 
+def test_update_interval_calibration(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(utils, 'default_timer', clock)
 
-def stats_helper2assertments(stats_helper):
-    for key, value in stats_helper.items():
-        if 'duration' in key:
-            continue
+    update_interval = AdaptiveUpdateInterval(interval=1)
+    assert update_interval.check_every == 1
 
-        print(f'assert stats_helper.{key} == {value}')
+    # Fast evaluations -> the clock is read less often:
+    assert not any(bool(update_interval) for _ in range(10000))
+    assert update_interval.check_every == AdaptiveUpdateInterval.MAX_CHECK_EVERY
+    assert clock.reads < 100
 
-    print(
-        f'assert stats_helper.get_walker_dir_item_count()'
-        f' == {stats_helper.get_walker_dir_item_count()}'
-    )
+    # The update is delayed by at most 'check_every' evaluations:
+    clock.now += 1
+    assert any(bool(update_interval) for _ in range(AdaptiveUpdateInterval.MAX_CHECK_EVERY))
+    assert not update_interval
+
+    # Slow evaluations -> the clock is read on every evaluation:
+    for _ in range(AdaptiveUpdateInterval.MAX_CHECK_EVERY):
+        clock.now += 0.2
+        bool(update_interval)
+    assert update_interval.check_every == 1
+
+    reads = clock.reads
+    clock.now += 1
+    assert update_interval
+    assert clock.reads == reads + 1
+
+
+def test_update_interval_reads_clock_every_time(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(utils, 'default_timer', clock)
+
+    update_interval = UpdateInterval(interval=1)
+    assert not any(bool(update_interval) for _ in range(100))
+    assert clock.reads == 101
+
+    # A slow caller gets the update on the next evaluation:
+    clock.now += 1
+    assert update_interval
+    assert not update_interval
+
+
+def test_update_interval_zero():
+    update_interval = AdaptiveUpdateInterval(interval=0)
+    assert all(bool(update_interval) for _ in range(100))
+    assert update_interval.check_every == 1
+
+    update_interval = UpdateInterval(interval=0)
+    assert all(bool(update_interval) for _ in range(100))
@@ -0,0 +1,37 @@
+import hashlib
+
+
+class TreeHash:
+    """
+    Combine the digests of single files to one hash, e.g.: to use cached file digests.
+
+    The file digests are collected in blocks and every full block is hashed to one block digest.
+    So the state is small and can be pickled (a hashlib object can't).
+
+    >>> tree_hash = TreeHash(block_size=2)
+    >>> for data in (b'one', b'two', b'three'):
+    ...     tree_hash.update(hashlib.sha512(data).digest())
+    >>> len(tree_hash.block_digests), len(tree_hash.digests)
+    (1, 1)
+    >>> tree_hash.hexdigest()[:32]
+    '1ed592de8356ab618fa92d56e3207f3d'
+    """
+
+    def __init__(self, name='sha512', block_size=1024):
+        self.name = name
+        self.block_size = block_size
+        self.block_digests = []
+        self.digests = []
+
+    def _hash_digests(self, digests):
+        return hashlib.new(self.name, b''.join(digests)).digest()
+
+    def update(self, digest):
+        self.digests.append(digest)
+        if len(self.digests) >= self.block_size:
+            self.block_digests.append(self._hash_digests(self.digests))
+            self.digests = []
+
+    def hexdigest(self):
+        block_digests = self.block_digests + [self._hash_digests(self.digests)]
+        return hashlib.new(self.name, b''.join(block_digests)).hexdigest()
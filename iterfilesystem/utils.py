@@ -1,5 +1,6 @@
 import base64
 import hashlib
+import os
 import tempfile
 from pathlib import Path
 from timeit import default_timer
@@ -37,12 +38,16 @@ def shorten(text, width=30, placeholder='...'):
 
 def string2hash(text):
     """
+    Returns a short hash that can be used in a file name.
+
     >>> string2hash(text='foobar')
     'ClAmH'
+    >>> string2hash(text='seed 5')  # not '6/0y1'
+    '6_0y1'
     """
     h = hashlib.sha512()
     h.update(bytes(text, encoding='UTF-8'))
-    base64_bytes = base64.b64encode(h.digest())[:5]
+    base64_bytes = base64.urlsafe_b64encode(h.digest())[:5]
     return base64_bytes.decode('UTF-8')
 
 
@@ -52,8 +57,35 @@ def get_persist_temp_path(*, seed):
     return persist_path
 
 
+def check_owner(path, *, name):
+    """
+    Raise PermissionError if the path is not owned by us or writeable by others:
+    The temp directory is shared with other users.
+    """
+    if not hasattr(os, 'getuid'):
+        # Windows: The temp directory is per user
+        return
+
+    path_stat = Path(path).stat()
+    if path_stat.st_uid != os.getuid() or path_stat.st_mode & 0o022:
+        raise PermissionError(f'{name} {path} is not owned by us or writeable by others!')
+
+
+def get_private_temp_path(*, seed):
+    """
+    Create the persist temp path only accessible by us.
+    A directory that was created by another user is not used.
+    """
+    persist_path = get_persist_temp_path(seed=seed)
+    persist_path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    check_owner(persist_path, name='Temp directory')
+    return persist_path
+
+
 class UpdateInterval:
     """
+    Is True once per 'interval' seconds. The clock is read on every evaluation.
+
     >>> example = UpdateInterval(interval=0.01)
     >>> bool(example)
     False
@@ -85,3 +117,61 @@ class UpdateInterval:
             return True
         else:
             return False
+
+
+class AdaptiveUpdateInterval(UpdateInterval):
+    """
+    Is True once per 'interval' seconds, but reads the clock only every 'check_every' evaluations.
+
+    Only for loops with many cheap evaluations of a similar duration, e.g.: the collect processes
+    evaluate it for every dir entry. 'check_every' is calibrated from the observed evaluation rate,
+    so the clock is read about CHECKS_PER_INTERVAL times per interval. It starts with 1 and is
+    limited to MAX_CHECK_EVERY: A update is delayed by at most MAX_CHECK_EVERY evaluations.
+    Use UpdateInterval for evaluations that may take long, e.g.: per hashed chunk or per processed file.
+
+    >>> example = AdaptiveUpdateInterval(interval=0.01)
+    >>> bool(example)
+    False
+    >>> import time
+    >>> time.sleep(0.02)
+    >>> any(bool(example) for _ in range(example.check_every))
+    True
+    >>> bool(example)
+    False
+    """
+    CHECKS_PER_INTERVAL = 10
+    MAX_CHECK_EVERY = 128
+
+    def __init__(self, *, interval):
+        self.check_every = 1
+        self.countdown = 1
+        self.last_check = default_timer()
+        super().__init__(interval=interval)
+
+    def set_next_update(self):
+        self.next_update = self.last_check + self.interval
+
+    def _calibrate(self, now):
+        elapsed = now - self.last_check
+        self.last_check = now
+
+        target = self.interval / self.CHECKS_PER_INTERVAL
+        if elapsed > target:
+            # Too slow -> read the clock more often:
+            self.check_every = max(int(self.check_every * target / elapsed), 1)
+        elif elapsed * 2 < target and self.check_every < self.MAX_CHECK_EVERY:
+            self.check_every *= 2
+        self.countdown = self.check_every
+
+    def __bool__(self):
+        self.countdown -= 1
+        if self.countdown > 0:
+            return False
+
+        now = default_timer()
+        self._calibrate(now)
+        if now >= self.next_update:
+            self.set_next_update()
+            return True
+        else:
+            return False